@@ -1,14 +1,40 @@
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, request, jsonify, send_from_directory, Response, stream_with_context, g
 from flask_cors import CORS
+import click
 import sqlite3
-from datetime import datetime
-import uuid
+from datetime import datetime, date
+import json
+import base64
+import bisect
+import csv
+import hashlib
+import heapq
+import io
 import random
 import string
 import os
+import threading
+import time
+from functools import wraps
+from itertools import islice
 from dotenv import load_dotenv
-from werkzeug.security import generate_password_hash, check_password_hash
 from flask_mail import Mail, Message
+from db import ConnectionPool, PoolTimeout
+from migrations import run_migrations, explain_query_plan, find_table_scans
+from mail_queue import MailOutbox
+from hashing import PasswordHasher, HasherBusy
+from events import EventBus, StreamsBusy, format_sse
+from cache import CachedValue, LRUCache
+from reports import AttendanceColumns, build_attendance_report, attendance_columns_query
+from work_calendar import WorkingCalendar, parse_holiday_text, as_date
+from intervals import IntervalIndex
+from metrics import MetricsRegistry, SamplingProfiler
+from static_assets import build_assets, is_public
+from write_batcher import WriteBatcher, WriterBusy, DURABILITY_LEVELS
+from archive import ArchiveStore
+from org_chart import ReportingCycle, refresh_reporting_lines, rebuild_org_chart
+from employee_search import match_expression, rebuild_employee_search
+from public_ids import ATTENDANCE, LEAVE, COMPOFF, public_id, public_id_sql, resolve_record_id, resolve_record_ids
 
 # --- Load Environment Variables ---
 load_dotenv()
@@ -17,9 +43,9 @@ app = Flask(__name__)
 CORS(app)
 
 # --- SECURE: Email Configuration from Environment Variables ---
-app.config['MAIL_SERVER'] = 'smtp.gmail.com'
-app.config['MAIL_PORT'] = 587
-app.config['MAIL_USE_TLS'] = True
+app.config['MAIL_SERVER'] = os.getenv('MAIL_SERVER', 'smtp.gmail.com')
+app.config['MAIL_PORT'] = int(os.getenv('MAIL_PORT', '587'))
+app.config['MAIL_USE_TLS'] = os.getenv('MAIL_USE_TLS', 'true').lower() == 'true'
 app.config['MAIL_USERNAME'] = os.getenv('MAIL_USERNAME')
 app.config['MAIL_PASSWORD'] = os.getenv('MAIL_PASSWORD')
 app.config['MAIL_DEFAULT_SENDER'] = os.getenv('MAIL_USERNAME')
@@ -32,19 +58,98 @@ def serve_index():
 
 @app.route('/<path:path>')
 def serve_static_files(path):
-    # This serves other files like hello.js, hello.css, and any images
+    # This serves other files like hello.js, hello.css, and any images (never hrms.db, .env or source)
+    if not is_public(os.path.basename(path)):
+        return jsonify({"message": "Not found"}), 404
     return send_from_directory('.', path)
-DATABASE = 'hrms.db'
+STATIC_BUILD_DIR = os.getenv('STATIC_BUILD_DIR', os.path.join(app.root_path, 'static_build'))
+DATABASE = os.getenv('HRMS_DATABASE', 'hrms.db')
+DB_POOL_SIZE = int(os.getenv('HRMS_DB_POOL_SIZE', '16'))
+# Per-year files written by `flask archive-years`; defaults to archive/ next to the database.
+ARCHIVE_DIR = os.getenv('HRMS_ARCHIVE_DIR') or os.path.join(os.path.dirname(os.path.abspath(DATABASE)), 'archive')
 
 # --- SECURE: Admin Configuration from Environment Variables ---
 ADMIN_EMAIL = os.getenv('ADMIN_EMAIL', 'admin@gmail.com')
-ADMIN_PASSWORD_HASH = generate_password_hash(os.getenv('ADMIN_PASSWORD_RAW', '123'))
+# --- Password Hashing Pool ---
+password_hasher = PasswordHasher(
+    workers=int(os.getenv('HASH_WORKERS', str(min(4, os.cpu_count() or 1)))),
+    max_queue=int(os.getenv('HASH_MAX_QUEUE', '256')),
+    queue_timeout=float(os.getenv('HASH_QUEUE_TIMEOUT', '10')),
+    method=os.getenv('PASSWORD_HASH_METHOD') or None,
+)
+
+# Set ADMIN_PASSWORD_HASH (see `flask hash-password`) to skip hashing the raw password altogether;
+# otherwise it is hashed once, on the first admin login, rather than at every import and worker boot.
+def load_admin_password_hash():
+    return os.getenv('ADMIN_PASSWORD_HASH') or password_hasher.hash(os.getenv('ADMIN_PASSWORD_RAW', '123'))
+
+admin_password_hash = CachedValue(load_admin_password_hash)
+
+@app.errorhandler(HasherBusy)
+def handle_hasher_busy(e):
+    return jsonify({"message": "Server is busy, please try again shortly."}), 503, {"Retry-After": "2"}
+
+# --- Metrics and Profiling ---
+# Per-route request counts, latency histograms and response bytes, plus SQL
+# statement counts, execute latency and fetched rows from the pooled
+# connections, all at /metrics. The sampling profiler is off unless
+# PROFILER_ENABLED is set or an admin turns it on at /admin/profiler.
+metrics = MetricsRegistry()
+profiler = SamplingProfiler(metrics, interval=float(os.getenv('PROFILER_INTERVAL_MS', '5')) / 1000)
+SQL_METRICS_ENABLED = os.getenv('SQL_METRICS', 'true').lower() == 'true'
+
+@app.before_request
+def start_request_metrics():
+    g.request_started = time.perf_counter()
+    g.route_label = f"{request.method} {request.url_rule.rule if request.url_rule else 'unmatched'}"
+    metrics.current[threading.get_ident()] = g.route_label
+
+@app.after_request
+def record_request_metrics(response):
+    started = g.get('request_started')
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        metrics.requests.inc(route, request.method, response.status_code)
+        metrics.latency.observe(time.perf_counter() - started, route, request.method)
+        if not response.is_streamed and response.content_length:
+            metrics.response_bytes.inc(route, amount=response.content_length)
+    return response
+
+@app.teardown_request
+def finish_request_metrics(exc):
+    if exc is not None:
+        metrics.exceptions.inc(request.url_rule.rule if request.url_rule else 'unmatched', type(exc).__name__)
+    metrics.current.pop(threading.get_ident(), None)
 
 # --- Database Initialization and Helper Functions ---
+db_pool = ConnectionPool(DATABASE, max_size=DB_POOL_SIZE, observer=metrics if SQL_METRICS_ENABLED else None)
+
 def get_db_connection():
-    conn = sqlite3.connect(DATABASE)
-    conn.row_factory = sqlite3.Row
-    return conn
+    # Warm, WAL-mode connection from the pool; conn.close() hands it back.
+    return db_pool.acquire()
+
+@app.errorhandler(PoolTimeout)
+def handle_pool_timeout(e):
+    return jsonify({"message": "Server is busy, please try again shortly."}), 503, {"Retry-After": "2"}
+
+archives = ArchiveStore(ARCHIVE_DIR)
+
+def year_of(value):
+    # Year of an ISO date filter; None (no bound) when absent or malformed.
+    try:
+        return int(value[:4]) if value else None
+    except ValueError:
+        return None
+
+def merge_archived(conn, query, years, rows, key, reverse=False):
+    """Add what query(schema) -> (sql, params) finds in the archived years to rows read from main, sorted by key."""
+    if not years:
+        return rows
+    rows = list(rows)
+    with archives.attached(conn, years) as schemas:
+        for schema in schemas[1:]:
+            rows.extend(conn.execute(*query(schema)).fetchall())
+    return sorted(rows, key=key, reverse=reverse)
 
 def init_db():
     conn = get_db_connection()
@@ -139,69 +244,633 @@ def init_db():
         ('2025-08-15', 'Independence Day'), ('2025-10-02', 'Mahatma Gandhi\'s Birthday / Dussehra'),
         ('2025-10-20', 'Diwali'), ('2025-12-25', 'Christmas Day'),
     ]
-    cursor.executemany('INSERT OR IGNORE INTO holidays (date, name) VALUES (?, ?)', holidays)
+    # Seed a fresh database only; after that the list is managed through /admin/holidays/import.
+    if cursor.execute("SELECT 1 FROM holidays LIMIT 1").fetchone() is None:
+        cursor.executemany('INSERT INTO holidays (date, name) VALUES (?, ?)', holidays)
     conn.commit()
+    run_migrations(conn)
     conn.close()
 
+# --- Push Events (SSE) ---
+ADMIN_TOPIC = 'admin'
+SSE_HEARTBEAT_SECONDS = float(os.getenv('SSE_HEARTBEAT_SECONDS', '15'))
+# Every open stream holds a server thread. Past SSE_MAX_STREAMS (0 = no limit) streams
+# are refused with a 503 and the page polls instead; streams are closed after
+# SSE_MAX_STREAM_SECONDS so the browser reconnects and the slots change hands.
+SSE_MAX_STREAMS = int(os.getenv('SSE_MAX_STREAMS', '32'))
+SSE_MAX_STREAM_SECONDS = float(os.getenv('SSE_MAX_STREAM_SECONDS', '300'))
+event_bus = EventBus(buffer_size=int(os.getenv('SSE_BUFFER_SIZE', '100')), max_subscriptions=SSE_MAX_STREAMS or None)
+
+@app.errorhandler(StreamsBusy)
+def handle_streams_busy(e):
+    return jsonify({"message": "Too many open event streams, poll for updates instead."}), 503, {"Retry-After": "60"}
+
+def employee_topic(employee_id):
+    return f"employee:{employee_id}"
+
+def publish_on_commit(conn, topic, event_type, data):
+    # Subscribers only hear about writes that actually committed.
+    conn.on_commit(lambda: event_bus.publish(topic, event_type, data))
+
+def admin_queue_changed(conn, event_type, data):
+    # Employee count or a pending queue moved: push to admin dashboards and drop the cached counters.
+    publish_on_commit(conn, ADMIN_TOPIC, event_type, data)
+    conn.on_commit(dashboard_stats_cache.invalidate)
+
 def create_notification(conn, employee_id, message):
     try:
         cursor = conn.cursor()
-        notification_id = str(uuid.uuid4())
-        cursor.execute(
-            'INSERT INTO notifications (notification_id, employee_id, message) VALUES (?, ?, ?)',
-            (notification_id, employee_id, message)
-        )
+        cursor.execute('INSERT INTO notifications (employee_id, message) VALUES (?, ?)', (employee_id, message))
+        publish_on_commit(conn, employee_topic(employee_id), 'notification', {"id": cursor.lastrowid, "message": message})
     except sqlite3.Error as e:
-        print(f"Database error creating notification: {e}")
+        metrics.errors.inc('create_notification')
+        app.logger.error("Database error creating notification: %s", e)
+
+def create_notifications(conn, notifications):
+    # Bulk variant of create_notification for (employee_id, message) pairs; events carry the row ids too.
+    cursor = conn.cursor()
+    for employee_id, message in notifications:
+        cursor.execute('INSERT INTO notifications (employee_id, message) VALUES (?, ?)', (employee_id, message))
+        publish_on_commit(conn, employee_topic(employee_id), 'notification', {"id": cursor.lastrowid, "message": message})
+
+# --- Holiday Calendar ---
+# Leave-day counts and the comp-off rule read this in-memory calendar. The
+# holiday import invalidates it on commit; the TTL covers other processes.
+def load_holiday_calendar():
+    conn = get_db_connection()
+    try:
+        return WorkingCalendar(conn.execute("SELECT date, name FROM holidays"))
+    finally:
+        conn.close()
+
+holiday_calendar = CachedValue(load_holiday_calendar, ttl=300)
+
+# --- Leave Balance Ledger ---
+# leave_balances holds the allotment per leave type plus a running <type>_availed
+# column. The admin action handlers keep it in step with approvals inside the same
+# transaction, so a balance read is a single primary-key lookup.
+LEAVE_ALLOTMENT_DEFAULTS = {
+    'sick_leave': 8, 'casual_leave': 18, 'earned_leave': 0,
+    'paternity_leave': 0, 'wfh': 12, 'compoff': 0,
+}
+LEAVE_TYPE_COLUMNS = {
+    'Sick Leave': 'sick_leave', 'Casual Leave': 'casual_leave',
+    'Earned Leave': 'earned_leave', 'Paternity Leave': 'paternity_leave',
+    'WFH': 'wfh', 'Compoff': 'compoff', 'Comp-off': 'compoff',
+}
+LEDGER_COLUMNS = set(LEAVE_ALLOTMENT_DEFAULTS) | {f"{column}_availed" for column in LEAVE_ALLOTMENT_DEFAULTS}
+
+def adjust_leave_ledger(conn, employee_id, column, delta):
+    if column not in LEDGER_COLUMNS or not delta:
+        return
+    conn.execute("INSERT OR IGNORE INTO leave_balances (employee_id) VALUES (?)", (employee_id,))
+    conn.execute(f"UPDATE leave_balances SET {column} = {column} + ? WHERE employee_id = ?", (delta, employee_id))
+
+def apply_ledger_deltas(conn, deltas):
+    # deltas maps (employee_id, column) -> change; one executemany per ledger column.
+    deltas = {key: delta for key, delta in deltas.items() if delta and key[1] in LEDGER_COLUMNS}
+    if not deltas:
+        return
+    conn.executemany("INSERT OR IGNORE INTO leave_balances (employee_id) VALUES (?)",
+                     [(employee_id,) for employee_id in {employee_id for employee_id, _ in deltas}])
+    by_column = {}
+    for (employee_id, column), delta in deltas.items():
+        by_column.setdefault(column, []).append((delta, employee_id))
+    for column, rows in by_column.items():
+        conn.executemany(f"UPDATE leave_balances SET {column} = {column} + ? WHERE employee_id = ?", rows)
+
+def leave_ledger_delta(leave_type, leave_days, old_status, new_status):
+    # Only a transition into or out of 'Approved' moves the availed total.
+    column = LEAVE_TYPE_COLUMNS.get(leave_type)
+    if not column or old_status == new_status:
+        return None
+    if new_status == 'Approved':
+        return f"{column}_availed", leave_days or 0
+    if old_status == 'Approved':
+        return f"{column}_availed", -(leave_days or 0)
+    return None
+
+def compoff_ledger_delta(old_status, new_status):
+    if old_status == new_status:
+        return None
+    if new_status == 'Approved':
+        return 'compoff', 1
+    if old_status == 'Approved':
+        return 'compoff', -1
+    return None
+
+def leave_action_message(leave_days, leave_type, action, comment):
+    message = f"Your request for {leave_days} days of {leave_type} has been {action.lower()}."
+    if comment:
+        message += f" Admin comment: {comment}"
+    return message
+
+def compoff_action_message(work_date, action, comment):
+    if action == 'Approved':
+        message = f"Your request to earn a comp-off for working on {work_date} has been approved. Your balance has been updated."
+    else:
+        message = f"Your request to earn a comp-off for working on {work_date} has been rejected."
+    if comment:
+        message += f" Admin comment: {comment}"
+    return message
+
+# --- Leave Validation ---
+# A new request is checked inside the write transaction that inserts it, so two
+# concurrent submissions cannot both pass. Overlap and comp-off checks are
+# index seeks on the employee's active interval; the balance check is the
+# ledger row minus days already reserved by pending requests of that type.
+LEAVE_COLUMN_TYPES = {column: [name for name, mapped in LEAVE_TYPE_COLUMNS.items() if mapped == column]
+                      for column in LEAVE_ALLOTMENT_DEFAULTS}
+
+def pending_leave_days_sql(column):
+    placeholders = ', '.join('?' * len(LEAVE_COLUMN_TYPES[column]))
+    return f"""SELECT COALESCE(SUM(leave_days), 0) FROM leave_applications
+               WHERE employee_id = ? AND leave_type IN ({placeholders}) AND status = 'Pending'"""
+
+def leave_available(balance_row, column):
+    allotted = balance_row[column] if balance_row else LEAVE_ALLOTMENT_DEFAULTS[column]
+    availed = balance_row[f"{column}_availed"] if balance_row else 0
+    return allotted - availed
+
+def overlap_conflict(row):
+    return {"type": "overlap", "record_id": row['record_id'], "from_date": row['from_date'], "to_date": row['end_date'],
+            "message": f"Overlaps {row['status'].lower()} {row['leave_type']} from {row['from_date']} to {row['end_date']}"}
+
+def compoff_conflict(work_date):
+    return {"type": "compoff", "work_date": work_date,
+            "message": f"An approved comp-off says you worked on {work_date}"}
+
+def balance_conflict(leave_type, available, requested):
+    return {"type": "balance", "available": available, "requested": requested,
+            "message": f"Insufficient {leave_type} balance: {available} days available, {requested} requested"}
+
+def leave_request_conflicts(conn, employee_id, leave_type, from_date, to_date, leave_days):
+    conflicts = [overlap_conflict(row) for row in conn.execute(OVERLAPPING_LEAVE_SQL, (employee_id, from_date, to_date))]
+    conflicts += [compoff_conflict(row['work_date'])
+                  for row in conn.execute(APPROVED_COMPOFF_DATES_SQL, (employee_id, from_date, to_date))]
+    column = LEAVE_TYPE_COLUMNS[leave_type]
+    reserved = conn.execute(pending_leave_days_sql(column), (employee_id, *LEAVE_COLUMN_TYPES[column])).fetchone()[0]
+    available = leave_available(conn.execute(LEAVE_BALANCE_SQL, (employee_id,)).fetchone(), column) - reserved
+    if leave_days > available:
+        conflicts.append(balance_conflict(leave_type, available, leave_days))
+    return conflicts
+
+def validate_pending_leaves(conn):
+    # One pass over all active leave: an interval index per employee, pending
+    # requests replayed in submission order against the ledger.
+    leaves_by_employee, worked_dates = {}, {}
+    for row in conn.execute(ACTIVE_LEAVE_INTERVALS_SQL):
+        leaves_by_employee.setdefault(row['employee_id'], []).append(row)
+    for row in conn.execute(APPROVED_COMPOFFS_SQL):
+        worked_dates.setdefault(row['employee_id'], []).append(row['work_date'])
+    checked, invalid = 0, []
+    for employee_id, leaves in leaves_by_employee.items():
+        pending = sorted((row for row in leaves if row['status'] == 'Pending'),
+                         key=lambda row: (row['submitted_at'] or '', row['id']))
+        if not pending:
+            continue
+        index = IntervalIndex((row['from_date'], row['end_date'], row) for row in leaves)
+        worked = worked_dates.get(employee_id, [])
+        balance_row = conn.execute(LEAVE_BALANCE_SQL, (employee_id,)).fetchone()
+        reserved = {}
+        for row in pending:
+            checked += 1
+            conflicts = [overlap_conflict(other) for other in index.overlapping(row['from_date'], row['end_date'])
+                         if other['id'] != row['id']]
+            conflicts += [compoff_conflict(work_date) for work_date in
+                          worked[bisect.bisect_left(worked, row['from_date']):bisect.bisect_right(worked, row['end_date'])]]
+            column = LEAVE_TYPE_COLUMNS.get(row['leave_type'])
+            leave_days = row['leave_days'] or 0
+            if column is None:
+                conflicts.append({"type": "leave_type", "message": f"Unknown leave type {row['leave_type']}"})
+            else:
+                available = leave_available(balance_row, column) - reserved.get(column, 0)
+                if leave_days > available:
+                    conflicts.append(balance_conflict(row['leave_type'], available, leave_days))
+                elif not conflicts:
+                    reserved[column] = reserved.get(column, 0) + leave_days
+            if conflicts:
+                invalid.append({"record_id": row['record_id'], "employee_id": employee_id, "leave_type": row['leave_type'],
+                                "from_date": row['from_date'], "to_date": row['end_date'], "leave_days": leave_days,
+                                "conflicts": conflicts})
+    return checked, invalid
+
+# --- Outbound Mail Queue ---
+def send_outbox_batch(messages):
+    # One SMTP connection for the whole batch; a failed message does not stop the rest.
+    errors = []
+    with app.app_context():
+        with mail.connect() as smtp:
+            for recipients, subject, body in messages:
+                try:
+                    smtp.send(Message(subject, recipients=recipients, body=body))
+                    errors.append(None)
+                except Exception as e:
+                    errors.append(e)
+    return errors
+
+mail_outbox = MailOutbox(
+    get_db_connection, send_outbox_batch,
+    workers=int(os.getenv('MAIL_WORKERS', '2')),
+    batch_size=int(os.getenv('MAIL_BATCH_SIZE', '20')),
+    max_attempts=int(os.getenv('MAIL_MAX_ATTEMPTS', '5')),
+    errors=metrics.errors,
+)
 
 with app.app_context():
     init_db()
 
+# --- Hot-path Queries (checked by `flask check-query-plans`) ---
+NOTIFICATIONS_BY_EMPLOYEE_SQL = "SELECT message, is_read FROM notifications WHERE employee_id = ? ORDER BY id DESC"
+MARK_NOTIFICATIONS_READ_SQL = "UPDATE notifications SET is_read = 1 WHERE employee_id = ? AND is_read = 0"
+NOTIFICATION_FEED_SQL = '''SELECT id, message, is_read, timestamp FROM notifications
+                           WHERE employee_id = ? AND id > ? AND id < ? ORDER BY id DESC LIMIT ?'''
+# Polling reads forward from the cursor, so a burst larger than one page is fetched page by page, not skipped.
+NOTIFICATION_FEED_SINCE_SQL = '''SELECT id, message, is_read, timestamp FROM notifications
+                                 WHERE employee_id = ? AND id > ? AND id < ? ORDER BY id ASC LIMIT ?'''
+UNREAD_NOTIFICATIONS_COUNT_SQL = "SELECT COUNT(*) FROM notifications WHERE employee_id = ? AND is_read = 0"
+LEAVE_APPLICATION_COLUMNS = f"""{public_id_sql(LEAVE, 'l.id')} AS record_id, l.employee_id, l.leave_type, l.from_date,
+           l.to_date, l.description, l.status, l.comment, l.submitted_at, l.leave_days"""
+
+def leave_applications_query(employee_id, start=None, end=None, schema='main'):
+    # Leave overlapping [start, end]; schema is 'main' or an attached yearly archive.
+    sql = f"SELECT l.id, {LEAVE_APPLICATION_COLUMNS} FROM {schema}.leave_applications l WHERE l.employee_id = ?"
+    params = [employee_id]
+    if start:
+        sql += " AND COALESCE(l.to_date, l.from_date) >= ?"
+        params.append(start)
+    if end:
+        sql += " AND l.from_date <= ?"
+        params.append(end)
+    return sql + " ORDER BY l.submitted_at DESC, l.id DESC", params
+
+LEAVE_BALANCE_SQL = "SELECT * FROM leave_balances WHERE employee_id = ?"
+PENDING_LEAVE_REQUESTS_SQL = f'''SELECT {LEAVE_APPLICATION_COLUMNS}, e.first_name, e.last_name, e.email, e.reporting_manager1, e.reporting_manager2
+           FROM leave_applications l JOIN employees e ON l.employee_id = e.id
+           WHERE l.status = 'Pending' ORDER BY l.submitted_at ASC'''
+PENDING_COMPOFF_REQUESTS_SQL = f'''SELECT {public_id_sql(COMPOFF, 'l.id')} AS record_id, l.employee_id, l.work_date, l.description,
+                  l.status, l.comment, l.submitted_at, e.first_name, e.last_name, e.email
+           FROM compoff_requests l JOIN employees e ON l.employee_id = e.id
+           WHERE l.status = 'Pending' ORDER BY l.submitted_at ASC'''
+# Manager-scoped queues: pending requests of everyone under a manager, down to max depth (1 = direct reports).
+# CROSS JOIN fixes the join order: walk the manager's subtree and probe each member's pending rows, rather
+# than the company-wide pending list, which is what the planner picks for small teams without ANALYZE.
+TEAM_PENDING_LEAVE_REQUESTS_SQL = f'''SELECT {LEAVE_APPLICATION_COLUMNS}, e.first_name, e.last_name, e.email, e.reporting_manager1, e.reporting_manager2,
+                  c.depth
+           FROM reporting_closure c
+           CROSS JOIN leave_applications l ON l.employee_id = c.descendant_id AND l.status = 'Pending'
+           CROSS JOIN employees e ON l.employee_id = e.id
+           WHERE c.ancestor_id = ? AND c.depth <= ? ORDER BY l.submitted_at ASC'''
+TEAM_PENDING_COMPOFF_REQUESTS_SQL = f'''SELECT {public_id_sql(COMPOFF, 'l.id')} AS record_id, l.employee_id, l.work_date, l.description,
+                  l.status, l.comment, l.submitted_at, e.first_name, e.last_name, e.email, c.depth
+           FROM reporting_closure c
+           CROSS JOIN compoff_requests l ON l.employee_id = c.descendant_id AND l.status = 'Pending'
+           CROSS JOIN employees e ON l.employee_id = e.id
+           WHERE c.ancestor_id = ? AND c.depth <= ? ORDER BY l.submitted_at ASC'''
+TEAM_MEMBERS_SQL = '''SELECT e.id, e.first_name, e.last_name, e.email, e.department, e.employee_role, c.depth
+           FROM reporting_closure c JOIN employees e ON e.id = c.descendant_id
+           WHERE c.ancestor_id = ? AND c.depth <= ? ORDER BY c.depth, e.id'''
+OVERLAPPING_LEAVE_SQL = f'''SELECT {public_id_sql(LEAVE, 'id')} AS record_id, leave_type, from_date, COALESCE(to_date, from_date) AS end_date, status
+           FROM leave_applications
+           WHERE employee_id = ? AND status IN ('Pending', 'Approved')
+             AND COALESCE(to_date, from_date) >= ? AND from_date <= ? ORDER BY from_date'''
+APPROVED_COMPOFF_DATES_SQL = f'''SELECT {public_id_sql(COMPOFF, 'id')} AS record_id, work_date FROM compoff_requests
+           WHERE employee_id = ? AND work_date >= ? AND work_date <= ? AND status = 'Approved' ORDER BY work_date'''
+ACTIVE_LEAVE_INTERVALS_SQL = f'''SELECT id, {public_id_sql(LEAVE, 'id')} AS record_id, employee_id, leave_type, from_date,
+                  COALESCE(to_date, from_date) AS end_date, status, leave_days, submitted_at
+           FROM leave_applications WHERE status IN ('Pending', 'Approved') ORDER BY employee_id'''
+APPROVED_COMPOFFS_SQL = "SELECT employee_id, work_date FROM compoff_requests WHERE status = 'Approved' ORDER BY employee_id, work_date"
+HOLIDAYS_BY_YEAR_SQL = "SELECT date, name FROM holidays WHERE date >= ? AND date < ? ORDER BY date"
+DASHBOARD_COUNTERS_SQL = "SELECT name, value FROM dashboard_counters WHERE name IN ('employee_count', 'pending_leaves', 'pending_compoffs')"
+ATTENDANCE_RECORD_ID = public_id_sql(ATTENDANCE, 'ar.id')
+
+def employee_attendance_query(employee_id, start=None, end=None, schema='main'):
+    sql = f'''SELECT ar.id, {ATTENDANCE_RECORD_ID} AS record_id, ar.date, ar.login_time, ar.work_location, ar.logout_time,
+                    e.first_name, e.last_name
+             FROM {schema}.attendance_records ar JOIN employees e ON ar.employee_id = e.id
+             WHERE ar.employee_id = ?'''
+    params = [employee_id]
+    if start:
+        sql += " AND ar.date >= ?"
+        params.append(start)
+    if end:
+        sql += " AND ar.date <= ?"
+        params.append(end)
+    return sql + " ORDER BY ar.date DESC, ar.login_time DESC, ar.id DESC", params
+
+ATTENDANCE_PAGE_DEFAULT_LIMIT = 100
+ATTENDANCE_PAGE_MAX_LIMIT = 500
+
+def encode_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+def decode_cursor(cursor, types=(str, str, int)):
+    # Attendance pages: [date, login_time, id]; other keysets pass their own types.
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(values, list) or len(values) != len(types) \
+            or not all(isinstance(v, t) and not isinstance(v, bool) for v, t in zip(values, types)):
+        return None
+    return values
+
+def build_attendance_page_query(filters, after=None, limit=ATTENDANCE_PAGE_DEFAULT_LIMIT, schema='main'):
+    # Keyset pagination over (date, login_time, id) DESC; each page is one index range read.
+    where, params = [], []
+    if filters.get('from'):
+        where.append("ar.date >= ?")
+        params.append(filters['from'])
+    if filters.get('to'):
+        where.append("ar.date <= ?")
+        params.append(filters['to'])
+    if filters.get('employee_id'):
+        where.append("ar.employee_id = ?")
+        params.append(filters['employee_id'])
+    if filters.get('work_location'):
+        where.append("ar.work_location = ?")
+        params.append(filters['work_location'])
+    if after:
+        where.append("(ar.date, ar.login_time, ar.id) < (?, ?, ?)")
+        params.extend(after)
+    sql = f'''
+            SELECT ar.id, {ATTENDANCE_RECORD_ID} AS record_id, ar.date, ar.login_time, ar.work_location, ar.logout_time,
+                   e.first_name, e.last_name
+            FROM {schema}.attendance_records ar
+            JOIN employees e ON ar.employee_id = e.id
+        '''
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY ar.date DESC, ar.login_time DESC, ar.id DESC LIMIT ?"
+    params.append(limit + 1)
+    return sql, params
+
+QUERY_PLAN_CHECKS = [
+    ('get_notifications', NOTIFICATIONS_BY_EMPLOYEE_SQL, ('SSQ-1001',)),
+    ('mark_notifications_as_read', MARK_NOTIFICATIONS_READ_SQL, ('SSQ-1001',)),
+    ('get_notification_feed', NOTIFICATION_FEED_SQL, ('SSQ-1001', 0, 2**63 - 1, 50)),
+    ('get_notification_feed', NOTIFICATION_FEED_SINCE_SQL, ('SSQ-1001', 0, 2**63 - 1, 50)),
+    ('get_unread_notification_count', UNREAD_NOTIFICATIONS_COUNT_SQL, ('SSQ-1001',)),
+    ('get_leave_applications', *leave_applications_query('SSQ-1001')),
+    ('get_leave_applications', *leave_applications_query('SSQ-1001', '2025-01-01', '2025-12-31')),
+    ('get_leave_balance', LEAVE_BALANCE_SQL, ('SSQ-1001',)),
+    ('get_pending_leave_requests', PENDING_LEAVE_REQUESTS_SQL, ()),
+    ('get_pending_compoff_requests', PENDING_COMPOFF_REQUESTS_SQL, ()),
+    ('get_team_leave_requests', TEAM_PENDING_LEAVE_REQUESTS_SQL, ('SSQ-1001', 2**31)),
+    ('get_team_compoff_requests', TEAM_PENDING_COMPOFF_REQUESTS_SQL, ('SSQ-1001', 2**31)),
+    ('get_team_members', TEAM_MEMBERS_SQL, ('SSQ-1001', 1)),
+    ('get_dashboard_stats', DASHBOARD_COUNTERS_SQL, ()),
+    ('get_holidays', HOLIDAYS_BY_YEAR_SQL, ('2025-01-01', '2026-01-01')),
+    ('submit_leave_application', OVERLAPPING_LEAVE_SQL, ('SSQ-1001', '2025-01-01', '2025-01-31')),
+    ('submit_leave_application', APPROVED_COMPOFF_DATES_SQL, ('SSQ-1001', '2025-01-01', '2025-01-31')),
+    ('submit_leave_application', pending_leave_days_sql('compoff'), ('SSQ-1001', 'Compoff', 'Comp-off')),
+    ('validate_pending_leave_requests', ACTIVE_LEAVE_INTERVALS_SQL, ()),
+    ('validate_pending_leave_requests', APPROVED_COMPOFFS_SQL, ()),
+    ('conditional_get', "SELECT resource, version FROM resource_versions WHERE resource IN (?, ?)", ('profile:SSQ-1001', 'admin:attendance')),
+    ('get_employee_attendance', *employee_attendance_query('SSQ-1001')),
+    ('get_employee_attendance', *employee_attendance_query('SSQ-1001', '2025-01-01', '2025-01-31')),
+    ('get_all_attendance_records', *build_attendance_page_query({})),
+    ('get_all_attendance_records', *build_attendance_page_query({'from': '2025-01-01', 'to': '2025-01-31'}, ['2025-01-31', '18:00:00', 2**62])),
+    ('get_all_attendance_records', *build_attendance_page_query({'employee_id': 'SSQ-1001'}, ['2025-01-31', '18:00:00', 2**62])),
+    ('get_all_attendance_records', *build_attendance_page_query({'work_location': 'Office'})),
+]
+
+def register_query_plan_check(endpoint, sql, params=()):
+    QUERY_PLAN_CHECKS.append((endpoint, sql, params))
+
+@app.cli.command('check-query-plans')
+def check_query_plans():
+    """Fail if any endpoint query falls back to a full table scan."""
+    conn = get_db_connection()
+    failures = 0
+    try:
+        for endpoint, sql, params in QUERY_PLAN_CHECKS:
+            plan = explain_query_plan(conn, sql, params)
+            scans = find_table_scans(plan)
+            print(f"{'FAIL' if scans else 'ok':4}  {endpoint}: {' | '.join(plan)}")
+            failures += bool(scans)
+    finally:
+        conn.close()
+    if failures:
+        raise SystemExit(f"{failures} endpoint queries fall back to a table scan")
+
+# --- HTTP Caching (conditional GET) ---
+# Triggers from migration 8 bump a version stamp in resource_versions whenever a
+# row behind one of these responses changes. The ETag is derived from the URL and
+# those stamps, so a matching If-None-Match gets a 304 after one primary-key read,
+# and a changed-elsewhere client is served from the LRU before the view runs.
+response_cache = LRUCache(max_entries=int(os.getenv('RESPONSE_CACHE_SIZE', '512')))
+http_cache_stats = {"not_modified": 0}
+
+def load_resource_versions(resources):
+    conn = get_db_connection()
+    try:
+        rows = conn.execute(
+            f"SELECT resource, version FROM resource_versions WHERE resource IN ({', '.join('?' for _ in resources)})",
+            resources
+        ).fetchall()
+        versions = {row['resource']: row['version'] for row in rows}
+        return [versions.get(resource, 0) for resource in resources]
+    finally:
+        conn.close()
+
+def conditional_get(*resource_templates):
+    def decorator(view):
+        @wraps(view)
+        def wrapper(**kwargs):
+            resources = [template.format(**kwargs) for template in resource_templates]
+            try:
+                versions = load_resource_versions(resources)
+            except sqlite3.Error:
+                return view(**kwargs)
+            # Versions are read before the view runs, so a response is never filed under a newer tag than its data.
+            etag = hashlib.sha1(f"{request.full_path}|{versions}".encode()).hexdigest()[:20]
+            if request.if_none_match.contains(etag):
+                http_cache_stats["not_modified"] += 1
+                response = Response(status=304)
+            else:
+                cached = response_cache.get(etag)
+                if cached:
+                    response = Response(cached[0], status=200, mimetype=cached[1])
+                else:
+                    response = app.make_response(view(**kwargs))
+                    if response.status_code != 200 or response.is_streamed:
+                        return response
+                    response_cache.put(etag, (response.get_data(), response.mimetype))
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        return wrapper
+    return decorator
+
+@app.route('/admin/cache-stats', methods=['GET'])
+def get_cache_stats():
+    return jsonify({
+        "response_cache": response_cache.stats(),
+        "not_modified": http_cache_stats["not_modified"],
+        "dashboard_stats": {"hits": dashboard_stats_cache.hits, "misses": dashboard_stats_cache.misses},
+    }), 200
+
 # --- API Endpoints ---
+EMPLOYEE_INSERT_FIELDS = [
+    'gender', 'dob', 'permanent_address', 'current_address', 'pan_number', 'aadhar_number',
+    'contactnumber', 'alternate_contact_number', 'alternate_contact_person',
+    'alternate_contact_relation', 'emergency_number', 'account_number', 'ifsc_code',
+    'account_holder_name', 'branch', 'department', 'reporting_manager1', 'reporting_manager1_mail',
+    'reporting_manager2', 'reporting_manager2_mail', 'employee_role', 'employment_status',
+    'join_date', 'personal_email',
+]
+INSERT_EMPLOYEE_SQL = f"""
+    INSERT INTO employees (
+        id, first_name, last_name, email, password, {', '.join(EMPLOYEE_INSERT_FIELDS)}, force_password_change
+    ) VALUES (?, ?, ?, ?, ?, {', '.join('?' * len(EMPLOYEE_INSERT_FIELDS))}, 1)
+"""
+
+# Per-use-case projections of employees: the login check reads only what
+# idx_employees_login covers, and profile responses never load the password hash.
+# The planner would pick the UNIQUE(email) index and then read the whole row,
+# hence INDEXED BY (the index is created by migration 13).
+EMPLOYEE_PROFILE_COLUMNS = ', '.join(['id', 'first_name', 'last_name', 'email', *EMPLOYEE_INSERT_FIELDS,
+                                      'user_type', 'force_password_change'])
+EMPLOYEE_LOGIN_SQL = "SELECT id, password, force_password_change FROM employees INDEXED BY idx_employees_login WHERE email = ?"
+EMPLOYEE_PROFILE_SQL = f"SELECT {EMPLOYEE_PROFILE_COLUMNS} FROM employees WHERE id = ?"
+register_query_plan_check('login_employee', EMPLOYEE_LOGIN_SQL, ('x@example.com',))
+register_query_plan_check('get_employee_profile', EMPLOYEE_PROFILE_SQL, ('SSQ-1001',))
+
+def employee_insert_params(new_id, data, hashed_password):
+    return (new_id, data['first_name'], data['last_name'], data['email'], hashed_password,
+            *(data.get(field) for field in EMPLOYEE_INSERT_FIELDS))
+
+def allocate_ids(conn, name, count=1):
+    # Reserves `count` consecutive numbers; the UPDATE takes the write lock, so
+    # concurrent registrations can no longer mint the same id.
+    last = conn.execute("UPDATE id_sequences SET value = value + ? WHERE name = ? RETURNING value",
+                        (count, name)).fetchone()[0]
+    return range(last - count + 1, last + 1)
+
 @app.route('/register', methods=['POST'])
 def register_employee():
     data = request.get_json()
     required_fields = ["first_name", "last_name", "email", "password"]
     if not all(field in data for field in required_fields):
         return jsonify({"message": "Missing required fields"}), 400
+    hashed_password = password_hasher.hash(data['password'])
     conn = get_db_connection()
     cursor = conn.cursor()
     try:
         cursor.execute("SELECT email FROM employees WHERE email = ?", (data['email'],))
         if cursor.fetchone():
             return jsonify({"message": "Email already exists"}), 409
-        cursor.execute("SELECT MAX(CAST(SUBSTR(id, 5) AS INTEGER)) FROM employees WHERE id LIKE 'SSQ-%'")
-        last_id_num = cursor.fetchone()[0]
-        new_id_num = (last_id_num if last_id_num else 1000) + 1
-        new_id = f"SSQ-{new_id_num}"
-        hashed_password = generate_password_hash(data['password'])
-        cursor.execute('''
-            INSERT INTO employees (
-                id, first_name, last_name, email, password, gender, dob,
-                permanent_address, current_address, pan_number, aadhar_number,
-                contactnumber, alternate_contact_number, alternate_contact_person,
-                alternate_contact_relation, emergency_number, account_number,
-                ifsc_code, account_holder_name, branch, department,
-                reporting_manager1, reporting_manager1_mail,
-                reporting_manager2, reporting_manager2_mail,
-                employee_role, employment_status, join_date, personal_email, force_password_change
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 1)
-        ''', (
-            new_id, data['first_name'], data['last_name'], data['email'], hashed_password,
-            data.get('gender'), data.get('dob'), data.get('permanent_address'),
-            data.get('current_address'), data.get('pan_number'), data.get('aadhar_number'),
-            data.get('contactnumber'), data.get('alternate_contact_number'),
-            data.get('alternate_contact_person'), data.get('alternate_contact_relation'),
-            data.get('emergency_number'), data.get('account_number'), data.get('ifsc_code'),
-            data.get('account_holder_name'), data.get('branch'), data.get('department'),
-            data.get('reporting_manager1'), data.get('reporting_manager1_mail'),
-            data.get('reporting_manager2'), data.get('reporting_manager2_mail'),
-            data.get('employee_role'), data.get('employment_status'), data.get('join_date'),
-            data.get('personal_email')
-        ))
+        new_id = f"SSQ-{allocate_ids(conn, 'employee')[0]}"
+        cursor.execute(INSERT_EMPLOYEE_SQL, employee_insert_params(new_id, data, hashed_password))
         cursor.execute("INSERT INTO leave_balances (employee_id) VALUES (?)", (new_id,))
+        refresh_reporting_lines(conn, [new_id], registered=True)
+        admin_queue_changed(conn, 'employee_registered', {"id": new_id})
         conn.commit()
         return jsonify({"message": "Registration successful!", "id": new_id}), 201
+    except ReportingCycle as e:
+        conn.rollback()
+        return jsonify({"message": str(e)}), 400
+    except sqlite3.Error as e:
+        conn.rollback()
+        return jsonify({"message": f"Database error: {e}"}), 500
+    finally:
+        conn.close()
+
+# --- Bulk Employee Onboarding ---
+# Accepts a JSON list (or {"employees": [...]}) or a CSV upload with the same
+# column names as /register. Rows are validated up front; by default any invalid
+# row rejects the whole batch, ?skip_invalid=true imports the valid rows only.
+BULK_IMPORT_MAX_ROWS = int(os.getenv('BULK_IMPORT_MAX_ROWS', '20000'))
+EXISTING_EMAIL_CHUNK = 500
+
+def read_import_rows():
+    upload = request.files.get('file')
+    if upload is not None or request.mimetype == 'text/csv':
+        text = upload.read().decode('utf-8-sig') if upload is not None else request.get_data(as_text=True)
+        return [{key.strip(): (value.strip() or None) if value else None for key, value in row.items() if key}
+                for row in csv.DictReader(io.StringIO(text))]
+    data = request.get_json(silent=True)
+    rows = data.get('employees') if isinstance(data, dict) else data
+    if not isinstance(rows, list):
+        raise ValueError("Expected a JSON list of employees or a CSV file")
+    return rows
+
+def validate_import_rows(conn, rows):
+    errors, seen = {}, set()
+    for index, row in enumerate(rows):
+        if not isinstance(row, dict):
+            errors[index] = ["Row must be an object"]
+            continue
+        problems = [f"Missing {field}" for field in ("first_name", "last_name", "email", "password")
+                    if not isinstance(row.get(field), str) or not row[field].strip()]
+        email = row.get('email')
+        if isinstance(email, str) and email:
+            if '@' not in email:
+                problems.append("Invalid email")
+            elif email in seen:
+                problems.append("Duplicate email in batch")
+            seen.add(email)
+        if problems:
+            errors[index] = problems
+    emails, existing = list(seen), set()
+    for i in range(0, len(emails), EXISTING_EMAIL_CHUNK):
+        chunk = emails[i:i + EXISTING_EMAIL_CHUNK]
+        placeholders = ', '.join('?' * len(chunk))
+        existing.update(row['email'] for row in conn.execute(
+            f"SELECT email FROM employees WHERE email IN ({placeholders})", chunk))
+    if existing:
+        for index, row in enumerate(rows):
+            if isinstance(row, dict) and row.get('email') in existing:
+                errors.setdefault(index, []).append("Email already exists")
+    return [{"row": index + 1, "email": rows[index].get('email') if isinstance(rows[index], dict) else None,
+             "errors": problems} for index, problems in sorted(errors.items())]
+
+@app.route('/admin/employees/import', methods=['POST'])
+def import_employees():
+    try:
+        rows = read_import_rows()
+    except (ValueError, UnicodeDecodeError, csv.Error) as e:
+        return jsonify({"message": str(e)}), 400
+    if not rows:
+        return jsonify({"message": "No employees to import"}), 400
+    if len(rows) > BULK_IMPORT_MAX_ROWS:
+        return jsonify({"message": f"At most {BULK_IMPORT_MAX_ROWS} employees per import"}), 413
+    skip_invalid = request.args.get('skip_invalid', 'false').lower() == 'true'
+    conn = get_db_connection()
+    try:
+        errors = validate_import_rows(conn, rows)
+        if errors and not skip_invalid:
+            return jsonify({"message": "Validation failed; nothing was imported", "imported": 0, "errors": errors}), 422
+        invalid = {error['row'] - 1 for error in errors}
+        valid = [row for index, row in enumerate(rows) if index not in invalid]
+        if not valid:
+            return jsonify({"message": "No valid employees to import", "imported": 0, "errors": errors}), 422
+        # Hash before taking the write lock; the pool spreads the batch over its workers.
+        hashed_passwords = password_hasher.hash_many([row['password'] for row in valid])
+        conn.execute("BEGIN IMMEDIATE")
+        ids = [f"SSQ-{number}" for number in allocate_ids(conn, 'employee', len(valid))]
+        conn.executemany(INSERT_EMPLOYEE_SQL, [
+            employee_insert_params(new_id, row, hashed)
+            for new_id, row, hashed in zip(ids, valid, hashed_passwords)
+        ])
+        conn.executemany("INSERT INTO leave_balances (employee_id) VALUES (?)", [(new_id,) for new_id in ids])
+        refresh_reporting_lines(conn, ids, registered=True)
+        admin_queue_changed(conn, 'employees_imported', {"count": len(ids)})
+        conn.commit()
+        return jsonify({
+            "message": f"Imported {len(ids)} employees",
+            "imported": len(ids),
+            "ids": [{"row": row_number, "id": new_id} for row_number, new_id in
+                    zip((index + 1 for index in range(len(rows)) if index not in invalid), ids)],
+            "errors": errors,
+        }), 201
+    except ReportingCycle as e:
+        conn.rollback()
+        return jsonify({"message": f"{e}; nothing was imported"}), 400
+    except sqlite3.IntegrityError as e:
+        conn.rollback()
+        return jsonify({"message": f"Import conflicted with a concurrent change, nothing was imported: {e}"}), 409
     except sqlite3.Error as e:
         conn.rollback()
         return jsonify({"message": f"Database error: {e}"}), 500
@@ -219,7 +888,7 @@ def login_employee():
         return jsonify({"message": "Email, password, and user_type are required"}), 400
 
     if user_type == 'admin':
-        if username == ADMIN_EMAIL and check_password_hash(ADMIN_PASSWORD_HASH, password):
+        if username == ADMIN_EMAIL and password_hasher.verify(admin_password_hash.get(), password):
             admin_user = {"id": "ADMIN-001", "first_name": "Admin", "last_name": "User", "email": ADMIN_EMAIL, "user_type": "admin"}
             return jsonify({"message": "Admin login successful!", "user": admin_user}), 200
         else:
@@ -228,11 +897,13 @@ def login_employee():
         if username == ADMIN_EMAIL:
             return jsonify({"message": "Invalid employee credentials"}), 401
         conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM employees WHERE email = ?", (username,))
-        employee = cursor.fetchone()
-        conn.close()
-        if employee and check_password_hash(employee['password'], password):
+        try:
+            employee = conn.execute(EMPLOYEE_LOGIN_SQL, (username,)).fetchone()
+        finally:
+            conn.close()
+        if employee and password_hasher.verify(employee['password'], password):
+            if password_hasher.needs_rehash(employee['password']):
+                rehash_password(employee['id'], employee['password'], password)
             # MODIFIED: Check the force_password_change flag
             if employee['force_password_change'] == 1:
                 return jsonify({
@@ -240,14 +911,33 @@ def login_employee():
                     "force_change": True,
                     "user_id": employee['id']
                 }), 200
-            employee_dict = dict(employee)
-            employee_dict.pop('password', None)
-            return jsonify({"message": "Login successful!", "user": employee_dict}), 200
+            # Only a successful login loads the profile it returns.
+            conn = get_db_connection()
+            try:
+                profile = conn.execute(EMPLOYEE_PROFILE_SQL, (employee['id'],)).fetchone()
+            finally:
+                conn.close()
+            if profile is None:
+                return jsonify({"message": "Invalid employee credentials"}), 401
+            return jsonify({"message": "Login successful!", "user": dict(profile)}), 200
         else:
             return jsonify({"message": "Invalid employee credentials"}), 401
     else:
         return jsonify({"message": "Invalid user type specified"}), 400
 
+def rehash_password(employee_id, old_hash, password):
+    # Upgrade a hash made with older parameters; skipped if the password changed meanwhile.
+    new_hash = password_hasher.hash(password)
+    conn = get_db_connection()
+    try:
+        conn.execute("UPDATE employees SET password = ? WHERE id = ? AND password = ?", (new_hash, employee_id, old_hash))
+        conn.commit()
+    except sqlite3.Error as e:
+        metrics.errors.inc('rehash_password')
+        app.logger.error("Database error rehashing password: %s", e)
+    finally:
+        conn.close()
+
 # NEW Endpoint
 @app.route('/force-change-password', methods=['PUT'])
 def force_change_password():
@@ -256,25 +946,20 @@ def force_change_password():
     new_password = data.get('new_password')
     if not user_id or not new_password:
         return jsonify({"message": "User ID and new password are required"}), 400
+    hashed_new_password = password_hasher.hash(new_password)
     conn = get_db_connection()
     try:
-        cursor = conn.cursor()
-        hashed_new_password = generate_password_hash(new_password)
-        cursor.execute(
-            "UPDATE employees SET password = ?, force_password_change = 0 WHERE id = ?",
+        updated = conn.execute(
+            f"UPDATE employees SET password = ?, force_password_change = 0 WHERE id = ? RETURNING {EMPLOYEE_PROFILE_COLUMNS}",
             (hashed_new_password, user_id)
-        )
-        if cursor.rowcount == 0:
+        ).fetchall()
+        if not updated:
             return jsonify({"message": "Employee not found"}), 404
         create_notification(conn, user_id, "Your password was successfully set on first login.")
         conn.commit()
-        cursor.execute("SELECT * FROM employees WHERE id = ?", (user_id,))
-        employee = cursor.fetchone()
-        employee_dict = dict(employee)
-        employee_dict.pop('password', None)
         return jsonify({
             "message": "Password updated successfully! Logging in...",
-            "user": employee_dict
+            "user": dict(updated[0])
         }), 200
     except sqlite3.Error as e:
         conn.rollback()
@@ -290,30 +975,30 @@ def forgot_password():
         return jsonify({"message": "Email is required"}), 400
     conn = get_db_connection()
     cursor = conn.cursor()
-    cursor.execute("SELECT * FROM employees WHERE email = ?", (email,))
+    cursor.execute("SELECT id, first_name FROM employees WHERE email = ?", (email,))
     employee = cursor.fetchone()
     if employee:
         new_password = ''.join(random.choices(string.ascii_letters + string.digits, k=10))
-        hashed_new_password = generate_password_hash(new_password)
+        hashed_new_password = password_hasher.hash(new_password)
         try:
             # MODIFIED: Also set force_password_change to 1 on reset
             cursor.execute("UPDATE employees SET password = ?, force_password_change = 1 WHERE email = ?", (hashed_new_password, email))
             create_notification(conn, employee['id'], "Your password was reset via email request.")
-            conn.commit()
-            msg = Message('Your HRMS Password has been Reset', recipients=[email])
-            msg.body = f"""Hello {employee['first_name']},
+            # The email is queued in the same transaction and sent by the outbox workers.
+            mail_outbox.enqueue(conn, [email], 'Your HRMS Password has been Reset', f"""Hello {employee['first_name']},
             Your password for the HRMS portal has been reset.
             Your new temporary password is: {new_password}
             Please log in with this password. You will be required to set a new password immediately.
             Thank you,
-            HRMS System"""
-            mail.send(msg)
-            return jsonify({"message": "A new password has been sent to your email address."}), 200
+            HRMS System""")
+            conn.commit()
         except Exception as e:
             conn.rollback()
             return jsonify({"message": f"Failed to reset password. Error: {e}"}), 500
         finally:
             conn.close()
+        mail_outbox.notify()
+        return jsonify({"message": "A new password has been sent to your email address."}), 200
     else:
         conn.close()
         return jsonify({"message": "If an account with that email exists, a new password has been sent."}), 200
@@ -328,13 +1013,13 @@ def change_password(employee_id):
     conn = get_db_connection()
     cursor = conn.cursor()
     try:
-        cursor.execute("SELECT * FROM employees WHERE id = ?", (employee_id,))
+        cursor.execute("SELECT password FROM employees WHERE id = ?", (employee_id,))
         employee = cursor.fetchone()
         if not employee:
             return jsonify({"message": "Employee not found"}), 404
-        if not check_password_hash(employee['password'], old_password):
+        if not password_hasher.verify(employee['password'], old_password):
             return jsonify({"message": "Incorrect old password"}), 400
-        hashed_new_password = generate_password_hash(new_password)
+        hashed_new_password = password_hasher.hash(new_password)
         cursor.execute("UPDATE employees SET password = ? WHERE id = ?", (hashed_new_password, employee_id))
         create_notification(conn, employee_id, "Your password was changed successfully.")
         conn.commit()
@@ -346,16 +1031,15 @@ def change_password(employee_id):
         conn.close()
 
 @app.route('/profile/<string:employee_id>', methods=['GET'])
+@conditional_get('profile:{employee_id}')
 def get_employee_profile(employee_id):
     conn = get_db_connection()
     cursor = conn.cursor()
-    cursor.execute("SELECT * FROM employees WHERE id = ?", (employee_id,))
+    cursor.execute(EMPLOYEE_PROFILE_SQL, (employee_id,))
     employee = cursor.fetchone()
     conn.close()
     if employee:
-        employee_dict = dict(employee)
-        employee_dict.pop('password', None)
-        return jsonify(employee_dict), 200
+        return jsonify(dict(employee)), 200
     else:
         return jsonify({"message": "Employee not found"}), 404
 
@@ -365,9 +1049,6 @@ def update_employee_profile(employee_id):
     conn = get_db_connection()
     try:
         cursor = conn.cursor()
-        cursor.execute("SELECT id FROM employees WHERE id = ?", (employee_id,))
-        if not cursor.fetchone():
-            return jsonify({"message": "Employee not found"}), 404
         set_clauses = []
         update_values = []
         allowed_keys = [
@@ -384,16 +1065,19 @@ def update_employee_profile(employee_id):
                 update_values.append(value)
         if not set_clauses:
             return jsonify({"message": "No valid fields to update"}), 400
-        update_query = f"UPDATE employees SET {', '.join(set_clauses)} WHERE id = ?"
+        update_query = f"UPDATE employees SET {', '.join(set_clauses)} WHERE id = ? RETURNING {EMPLOYEE_PROFILE_COLUMNS}"
         update_values.append(employee_id)
-        cursor.execute(update_query, tuple(update_values))
+        updated = cursor.execute(update_query, tuple(update_values)).fetchall()
+        if not updated:
+            return jsonify({"message": "Employee not found"}), 404
+        if any(key in data for key in ('reporting_manager1_mail', 'reporting_manager2_mail')):
+            refresh_reporting_lines(conn, [employee_id])
         create_notification(conn, employee_id, "Your profile details have been updated.")
         conn.commit()
-        cursor.execute("SELECT * FROM employees WHERE id = ?", (employee_id,))
-        updated_employee = cursor.fetchone()
-        updated_employee_dict = dict(updated_employee)
-        updated_employee_dict.pop('password', None)
-        return jsonify({"message": "Profile updated successfully!", "user": updated_employee_dict}), 200
+        return jsonify({"message": "Profile updated successfully!", "user": dict(updated[0])}), 200
+    except ReportingCycle as e:
+        conn.rollback()
+        return jsonify({"message": str(e)}), 400
     except sqlite3.Error as e:
         conn.rollback()
         return jsonify({"message": f"Database error: {e}"}), 500
@@ -404,10 +1088,7 @@ def update_employee_profile(employee_id):
 def get_notifications(employee_id):
     conn = get_db_connection()
     cursor = conn.cursor()
-    cursor.execute(
-        "SELECT message, is_read FROM notifications WHERE employee_id = ? ORDER BY timestamp DESC",
-        (employee_id,)
-    )
+    cursor.execute(NOTIFICATIONS_BY_EMPLOYEE_SQL, (employee_id,))
     notifications = [dict(row) for row in cursor.fetchall()]
     conn.close()
     return jsonify(notifications), 200
@@ -415,14 +1096,85 @@ def get_notifications(employee_id):
 @app.route('/notifications/mark-read/<string:employee_id>', methods=['PUT'])
 def mark_notifications_as_read(employee_id):
     conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(MARK_NOTIFICATIONS_READ_SQL, (employee_id,))
+        conn.commit()
+        return jsonify({"message": f"{cursor.rowcount} notifications marked as read."}), 200
+    except sqlite3.Error as e:
+        conn.rollback()
+        return jsonify({"message": f"Database error: {e}"}), 500
+    finally:
+        conn.close()
+
+# --- Incremental Notification Feed ---
+NOTIFICATION_FEED_DEFAULT_LIMIT = 50
+NOTIFICATION_FEED_MAX_LIMIT = 200
+NOTIFICATION_MARK_READ_MAX_IDS = 500
+
+@app.route('/notifications/<string:employee_id>/feed', methods=['GET'])
+def get_notification_feed(employee_id):
+    # Newest first. Without since: the newest page, paged back with before=<id>. With since=<cursor>:
+    # the oldest page of rows created after it, and cursor moves to the last of those; poll again
+    # while has_more is true to catch up.
+    polling = 'since' in request.args
+    try:
+        since = int(request.args.get('since', 0))
+        before = int(request.args.get('before', 2**63 - 1))
+        limit = int(request.args.get('limit', NOTIFICATION_FEED_DEFAULT_LIMIT))
+    except ValueError:
+        return jsonify({"message": "since, before and limit must be integers"}), 400
+    limit = max(1, min(limit, NOTIFICATION_FEED_MAX_LIMIT))
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(NOTIFICATION_FEED_SINCE_SQL if polling else NOTIFICATION_FEED_SQL,
+                       (employee_id, since, before, limit + 1))
+        notifications = [dict(row) for row in cursor.fetchall()]
+        has_more = len(notifications) > limit
+        notifications = notifications[:limit]
+        if polling:
+            notifications.reverse()
+        cursor.execute(UNREAD_NOTIFICATIONS_COUNT_SQL, (employee_id,))
+        unread_count = cursor.fetchone()[0]
+        newest = notifications[0]['id'] if notifications else since
+        return jsonify({"notifications": notifications, "cursor": max(since, newest), "has_more": has_more,
+                        "unread_count": unread_count}), 200
+    except sqlite3.Error as e:
+        return jsonify({"message": f"Database error: {e}"}), 500
+    finally:
+        conn.close()
+
+@app.route('/notifications/<string:employee_id>/unread-count', methods=['GET'])
+def get_unread_notification_count(employee_id):
+    conn = get_db_connection()
+    try:
+        unread_count = conn.execute(UNREAD_NOTIFICATIONS_COUNT_SQL, (employee_id,)).fetchone()[0]
+        return jsonify({"unread_count": unread_count}), 200
+    except sqlite3.Error as e:
+        return jsonify({"message": f"Database error: {e}"}), 500
+    finally:
+        conn.close()
+
+@app.route('/notifications/<string:employee_id>/mark-read', methods=['PUT'])
+def mark_notifications_read_by_id(employee_id):
+    data = request.get_json(silent=True) or {}
+    ids = data.get('ids')
+    if not isinstance(ids, list) or not ids or not all(isinstance(i, int) for i in ids):
+        return jsonify({"message": "ids must be a non-empty list of notification ids"}), 400
+    if len(ids) > NOTIFICATION_MARK_READ_MAX_IDS:
+        return jsonify({"message": f"At most {NOTIFICATION_MARK_READ_MAX_IDS} ids per request"}), 400
+    conn = get_db_connection()
     try:
         cursor = conn.cursor()
         cursor.execute(
-            "UPDATE notifications SET is_read = 1 WHERE employee_id = ? AND is_read = 0",
-            (employee_id,)
+            f"UPDATE notifications SET is_read = 1 WHERE employee_id = ? AND is_read = 0 AND id IN ({', '.join('?' for _ in ids)})",
+            [employee_id, *ids]
         )
+        marked = cursor.rowcount
         conn.commit()
-        return jsonify({"message": f"{cursor.rowcount} notifications marked as read."}), 200
+        unread_count = conn.execute(UNREAD_NOTIFICATIONS_COUNT_SQL, (employee_id,)).fetchone()[0]
+        return jsonify({"message": f"{marked} notifications marked as read.", "unread_count": unread_count}), 200
     except sqlite3.Error as e:
         conn.rollback()
         return jsonify({"message": f"Database error: {e}"}), 500
@@ -434,18 +1186,38 @@ def submit_leave_application():
     data = request.get_json()
     employee_id, leave_type, from_date, to_date, description, leave_days = \
         data.get('employee_id'), data.get('leave_type'), data.get('from_date'), data.get('to_date'), data.get('description'), data.get('leave_days')
-    if not all([employee_id, leave_type, from_date, leave_days is not None]):
+    if not all([employee_id, leave_type, from_date]):
         return jsonify({"message": "Missing required fields for leave application"}), 400
+    if leave_type not in LEAVE_TYPE_COLUMNS:
+        return jsonify({"message": f"Unknown leave type: {leave_type}"}), 400
+    try:
+        start, end = as_date(from_date), as_date(to_date or from_date)
+    except (TypeError, ValueError):
+        return jsonify({"message": "from_date and to_date must be YYYY-MM-DD"}), 400
+    if end < start:
+        return jsonify({"message": "to_date cannot be before from_date"}), 400
+    # The client's leave_days is only a preview; the count is always taken from the calendar.
+    leave_days = holiday_calendar.get().working_days(start, end)
+    if leave_days == 0:
+        return jsonify({"message": "The selected dates contain no working days"}), 400
+    from_date, to_date = start.isoformat(), end.isoformat()
     conn = get_db_connection()
     try:
+        # Validate and insert under one write lock so a concurrent request cannot slip in between.
+        conn.execute("BEGIN IMMEDIATE")
+        conflicts = leave_request_conflicts(conn, employee_id, leave_type, from_date, to_date, leave_days)
+        if conflicts:
+            conn.rollback()
+            return jsonify({"message": "; ".join(conflict['message'] for conflict in conflicts), "conflicts": conflicts}), 409
         cursor = conn.cursor()
-        record_id = str(uuid.uuid4())
         cursor.execute(
-            '''INSERT INTO leave_applications (record_id, employee_id, leave_type, from_date, to_date, description, leave_days)
-               VALUES (?, ?, ?, ?, ?, ?, ?)''',
-            (record_id, employee_id, leave_type, from_date, to_date, description, leave_days)
+            '''INSERT INTO leave_applications (employee_id, leave_type, from_date, to_date, description, leave_days)
+               VALUES (?, ?, ?, ?, ?, ?)''',
+            (employee_id, leave_type, from_date, to_date, description, leave_days)
         )
+        record_id = public_id(LEAVE, cursor.lastrowid)
         create_notification(conn, employee_id, f"Your request for {leave_days} days of {leave_type} has been submitted.")
+        admin_queue_changed(conn, 'leave_request', {"record_id": record_id, "employee_id": employee_id})
         conn.commit()
         return jsonify({"message": f"{leave_days} days of {leave_type} application submitted successfully!"}), 201
     except sqlite3.Error as e:
@@ -455,41 +1227,41 @@ def submit_leave_application():
         conn.close()
 
 @app.route('/leave-applications/<string:employee_id>', methods=['GET'])
+@conditional_get('leave-applications:{employee_id}')
 def get_leave_applications(employee_id):
+    start, end = request.args.get('from'), request.args.get('to')
+    query = lambda schema: leave_applications_query(employee_id, start, end, schema)
     conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute(
-        "SELECT * FROM leave_applications WHERE employee_id = ? ORDER BY submitted_at DESC",
-        (employee_id,)
-    )
-    applications = [dict(row) for row in cursor.fetchall()]
-    conn.close()
+    try:
+        rows = conn.execute(*query('main')).fetchall()
+        # Archived leave is filed under the year it ends in, which can be the year after `to`.
+        last_year = year_of(end) + 1 if year_of(end) else None
+        rows = merge_archived(conn, query, archives.years(conn, year_of(start), last_year), rows,
+                              key=lambda row: (row['submitted_at'] or '', row['id']), reverse=True)
+    except sqlite3.Error as e:
+        return jsonify({"message": f"Database error: {e}"}), 500
+    finally:
+        conn.close()
+    applications = []
+    for row in rows:
+        application = dict(row)
+        del application['id']
+        applications.append(application)
     return jsonify(applications), 200
 
 @app.route('/leave-balance/<string:employee_id>', methods=['GET'])
+@conditional_get('leave-balance:{employee_id}')
 def get_leave_balance(employee_id):
     conn = get_db_connection()
     cursor = conn.cursor()
     try:
-        cursor.execute('''
-            SELECT leave_type, SUM(leave_days) as total_availed
-            FROM leave_applications WHERE employee_id = ? AND status = 'Approved' GROUP BY leave_type
-        ''', (employee_id,))
-        availed_leaves = {row['leave_type']: row['total_availed'] for row in cursor.fetchall()}
-        cursor.execute('SELECT * FROM leave_balances WHERE employee_id = ?', (employee_id,))
+        cursor.execute(LEAVE_BALANCE_SQL, (employee_id,))
         balance_record = cursor.fetchone()
-        if not balance_record:
-            cursor.execute("INSERT INTO leave_balances (employee_id) VALUES (?)", (employee_id,))
-            conn.commit()
-            cursor.execute('SELECT * FROM leave_balances WHERE employee_id = ?', (employee_id,))
-            balance_record = cursor.fetchone()
-        allotted_balances = dict(balance_record)
-        allotted_balances.pop('employee_id', None)
         final_balances = {}
-        for leave_type in allotted_balances:
-            availed = availed_leaves.get(leave_type.replace('_', ' ').title(), 0)
-            balance = allotted_balances[leave_type] - availed
-            final_balances[leave_type] = {'allotted': allotted_balances[leave_type], 'availed': availed, 'balance': balance}
+        for leave_type, default_allotment in LEAVE_ALLOTMENT_DEFAULTS.items():
+            allotted = balance_record[leave_type] if balance_record else default_allotment
+            availed = balance_record[f"{leave_type}_availed"] if balance_record else 0
+            final_balances[leave_type] = {'allotted': allotted, 'availed': availed, 'balance': allotted - availed}
         return jsonify(final_balances), 200
     except sqlite3.Error as e:
         return jsonify({"message": f"Database error: {e}"}), 500
@@ -497,18 +1269,26 @@ def get_leave_balance(employee_id):
         conn.close()
 
 @app.route('/admin/leave-requests', methods=['GET'])
+@conditional_get('admin:leave-requests')
 def get_pending_leave_requests():
     conn = get_db_connection()
     cursor = conn.cursor()
-    cursor.execute(
-        '''SELECT l.*, e.first_name, e.last_name, e.email, e.reporting_manager1, e.reporting_manager2
-           FROM leave_applications l JOIN employees e ON l.employee_id = e.id
-           WHERE l.status = 'Pending' ORDER BY l.submitted_at ASC'''
-    )
+    cursor.execute(PENDING_LEAVE_REQUESTS_SQL)
     requests = [dict(row) for row in cursor.fetchall()]
     conn.close()
     return jsonify(requests), 200
 
+@app.route('/admin/leave-requests/validate', methods=['GET'])
+def validate_pending_leave_requests():
+    conn = get_db_connection()
+    try:
+        checked, invalid = validate_pending_leaves(conn)
+        return jsonify({"checked": checked, "valid": checked - len(invalid), "invalid": invalid}), 200
+    except sqlite3.Error as e:
+        return jsonify({"message": f"Database error: {e}"}), 500
+    finally:
+        conn.close()
+
 @app.route('/admin/leave-action/<string:record_id>', methods=['PUT'])
 def process_leave_action(record_id):
     data = request.get_json()
@@ -519,17 +1299,18 @@ def process_leave_action(record_id):
     conn = get_db_connection()
     try:
         cursor = conn.cursor()
-        cursor.execute("SELECT employee_id, leave_type, leave_days FROM leave_applications WHERE record_id = ?", (record_id,))
+        key = resolve_record_id(conn, LEAVE, record_id)
+        cursor.execute("SELECT employee_id, leave_type, leave_days, status FROM leave_applications WHERE id = ?", (key,))
         leave_request = cursor.fetchone()
         if not leave_request:
             return jsonify({"message": "Leave request not found"}), 404
         employee_id, leave_type, leave_days = leave_request['employee_id'], leave_request['leave_type'], leave_request['leave_days']
-        cursor.execute("UPDATE leave_applications SET status = ?, comment = ? WHERE record_id = ?", (action, comment, record_id))
-        conn.commit()
-        message = f"Your request for {leave_days} days of {leave_type} has been {action.lower()}."
-        if comment:
-            message += f" Admin comment: {comment}"
-        create_notification(conn, employee_id, message)
+        cursor.execute("UPDATE leave_applications SET status = ?, comment = ? WHERE id = ?", (action, comment, key))
+        delta = leave_ledger_delta(leave_type, leave_days, leave_request['status'], action)
+        if delta:
+            adjust_leave_ledger(conn, employee_id, *delta)
+        create_notification(conn, employee_id, leave_action_message(leave_days, leave_type, action, comment))
+        admin_queue_changed(conn, 'leave_action', {"record_ids": [record_id], "action": action})
         conn.commit()
         return jsonify({"message": "Leave request processed successfully!"}), 200
     except sqlite3.Error as e:
@@ -544,16 +1325,22 @@ def submit_compoff_request():
     employee_id, work_date, description = data.get('employee_id'), data.get('work_date'), data.get('description')
     if not all([employee_id, work_date]):
         return jsonify({"message": "Missing required fields for comp-off request"}), 400
+    try:
+        if holiday_calendar.get().is_working_day(work_date):
+            return jsonify({"message": "You can only request comp-off for working on a weekend or a holiday."}), 400
+    except (TypeError, ValueError):
+        return jsonify({"message": "work_date must be YYYY-MM-DD"}), 400
     conn = get_db_connection()
     try:
         cursor = conn.cursor()
-        record_id = str(uuid.uuid4())
         cursor.execute(
-            '''INSERT INTO compoff_requests (record_id, employee_id, work_date, description)
-               VALUES (?, ?, ?, ?)''',
-            (record_id, employee_id, work_date, description)
+            '''INSERT INTO compoff_requests (employee_id, work_date, description)
+               VALUES (?, ?, ?)''',
+            (employee_id, work_date, description)
         )
+        record_id = public_id(COMPOFF, cursor.lastrowid)
         create_notification(conn, employee_id, f"Your request to earn a comp-off for working on {work_date} has been submitted for approval.")
+        admin_queue_changed(conn, 'compoff_request', {"record_id": record_id, "employee_id": employee_id})
         conn.commit()
         return jsonify({"message": "Comp-off request submitted successfully!"}), 201
     except sqlite3.Error as e:
@@ -562,15 +1349,75 @@ def submit_compoff_request():
     finally:
         conn.close()
 
+# --- Holidays ---
+@app.route('/holidays', methods=['GET'])
+@conditional_get('holidays')
+def get_holidays():
+    year = request.args.get('year', type=int)
+    if not year:
+        return jsonify({"message": "year is required, e.g. /holidays?year=2025"}), 400
+    conn = get_db_connection()
+    try:
+        rows = conn.execute(HOLIDAYS_BY_YEAR_SQL, (f"{year}-01-01", f"{year + 1}-01-01")).fetchall()
+        return jsonify([dict(row) for row in rows]), 200
+    except sqlite3.Error as e:
+        return jsonify({"message": f"Database error: {e}"}), 500
+    finally:
+        conn.close()
+
+def read_holiday_import():
+    # JSON rows, a CSV/text upload or a plain-text body (e.g. the table copied out of the yearly PDF).
+    upload = request.files.get('file')
+    if upload is None and request.is_json:
+        data = request.get_json()
+        rows = data.get('holidays') if isinstance(data, dict) else data
+        if not isinstance(rows, list):
+            raise ValueError("Expected a JSON list of holidays")
+        holidays, skipped = [], []
+        for number, row in enumerate(rows, start=1):
+            try:
+                holidays.append((as_date(row['date']), row['name'].strip()))
+            except (KeyError, TypeError, AttributeError, ValueError):
+                skipped.append({"line": number, "text": json.dumps(row), "error": "Each holiday needs a YYYY-MM-DD date and a name"})
+        return holidays, skipped
+    text = upload.read().decode('utf-8-sig') if upload is not None else request.get_data(as_text=True)
+    return parse_holiday_text(text)
+
+@app.route('/admin/holidays/import', methods=['POST'])
+def import_holidays():
+    try:
+        holidays, skipped = read_holiday_import()
+    except (ValueError, UnicodeDecodeError) as e:
+        return jsonify({"message": str(e)}), 400
+    if not holidays:
+        return jsonify({"message": "No holidays found in the import", "skipped": skipped}), 400
+    years = sorted({day.year for day, _ in holidays})
+    replace = request.args.get('replace', 'false').lower() == 'true'
+    conn = get_db_connection()
+    try:
+        if replace:
+            # The import becomes the complete list for every year it mentions.
+            for year in years:
+                conn.execute("DELETE FROM holidays WHERE date >= ? AND date < ?", (f"{year}-01-01", f"{year + 1}-01-01"))
+        conn.executemany(
+            "INSERT INTO holidays (date, name) VALUES (?, ?) ON CONFLICT (date) DO UPDATE SET name = excluded.name",
+            [(day.isoformat(), name) for day, name in holidays])
+        conn.on_commit(holiday_calendar.invalidate)
+        conn.commit()
+        return jsonify({"message": f"Imported {len(holidays)} holidays", "imported": len(holidays),
+                        "years": years, "skipped": skipped}), 200
+    except sqlite3.Error as e:
+        conn.rollback()
+        return jsonify({"message": f"Database error: {e}"}), 500
+    finally:
+        conn.close()
+
 @app.route('/admin/compoff-requests', methods=['GET'])
+@conditional_get('admin:compoff-requests')
 def get_pending_compoff_requests():
     conn = get_db_connection()
     cursor = conn.cursor()
-    cursor.execute(
-        '''SELECT l.*, e.first_name, e.last_name, e.email
-           FROM compoff_requests l JOIN employees e ON l.employee_id = e.id
-           WHERE l.status = 'Pending' ORDER BY l.submitted_at ASC'''
-    )
+    cursor.execute(PENDING_COMPOFF_REQUESTS_SQL)
     requests = [dict(row) for row in cursor.fetchall()]
     conn.close()
     return jsonify(requests), 200
@@ -585,20 +1432,18 @@ def process_compoff_action(record_id):
     conn = get_db_connection()
     try:
         cursor = conn.cursor()
-        cursor.execute("SELECT employee_id, work_date FROM compoff_requests WHERE record_id = ?", (record_id,))
+        key = resolve_record_id(conn, COMPOFF, record_id)
+        cursor.execute("SELECT employee_id, work_date, status FROM compoff_requests WHERE id = ?", (key,))
         compoff_request = cursor.fetchone()
         if not compoff_request:
             return jsonify({"message": "Comp-off request not found"}), 404
         employee_id, work_date = compoff_request['employee_id'], compoff_request['work_date']
-        cursor.execute("UPDATE compoff_requests SET status = ?, comment = ? WHERE record_id = ?", (action, comment, record_id))
-        if action == 'Approved':
-            cursor.execute("UPDATE leave_balances SET compoff = compoff + 1 WHERE employee_id = ?", (employee_id,))
-            message = f"Your request to earn a comp-off for working on {work_date} has been approved. Your balance has been updated."
-        else:
-            message = f"Your request to earn a comp-off for working on {work_date} has been rejected."
-        if comment:
-            message += f" Admin comment: {comment}"
-        create_notification(conn, employee_id, message)
+        cursor.execute("UPDATE compoff_requests SET status = ?, comment = ? WHERE id = ?", (action, comment, key))
+        delta = compoff_ledger_delta(compoff_request['status'], action)
+        if delta:
+            adjust_leave_ledger(conn, employee_id, *delta)
+        create_notification(conn, employee_id, compoff_action_message(work_date, action, comment))
+        admin_queue_changed(conn, 'compoff_action', {"record_ids": [record_id], "action": action})
         conn.commit()
         return jsonify({"message": "Comp-off request processed successfully!"}), 200
     except sqlite3.Error as e:
@@ -607,6 +1452,194 @@ def process_compoff_action(record_id):
     finally:
         conn.close()
 
+# --- Manager Queues ---
+# Everyone below a manager, through reporting_manager1_mail/reporting_manager2_mail
+# at any depth, comes from reporting_closure (see org_chart.py). ?depth=1 limits
+# a queue to direct reports.
+def team_query(sql, manager_id):
+    try:
+        depth = int(request.args.get('depth', 2**31))
+    except ValueError:
+        return jsonify({"message": "depth must be an integer"}), 400
+    conn = get_db_connection()
+    try:
+        return jsonify([dict(row) for row in conn.execute(sql, (manager_id, depth))]), 200
+    except sqlite3.Error as e:
+        return jsonify({"message": f"Database error: {e}"}), 500
+    finally:
+        conn.close()
+
+@app.route('/manager/<string:manager_id>/leave-requests', methods=['GET'])
+@conditional_get('admin:leave-requests', 'org-chart')
+def get_team_leave_requests(manager_id):
+    return team_query(TEAM_PENDING_LEAVE_REQUESTS_SQL, manager_id)
+
+@app.route('/manager/<string:manager_id>/compoff-requests', methods=['GET'])
+@conditional_get('admin:compoff-requests', 'org-chart')
+def get_team_compoff_requests(manager_id):
+    return team_query(TEAM_PENDING_COMPOFF_REQUESTS_SQL, manager_id)
+
+@app.route('/manager/<string:manager_id>/team', methods=['GET'])
+@conditional_get('org-chart')
+def get_team_members(manager_id):
+    return team_query(TEAM_MEMBERS_SQL, manager_id)
+
+# --- Employee Directory Search ---
+# Typeahead over name, email, department, role and reporting managers, served
+# by the employee_search FTS5 index (see employee_search.py). Up to
+# EMPLOYEE_SEARCH_RANKED_MATCHES matches are ordered by relevance. A broader
+# query (typically the first letter or two) would spend its time scoring
+# thousands of rows nobody reads, so it is listed in directory order instead
+# and the response says "ranked": false. The cursor keeps later pages in the
+# order the first one was served in.
+EMPLOYEE_SEARCH_DEFAULT_LIMIT = 20
+EMPLOYEE_SEARCH_MAX_LIMIT = 100
+EMPLOYEE_SEARCH_RANKED_MATCHES = int(os.getenv('EMPLOYEE_SEARCH_RANKED_MATCHES', '2000'))
+EMPLOYEE_SEARCH_COLUMNS = '''e.id, e.first_name, e.last_name, e.email, e.department, e.employee_role,
+                  e.reporting_manager1, e.reporting_manager1_mail, e.reporting_manager2, e.reporting_manager2_mail'''
+# A row here means more matches than are worth ranking; FTS5 stops walking the doclists there.
+EMPLOYEE_SEARCH_OVERFLOW_SQL = "SELECT 1 FROM employee_search WHERE employee_search MATCH ? LIMIT 1 OFFSET ?"
+
+def build_employee_search_query(match, ranked, after=None, limit=EMPLOYEE_SEARCH_DEFAULT_LIMIT):
+    # Keyset pagination over (rank, docid) when ranked, over docid (index order) otherwise.
+    # Every match is scored and sorted, so only the page that survives is joined to employees.
+    key = {'rank': 'search_rank', 'rowid': 'docid'} if ranked else {'rowid': 'docid'}
+    where = "employee_search MATCH ?"
+    params = [match]
+    if after:
+        where += f" AND ({', '.join(key)}) > ({', '.join('?' * len(key))})"
+        params.extend(after)
+    params.append(limit + 1)
+    page = f'''SELECT {', '.join(f'{column} AS {alias}' for column, alias in key.items())}, employee_id
+               FROM employee_search WHERE {where} ORDER BY {', '.join(key)} LIMIT ?'''
+    outer_key = ', '.join(f's.{alias}' for alias in key.values())
+    return f'''SELECT {outer_key}, {EMPLOYEE_SEARCH_COLUMNS}
+             FROM ({page}) s CROSS JOIN employees e ON e.id = s.employee_id ORDER BY {outer_key}''', params
+
+register_query_plan_check('search_employees', EMPLOYEE_SEARCH_OVERFLOW_SQL, ('"jo"*', EMPLOYEE_SEARCH_RANKED_MATCHES))
+register_query_plan_check('search_employees', *build_employee_search_query('"jo"* "sm"*', True, [-1.5, 10]))
+register_query_plan_check('search_employees', *build_employee_search_query('"j"*', False, [10]))
+
+@app.route('/admin/employees/search', methods=['GET'])
+@conditional_get('employee-directory')
+def search_employees():
+    match = match_expression(request.args.get('q'))
+    if not match:
+        return jsonify({"message": "q must contain at least one letter or digit"}), 400
+    try:
+        limit = int(request.args.get('limit', EMPLOYEE_SEARCH_DEFAULT_LIMIT))
+    except ValueError:
+        return jsonify({"message": "limit must be an integer"}), 400
+    limit = max(1, min(limit, EMPLOYEE_SEARCH_MAX_LIMIT))
+    after = None
+    if request.args.get('cursor'):
+        # [rank, docid] continues a ranked listing, [docid] one in directory order.
+        after = decode_cursor(request.args['cursor'], (float, int)) or decode_cursor(request.args['cursor'], (int,))
+        if not after:
+            return jsonify({"message": "Invalid cursor"}), 400
+    conn = get_db_connection()
+    try:
+        if after:
+            ranked = len(after) == 2
+        else:
+            ranked = conn.execute(EMPLOYEE_SEARCH_OVERFLOW_SQL, (match, EMPLOYEE_SEARCH_RANKED_MATCHES)).fetchone() is None
+        rows = conn.execute(*build_employee_search_query(match, ranked, after, limit)).fetchall()
+        key = ['search_rank', 'docid'] if ranked else ['docid']
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor([rows[-1][column] for column in key])
+        employees = [{column: row[column] for column in row.keys() if column not in key} for row in rows]
+        return jsonify({"employees": employees, "ranked": ranked, "next_cursor": next_cursor}), 200
+    except sqlite3.Error as e:
+        return jsonify({"message": f"Database error: {e}"}), 500
+    finally:
+        conn.close()
+
+# --- Batch Admin Actions ---
+BATCH_ACTION_MAX_ITEMS = 1000
+BATCH_LOOKUP_CHUNK = 500
+
+def leave_batch_outcome(row, action, comment):
+    delta = leave_ledger_delta(row['leave_type'], row['leave_days'], row['status'], action)
+    return delta, leave_action_message(row['leave_days'], row['leave_type'], action, comment)
+
+def compoff_batch_outcome(row, action, comment):
+    delta = compoff_ledger_delta(row['status'], action)
+    return delta, compoff_action_message(row['work_date'], action, comment)
+
+def process_batch_actions(table, kind, columns, outcome, not_found_message, event_type):
+    # Applies every valid item in one transaction and reports a result per item, in request order.
+    data = request.get_json(silent=True) or {}
+    items = data.get('items')
+    if not isinstance(items, list) or not items:
+        return jsonify({"message": "items must be a non-empty list"}), 400
+    if len(items) > BATCH_ACTION_MAX_ITEMS:
+        return jsonify({"message": f"At most {BATCH_ACTION_MAX_ITEMS} items per batch"}), 400
+    results = [None] * len(items)
+    valid = []
+    for index, item in enumerate(items):
+        record_id = item.get('record_id') if isinstance(item, dict) else None
+        if not isinstance(record_id, str) or not record_id:
+            results[index] = {"record_id": record_id, "status": "error", "message": "record_id is required"}
+        elif item.get('action') not in ['Approved', 'Rejected']:
+            results[index] = {"record_id": record_id, "status": "error", "message": "Invalid action"}
+        else:
+            valid.append((index, record_id, item['action'], item.get('comment')))
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        keys = resolve_record_ids(conn, kind, {record_id for _, record_id, _, _ in valid})
+        key_list = list(set(keys.values()))
+        rows = {}
+        for start in range(0, len(key_list), BATCH_LOOKUP_CHUNK):
+            chunk = key_list[start:start + BATCH_LOOKUP_CHUNK]
+            cursor.execute(
+                f"SELECT id, {', '.join(columns)} FROM {table} WHERE id IN ({', '.join('?' for _ in chunk)})",
+                chunk
+            )
+            rows.update({row['id']: dict(row) for row in cursor.fetchall()})
+        status_updates, updated_ids, ledger_deltas, notifications = [], [], {}, []
+        for index, record_id, action, comment in valid:
+            # A legacy uuid and the public id of the same row share one dict, and so one status.
+            row = rows.get(keys.get(record_id))
+            if not row:
+                results[index] = {"record_id": record_id, "status": "error", "message": not_found_message}
+                continue
+            delta, message = outcome(row, action, comment)
+            # Later items for the same record see the status this batch already gave it.
+            row['status'] = action
+            status_updates.append((action, comment, row['id']))
+            updated_ids.append(record_id)
+            if delta:
+                key = (row['employee_id'], delta[0])
+                ledger_deltas[key] = ledger_deltas.get(key, 0) + delta[1]
+            notifications.append((row['employee_id'], message))
+            results[index] = {"record_id": record_id, "status": "ok", "action": action}
+        cursor.executemany(f"UPDATE {table} SET status = ?, comment = ? WHERE id = ?", status_updates)
+        apply_ledger_deltas(conn, ledger_deltas)
+        create_notifications(conn, notifications)
+        if status_updates:
+            admin_queue_changed(conn, event_type, {"record_ids": updated_ids})
+        conn.commit()
+        processed = sum(1 for result in results if result['status'] == 'ok')
+        return jsonify({"processed": processed, "failed": len(results) - processed, "results": results}), 200
+    except sqlite3.Error as e:
+        conn.rollback()
+        return jsonify({"message": f"Database error: {e}"}), 500
+    finally:
+        conn.close()
+
+@app.route('/admin/leave-actions', methods=['PUT'])
+def process_leave_actions():
+    return process_batch_actions('leave_applications', LEAVE, ['employee_id', 'leave_type', 'leave_days', 'status'],
+                                 leave_batch_outcome, "Leave request not found", 'leave_action')
+
+@app.route('/admin/compoff-actions', methods=['PUT'])
+def process_compoff_actions():
+    return process_batch_actions('compoff_requests', COMPOFF, ['employee_id', 'work_date', 'status'],
+                                 compoff_batch_outcome, "Comp-off request not found", 'compoff_action')
+
 @app.route('/admin/reset-employee-password', methods=['PUT'])
 def admin_reset_employee_password():
     data = request.get_json()
@@ -616,6 +1649,7 @@ def admin_reset_employee_password():
     if not email or not new_password:
         return jsonify({"message": "Email and new password are required"}), 400
 
+    hashed_new_password = password_hasher.hash(new_password)
     conn = get_db_connection()
     try:
         cursor = conn.cursor()
@@ -626,7 +1660,6 @@ def admin_reset_employee_password():
             return jsonify({"message": "Employee not found with that email"}), 404
 
         employee_id = employee['id']
-        hashed_new_password = generate_password_hash(new_password)
 
         # Update password and force change on next login
         cursor.execute(
@@ -650,20 +1683,66 @@ def admin_reset_employee_password():
     finally:
         conn.close()
 
+def load_dashboard_stats():
+    # dashboard_counters is kept exact by triggers (migration 7), so this is three primary-key reads.
+    conn = get_db_connection()
+    try:
+        stats = {"employee_count": 0, "pending_leaves": 0, "pending_compoffs": 0}
+        stats.update({row['name']: row['value'] for row in conn.execute(DASHBOARD_COUNTERS_SQL)})
+        etag = hashlib.sha1(json.dumps(stats, sort_keys=True).encode()).hexdigest()[:16]
+        return stats, etag
+    finally:
+        conn.close()
+
+dashboard_stats_cache = CachedValue(load_dashboard_stats, ttl=float(os.getenv('DASHBOARD_CACHE_TTL', '30')) or None)
+
 @app.route('/admin/dashboard-stats', methods=['GET'])
 def get_dashboard_stats():
-    conn = get_db_connection()
-    cursor = conn.cursor()
     try:
-        cursor.execute("SELECT COUNT(*) FROM employees")
-        employee_count = cursor.fetchone()[0]
-        cursor.execute("SELECT COUNT(*) FROM leave_applications WHERE status = 'Pending'")
-        pending_leaves = cursor.fetchone()[0]
-        cursor.execute("SELECT COUNT(*) FROM compoff_requests WHERE status = 'Pending'")
-        pending_compoffs = cursor.fetchone()[0]
-        return jsonify({"employee_count": employee_count, "pending_leaves": pending_leaves, "pending_compoffs": pending_compoffs}), 200
+        stats, etag = dashboard_stats_cache.get()
     except sqlite3.Error as e:
         return jsonify({"message": f"Database error: {e}"}), 500
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = jsonify(stats)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+# --- Attendance Group Commit ---
+# Check-ins and check-outs arrive in bursts at shift boundaries. With
+# ATTENDANCE_GROUP_COMMIT on they go through one writer thread that commits
+# everything queued within ATTENDANCE_BATCH_DELAY_MS as one transaction (see
+# write_batcher.py); ATTENDANCE_WRITE_DURABILITY picks how far each group
+# commit is synced before the requests are answered.
+ATTENDANCE_GROUP_COMMIT = os.getenv('ATTENDANCE_GROUP_COMMIT', 'true').lower() == 'true'
+ATTENDANCE_WRITE_DURABILITY = os.getenv('ATTENDANCE_WRITE_DURABILITY', 'normal').lower()
+if ATTENDANCE_WRITE_DURABILITY not in DURABILITY_LEVELS:
+    raise ValueError(f"ATTENDANCE_WRITE_DURABILITY must be one of {', '.join(DURABILITY_LEVELS)}")
+attendance_writer = WriteBatcher(
+    lambda: db_pool.open(synchronous=DURABILITY_LEVELS[ATTENDANCE_WRITE_DURABILITY]),
+    max_batch=int(os.getenv('ATTENDANCE_BATCH_SIZE', '128')),
+    max_delay=float(os.getenv('ATTENDANCE_BATCH_DELAY_MS', '2')) / 1000,
+    max_queue=int(os.getenv('ATTENDANCE_WRITE_QUEUE', '4096')),
+)
+
+@app.errorhandler(WriterBusy)
+def handle_writer_busy(e):
+    return jsonify({"message": "Server is busy, please try again shortly."}), 503, {"Retry-After": "2"}
+
+def write_attendance(work):
+    # work(conn) runs in a transaction and its result is returned once that transaction has committed.
+    if ATTENDANCE_GROUP_COMMIT:
+        return attendance_writer.submit(work)
+    conn = get_db_connection()
+    try:
+        result = work(conn)
+        conn.commit()
+        return result
+    except BaseException:
+        conn.rollback()
+        raise
     finally:
         conn.close()
 
@@ -673,77 +1752,514 @@ def attendance_login():
     employee_id, date_str, work_location, employee_name = data.get('employee_id'), data.get('date'), data.get('work_location'), data.get('employee_name')
     if not all([employee_id, date_str, work_location, employee_name]):
         return jsonify({"message": "Missing required attendance login fields"}), 400
-    conn = get_db_connection()
+    login_time = datetime.now().strftime('%H:%M:%S')
+
+    def record_login(conn):
+        cursor = conn.execute('INSERT INTO attendance_records (employee_id, date, login_time, work_location) VALUES (?, ?, ?, ?)',
+                              (employee_id, date_str, login_time, work_location))
+        return public_id(ATTENDANCE, cursor.lastrowid)
+
     try:
-        cursor = conn.cursor()
-        record_id = str(uuid.uuid4())
-        login_time = datetime.now().strftime('%H:%M:%S')
-        cursor.execute('INSERT INTO attendance_records (record_id, employee_id, date, login_time, work_location) VALUES (?, ?, ?, ?, ?)',
-                       (record_id, employee_id, date_str, login_time, work_location))
-        conn.commit()
-        return jsonify({"message": "Login recorded successfully!", "record": {"record_id": record_id, "employee_id": employee_id, "date": date_str, "login_time": login_time, "employee_name": employee_name, "work_location": work_location, "logout_time": None}}), 201
+        record_id = write_attendance(record_login)
     except sqlite3.Error as e:
-        conn.rollback()
         return jsonify({"message": f"Database error recording login: {e}"}), 500
-    finally:
-        conn.close()
+    return jsonify({"message": "Login recorded successfully!", "record": {"record_id": record_id, "employee_id": employee_id, "date": date_str, "login_time": login_time, "employee_name": employee_name, "work_location": work_location, "logout_time": None}}), 201
 
 @app.route('/attendance/logout/<string:record_id>', methods=['PUT'])
 def attendance_logout(record_id):
-    conn = get_db_connection()
+    logout_time = datetime.now().strftime('%H:%M:%S')
+
+    def record_logout(conn):
+        key = resolve_record_id(conn, ATTENDANCE, record_id)
+        return conn.execute("UPDATE attendance_records SET logout_time = ? WHERE id = ? AND logout_time IS NULL",
+                            (logout_time, key)).rowcount
+
     try:
-        cursor = conn.cursor()
-        logout_time = datetime.now().strftime('%H:%M:%S')
-        cursor.execute("UPDATE attendance_records SET logout_time = ? WHERE record_id = ? AND logout_time IS NULL", (logout_time, record_id))
-        if cursor.rowcount == 0:
-            return jsonify({"message": "Attendance record not found or already logged out"}), 404
-        conn.commit()
-        return jsonify({"message": "Logout recorded successfully!", "logout_time": logout_time}), 200
+        updated = write_attendance(record_logout)
     except sqlite3.Error as e:
-        conn.rollback()
         return jsonify({"message": f"Database error recording logout: {e}"}), 500
-    finally:
-        conn.close()
+    if not updated:
+        return jsonify({"message": "Attendance record not found or already logged out"}), 404
+    return jsonify({"message": "Logout recorded successfully!", "logout_time": logout_time}), 200
 
 @app.route('/attendance/<string:employee_id>', methods=['GET'])
+@conditional_get('attendance:{employee_id}')
 def get_employee_attendance(employee_id):
+    start, end = request.args.get('from'), request.args.get('to')
+    query = lambda schema: employee_attendance_query(employee_id, start, end, schema)
     conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('''SELECT ar.record_id, ar.date, ar.login_time, ar.work_location, ar.logout_time, e.first_name, e.last_name
-                      FROM attendance_records ar JOIN employees e ON ar.employee_id = e.id
-                      WHERE ar.employee_id = ? ORDER BY ar.date DESC, ar.login_time DESC''', (employee_id,))
-    records = cursor.fetchall()
-    conn.close()
+    try:
+        records = conn.execute(*query('main')).fetchall()
+        records = merge_archived(conn, query, archives.years(conn, year_of(start), year_of(end)), records,
+                                 key=lambda row: (row['date'], row['login_time'], row['id']), reverse=True)
+    except sqlite3.Error as e:
+        return jsonify({"message": f"Database error: {e}"}), 500
+    finally:
+        conn.close()
     attendance_list = []
     for record in records:
         record_dict = dict(record)
+        del record_dict['id']
         record_dict['employee_name'] = f"{record_dict.pop('first_name')} {record_dict.pop('last_name')}"
         attendance_list.append(record_dict)
     return jsonify(attendance_list), 200
 
-# NEW: Admin endpoint to view all attendance records
+# NEW: Admin endpoint to view all attendance records, one keyset page at a time
 @app.route('/admin/attendance-records', methods=['GET'])
+@conditional_get('admin:attendance')
 def get_all_attendance_records():
+    try:
+        limit = int(request.args.get('limit', ATTENDANCE_PAGE_DEFAULT_LIMIT))
+    except ValueError:
+        return jsonify({"message": "limit must be an integer"}), 400
+    limit = max(1, min(limit, ATTENDANCE_PAGE_MAX_LIMIT))
+    after = None
+    if request.args.get('cursor'):
+        after = decode_cursor(request.args['cursor'])
+        if not after or len(after) != 3:
+            return jsonify({"message": "Invalid cursor"}), 400
+    filters = {key: request.args.get(key) for key in ('from', 'to', 'employee_id', 'work_location')}
+    query = lambda schema: build_attendance_page_query(filters, after, limit, schema)
     conn = get_db_connection()
-    cursor = conn.cursor()
     try:
-        cursor.execute('''
-            SELECT ar.date, ar.login_time, ar.work_location, ar.logout_time, e.first_name, e.last_name
-            FROM attendance_records ar
-            JOIN employees e ON ar.employee_id = e.id
-            ORDER BY ar.date DESC, ar.login_time DESC
-        ''')
-        records = [dict(row) for row in cursor.fetchall()]
-        for record in records:
+        rows = conn.execute(*query('main')).fetchall()
+        last_year = year_of(after[0]) if after else year_of(filters['to'])
+        years = archives.years(conn, year_of(filters['from']), last_year)
+        if len(rows) > limit:
+            # The page is full from main: archived years older than its last row cannot reach it.
+            years = [year for year in years if year >= (year_of(rows[limit - 1]['date']) or 0)]
+        rows = merge_archived(conn, query, years, rows,
+                              key=lambda row: (row['date'], row['login_time'], row['id']), reverse=True)
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = encode_cursor([last['date'], last['login_time'], last['id']])
+        records = []
+        for row in rows:
+            record = dict(row)
+            del record['id']
             record['employee_name'] = f"{record.pop('first_name')} {record.pop('last_name')}"
-        return jsonify(records), 200
+            records.append(record)
+        return jsonify({"records": records, "next_cursor": next_cursor}), 200
     except sqlite3.Error as e:
         return jsonify({"message": f"Database error: {e}"}), 500
     finally:
         conn.close()
 
+# --- Attendance Reports ---
+LATE_ARRIVAL_TIME = os.getenv('LATE_ARRIVAL_TIME', '09:30')
+STANDARD_WORK_HOURS = float(os.getenv('STANDARD_WORK_HOURS', '8'))
+REPORT_MAX_DAYS = 366
+
+def parse_clock(value):
+    hours, minutes = value.split(':')[:2]
+    return int(hours) * 3600 + int(minutes) * 60
+
+@app.route('/admin/reports/attendance', methods=['GET'])
+def get_attendance_report():
+    today = date.today()
+    try:
+        start = date.fromisoformat(request.args.get('from') or today.replace(day=1).isoformat())
+        end = date.fromisoformat(request.args.get('to') or today.isoformat())
+        late_after = parse_clock(request.args.get('late_after') or LATE_ARRIVAL_TIME)
+    except ValueError:
+        return jsonify({"message": "from/to must be YYYY-MM-DD and late_after HH:MM"}), 400
+    if end < start or (end - start).days >= REPORT_MAX_DAYS:
+        return jsonify({"message": f"Report range must be 1 to {REPORT_MAX_DAYS} days"}), 400
+    engine = request.args.get('engine')
+    if engine not in (None, 'numpy', 'array'):
+        return jsonify({"message": "engine must be numpy or array"}), 400
+    department = request.args.get('department')
+    # Before taking a connection: a cold calendar cache loads through a pooled connection of its own.
+    calendar = holiday_calendar.get()
+    conn = get_db_connection()
+    try:
+        with archives.attached(conn, archives.years(conn, start.year, end.year)) as schemas:
+            columns = AttendanceColumns.load(conn, start, end, department, schemas=schemas)
+        report = build_attendance_report(conn, start, end, department=department,
+                                         late_after=late_after, standard_hours=STANDARD_WORK_HOURS,
+                                         engine=engine, today=today, columns=columns, calendar=calendar)
+        return jsonify(report), 200
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+    except sqlite3.Error as e:
+        return jsonify({"message": f"Database error: {e}"}), 500
+    finally:
+        conn.close()
+
+register_query_plan_check('get_attendance_report', *attendance_columns_query(date(2025, 1, 1), date(2025, 1, 31)))
+
+# --- Streaming Exports (payroll) ---
+EXPORT_FETCH_SIZE = 500
+EXPORT_FORMATS = {'csv': 'text/csv', 'ndjson': 'application/x-ndjson'}
+
+ATTENDANCE_EXPORT_COLUMNS = ['record_id', 'employee_id', 'first_name', 'last_name', 'department', 'date', 'login_time', 'logout_time', 'work_location']
+LEAVE_EXPORT_COLUMNS = ['record_id', 'employee_id', 'first_name', 'last_name', 'department', 'leave_type', 'from_date', 'to_date', 'leave_days', 'status', 'comment', 'submitted_at']
+
+def build_attendance_export_query(filters, schema='main'):
+    where, params = [], []
+    if filters.get('from'):
+        where.append("ar.date >= ?")
+        params.append(filters['from'])
+    if filters.get('to'):
+        where.append("ar.date <= ?")
+        params.append(filters['to'])
+    if filters.get('department'):
+        where.append("e.department = ?")
+        params.append(filters['department'])
+    sql = f'''SELECT {ATTENDANCE_RECORD_ID} AS record_id, ar.employee_id, e.first_name, e.last_name, e.department,
+                    ar.date, ar.login_time, ar.logout_time, ar.work_location
+             FROM {schema}.attendance_records ar JOIN employees e ON ar.employee_id = e.id'''
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    return sql + " ORDER BY ar.date, ar.login_time, ar.id", params
+
+def build_leave_export_query(filters, schema='main'):
+    # A leave is in range when it overlaps [from, to]; single-day leave has no to_date.
+    where, params = [], []
+    if filters.get('from'):
+        where.append("COALESCE(l.to_date, l.from_date) >= ?")
+        params.append(filters['from'])
+    if filters.get('to'):
+        where.append("l.from_date <= ?")
+        params.append(filters['to'])
+    if filters.get('department'):
+        # Unary + keeps the planner walking leave rows in from_date order so output streams without a sort.
+        where.append("+e.department = ?")
+        params.append(filters['department'])
+    sql = f'''SELECT {public_id_sql(LEAVE, 'l.id')} AS record_id, l.employee_id, e.first_name, e.last_name, e.department,
+                    l.leave_type, l.from_date, l.to_date, l.leave_days, l.status, l.comment, l.submitted_at
+             FROM {schema}.leave_applications l JOIN employees e ON l.employee_id = e.id'''
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    return sql + " ORDER BY l.from_date, l.id", params
+
+def stream_rows(query, years, key, columns, fmt):
+    # Holds one fetchmany() batch at a time; the pooled connection is released when the client finishes or disconnects.
+    # Archived years in range stream alongside main, merged in export order.
+    conn = get_db_connection()
+    try:
+        with archives.attached(conn, archives.years(conn, *years)) as schemas:
+            cursors = [conn.execute(*query(schema)) for schema in schemas]
+            try:
+                if len(cursors) == 1:
+                    fetch = lambda: cursors[0].fetchmany(EXPORT_FETCH_SIZE)
+                else:
+                    merged = heapq.merge(*cursors, key=key)
+                    fetch = lambda: list(islice(merged, EXPORT_FETCH_SIZE))
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                if fmt == 'csv':
+                    writer.writerow(columns)
+                    yield buffer.getvalue()
+                while True:
+                    rows = fetch()
+                    if not rows:
+                        break
+                    buffer.seek(0)
+                    buffer.truncate()
+                    for row in rows:
+                        if fmt == 'csv':
+                            writer.writerow(row)
+                        else:
+                            buffer.write(json.dumps(dict(zip(columns, row))) + "\n")
+                    yield buffer.getvalue()
+            finally:
+                # Open statements would keep the archives from detaching.
+                for cursor in cursors:
+                    cursor.close()
+    finally:
+        conn.close()
+
+def export_response(name, query_builder, columns, key, spill_years=0):
+    # spill_years: how far past `to` an overlapping row's archive year can be (leave is filed by end date).
+    fmt = request.args.get('format', 'csv')
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({"message": "format must be 'csv' or 'ndjson'"}), 400
+    filters = {key: request.args.get(key) for key in ('from', 'to', 'department')}
+    query = lambda schema: query_builder(filters, schema)
+    last_year = year_of(filters['to'])
+    years = (year_of(filters['from']), last_year + spill_years if last_year else None)
+    filename = f"{name}_{filters['from'] or 'start'}_{filters['to'] or 'today'}.{fmt}"
+    return Response(
+        stream_with_context(stream_rows(query, years, key, columns, fmt)),
+        mimetype=EXPORT_FORMATS[fmt],
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
+
+register_query_plan_check('export_attendance', *build_attendance_export_query({'from': '2025-01-01', 'to': '2025-01-31'}))
+register_query_plan_check('export_leave', *build_leave_export_query({'from': '2025-01-01', 'to': '2025-01-31', 'department': 'Eng'}))
+
+@app.route('/admin/export/attendance', methods=['GET'])
+def export_attendance():
+    return export_response('attendance', build_attendance_export_query, ATTENDANCE_EXPORT_COLUMNS,
+                           key=lambda row: (row['date'], row['login_time']))
+
+@app.route('/admin/export/leave', methods=['GET'])
+def export_leave():
+    return export_response('leave', build_leave_export_query, LEAVE_EXPORT_COLUMNS,
+                           key=lambda row: row['from_date'], spill_years=1)
+
+@app.cli.command('reconcile-leave-balances')
+@click.option('--fix', is_flag=True, help='Rewrite drifted ledger columns from the approved applications.')
+def reconcile_leave_balances(fix):
+    """Verify the availed-days ledger against approved leave applications."""
+    conn = get_db_connection()
+    try:
+        expected = {}
+        # The ledger never forgets, so archived years count too; one archive attached at a time.
+        for year in [None, *archives.years(conn)]:
+            with archives.attached(conn, [year] if year else []) as schemas:
+                for row in conn.execute(f'''SELECT employee_id, leave_type, SUM(leave_days) AS total
+                                           FROM {schemas[-1]}.leave_applications WHERE status = 'Approved'
+                                           GROUP BY employee_id, leave_type''').fetchall():
+                    column = LEAVE_TYPE_COLUMNS.get(row['leave_type'])
+                    if column:
+                        totals = expected.setdefault(row['employee_id'], {})
+                        totals[column] = totals.get(column, 0) + (row['total'] or 0)
+        ledger = {row['employee_id']: row for row in conn.execute("SELECT * FROM leave_balances")}
+        drifted = []
+        for employee_id in sorted(set(expected) | set(ledger)):
+            for column in LEAVE_ALLOTMENT_DEFAULTS:
+                want = expected.get(employee_id, {}).get(column, 0)
+                have = ledger[employee_id][f"{column}_availed"] if employee_id in ledger else 0
+                if want != have:
+                    drifted.append((employee_id, column, have, want))
+                    print(f"{employee_id} {column}_availed: ledger={have} applications={want}")
+        if drifted and fix:
+            for employee_id, column, have, want in drifted:
+                adjust_leave_ledger(conn, employee_id, f"{column}_availed", want - have)
+            conn.commit()
+            print(f"Fixed {len(drifted)} ledger entries.")
+        elif drifted:
+            raise SystemExit(f"{len(drifted)} ledger entries drifted; rerun with --fix to repair")
+        else:
+            print("Leave ledger matches approved applications.")
+    finally:
+        conn.close()
+
+def event_stream(subscription):
+    expires = time.monotonic() + SSE_MAX_STREAM_SECONDS
+    yield "retry: 5000\n\n"
+    while time.monotonic() < expires:
+        events = subscription.get(min(SSE_HEARTBEAT_SECONDS, expires - time.monotonic()))
+        if events:
+            yield "".join(format_sse(event) for event in events)
+        else:
+            # Comment line keeps proxies from timing out and surfaces dead clients.
+            yield ": keep-alive\n\n"
+
+def sse_response(topics):
+    # Subscribe before responding, so a stream over the limit gets its 503 (StreamsBusy) instead of a 200.
+    subscription = event_bus.subscribe(topics)
+    # No stream_with_context: the stream never touches the request, so it need not pin its context.
+    response = Response(
+        event_stream(subscription),
+        mimetype='text/event-stream',
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+    # Runs when the server closes the response, even if the stream never started.
+    response.call_on_close(lambda: event_bus.unsubscribe(subscription))
+    return response
+
+@app.route('/events/<string:employee_id>', methods=['GET'])
+def employee_events(employee_id):
+    return sse_response([employee_topic(employee_id)])
+
+@app.route('/admin/events', methods=['GET'])
+def admin_events():
+    return sse_response([ADMIN_TOPIC])
+
+metrics.gauge('hrms_db_pool_connections', 'Pooled SQLite connections.',
+              lambda: {key: value for key, value in db_pool.stats().items() if key != 'database'})
+metrics.gauge('hrms_response_cache', 'Conditional-GET response cache.', response_cache.stats)
+metrics.gauge('hrms_password_hasher', 'Password hashing pool.',
+              lambda: {key: value for key, value in password_hasher.stats().items() if key != 'method'})
+metrics.gauge('hrms_event_bus', 'Server-sent event subscriptions.', event_bus.stats)
+metrics.gauge('hrms_attendance_writer', 'Attendance group commit writer.', attendance_writer.stats)
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/admin/profiler', methods=['GET'])
+def get_profile():
+    # Collapsed stacks, heaviest first; feed to flamegraph.pl or speedscope.
+    limit = request.args.get('limit', type=int)
+    if request.args.get('format') == 'json':
+        return jsonify(profiler.stats()), 200
+    return Response(profiler.folded(limit), mimetype='text/plain')
+
+@app.route('/admin/profiler', methods=['PUT'])
+def toggle_profiler():
+    data = request.get_json(silent=True) or {}
+    interval_ms = data.get('interval_ms')
+    if interval_ms is not None and (not isinstance(interval_ms, (int, float)) or interval_ms <= 0):
+        return jsonify({"message": "interval_ms must be a positive number"}), 400
+    if data.get('reset'):
+        profiler.reset()
+    if 'enabled' in data:
+        if data['enabled']:
+            profiler.start(interval_ms / 1000 if interval_ms else None)
+        else:
+            profiler.stop()
+    return jsonify(profiler.stats()), 200
+
+@app.route('/admin/storage', methods=['GET'])
+def get_storage_report():
+    # Walks every page of the database (dbstat); meant for occasional admin use.
+    conn = get_db_connection()
+    try:
+        return jsonify(archives.report(conn)), 200
+    except sqlite3.Error as e:
+        return jsonify({"message": f"Database error: {e}"}), 500
+    finally:
+        conn.close()
+
+@app.route('/admin/hashing-stats', methods=['GET'])
+def get_hashing_stats():
+    return jsonify(password_hasher.stats()), 200
+
+@app.cli.command('rebuild-org-chart')
+def rebuild_org_chart_command():
+    """Rebuild reporting_lines and reporting_closure from the employees' reporting manager emails."""
+    conn = get_db_connection()
+    try:
+        counts = rebuild_org_chart(conn)
+        conn.commit()
+    finally:
+        conn.close()
+    print(json.dumps(counts))
+    if counts['cyclic_lines_dropped']:
+        print("Reporting lines that closed a cycle were left out; see reporting_lines rows with manager_id NULL.")
+
+@app.cli.command('rebuild-employee-search')
+def rebuild_employee_search_command():
+    """Re-index every employee for /admin/employees/search."""
+    conn = get_db_connection()
+    try:
+        count = rebuild_employee_search(conn)
+        conn.commit()
+    finally:
+        conn.close()
+    print(f"Indexed {count} employees.")
+
+@app.cli.command('hash-password')
+@click.argument('password')
+def hash_password_command(password):
+    """Print a hash suitable for the ADMIN_PASSWORD_HASH environment variable."""
+    print(password_hasher.hash(password))
+
+@app.cli.command('archive-notifications')
+@click.option('--days', default=90, show_default=True, help='Archive read notifications older than this many days.')
+@click.option('--purge', is_flag=True, help='Delete instead of copying into notifications_archive.')
+@click.option('--batch-size', default=5000, show_default=True)
+def archive_notifications(days, purge, batch_size):
+    """Move old read notifications out of the live table in small batches."""
+    conn = get_db_connection()
+    total = 0
+    try:
+        while True:
+            ids = [row[0] for row in conn.execute(
+                "SELECT id FROM notifications WHERE is_read = 1 AND timestamp < datetime('now', ?) ORDER BY id LIMIT ?",
+                (f"-{days} days", batch_size))]
+            if not ids:
+                break
+            placeholders = ', '.join('?' for _ in ids)
+            if not purge:
+                conn.execute(f'''INSERT OR IGNORE INTO notifications_archive (id, employee_id, message, is_read, timestamp)
+                                 SELECT id, employee_id, message, is_read, timestamp
+                                 FROM notifications WHERE id IN ({placeholders})''', ids)
+            conn.execute(f"DELETE FROM notifications WHERE id IN ({placeholders})", ids)
+            conn.commit()
+            total += len(ids)
+        print(f"{'Purged' if purge else 'Archived'} {total} read notifications older than {days} days.")
+    finally:
+        conn.close()
+
+@app.cli.command('archive-years')
+@click.option('--before', type=int, help='Archive every year before this one.  [default: the current year]')
+@click.option('--batch-size', default=5000, show_default=True)
+@click.option('--vacuum', is_flag=True, help='Compact the main database afterwards.')
+def archive_years(before, batch_size, vacuum):
+    """Move closed years of attendance, settled leave and read notifications into per-year archive files."""
+    current_year = date.today().year
+    before = before or current_year
+    if before > current_year:
+        raise SystemExit(f"Only closed years can be archived (--before {current_year} or earlier)")
+    conn = get_db_connection()
+    try:
+        oldest = conn.execute('''SELECT MIN(day) FROM (
+                                    SELECT MIN(date) AS day FROM attendance_records
+                                    UNION ALL SELECT MIN(COALESCE(to_date, from_date)) FROM leave_applications WHERE status <> 'Pending'
+                                    UNION ALL SELECT MIN(timestamp) FROM notifications WHERE is_read = 1
+                                    UNION ALL SELECT MIN(timestamp) FROM notifications_archive)''').fetchone()[0]
+        for year in range(year_of(oldest) or before, before):
+            moved = archives.archive_year(conn, year, batch_size)
+            if any(moved.values()):
+                print(f"{year}: {', '.join(f'{count} {table}' for table, count in moved.items())} -> {archives.path(year)}")
+        if vacuum:
+            for name, sizes in archives.compact(conn).items():
+                print(f"{name}: {sizes['before']} -> {sizes['after']} bytes")
+    finally:
+        conn.close()
+
+@app.cli.command('compact-database')
+@click.option('--archives', 'include_archives', is_flag=True, help='VACUUM every archive file as well.')
+def compact_database(include_archives):
+    """Checkpoint the WAL and VACUUM the database to return freed pages to the filesystem."""
+    conn = get_db_connection()
+    try:
+        years = archives.years(conn) if include_archives else []
+        for name, sizes in archives.compact(conn, years).items():
+            print(f"{name}: {sizes['before']} -> {sizes['after']} bytes")
+    finally:
+        conn.close()
+
+@app.cli.command('storage-report')
+def storage_report():
+    """Print the size of every table and index and of each yearly archive file as JSON."""
+    conn = get_db_connection()
+    try:
+        print(json.dumps(archives.report(conn), indent=2))
+    finally:
+        conn.close()
+
+@app.cli.command('drain-mail-outbox')
+def drain_mail_outbox():
+    """Send every queued email that is due, then print the outbox status counts."""
+    attempted = mail_outbox.drain()
+    conn = get_db_connection()
+    try:
+        print(f"Attempted {attempted} messages. Outbox: {mail_outbox.stats(conn)}")
+    finally:
+        conn.close()
+
+@app.cli.command('build-static')
+@click.option('--out', default=STATIC_BUILD_DIR, show_default=True, help='Directory for the hashed, precompressed assets.')
+def build_static(out):
+    """Build content-hashed, gzip/brotli-precompressed frontend assets for production serving."""
+    manifest = build_assets(app.root_path, out)
+    for source, built in sorted(manifest.items()):
+        print(f"{source} -> {built}")
+
+background_services_lock = threading.Lock()
+background_services_started = threading.Event()
+
+def start_background_services():
+    # Once per serving process: by __main__ here and by wsgi.build_wsgi_app() in production. Later
+    # calls do nothing, so they cannot turn back on a profiler an admin has since switched off.
+    with background_services_lock:
+        if background_services_started.is_set():
+            return
+        background_services_started.set()
+        mail_outbox.start()
+        if os.getenv('PROFILER_ENABLED', 'false').lower() == 'true':
+            profiler.start()
+
 if __name__ == '__main__':
-    init_db()
-    app.run(debug=True, port=5000)
-    #app.run(host='0.0.0.0',debug=True, port=8000)
+    # Development server. For production use gunicorn with wsgi.py (see README, "Production Deployment").
+    start_background_services()
+    app.run(debug=os.getenv('FLASK_DEBUG', 'true').lower() == 'true', port=int(os.getenv('PORT', '5000')))
     
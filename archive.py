@@ -0,0 +1,186 @@
+import os
+import sqlite3
+from contextlib import contextmanager
+
+# --- Yearly Archives ---
+# Closed years of attendance, settled leave and read notifications move out of
+# the main database into one SQLite file per year (archive/hrms-2024.db) with
+# the same keys and indexes. archive_partitions (migration 15) lists the
+# archived years. A read whose date range reaches an archived year ATTACHes
+# that file and runs the same query against it as against `main`, and the
+# caller merges the results. Reads of unarchived years never open an archive.
+
+ARCHIVE_SCHEMA = [
+    '''CREATE TABLE IF NOT EXISTS {schema}.attendance_records (
+        id INTEGER PRIMARY KEY, employee_id TEXT NOT NULL, date TEXT NOT NULL,
+        login_time TEXT NOT NULL, work_location TEXT, logout_time TEXT
+    )''',
+    "CREATE INDEX IF NOT EXISTS {schema}.idx_attendance_date_login ON attendance_records (date, login_time)",
+    "CREATE INDEX IF NOT EXISTS {schema}.idx_attendance_employee_date_login ON attendance_records (employee_id, date, login_time)",
+    "CREATE INDEX IF NOT EXISTS {schema}.idx_attendance_date_report ON attendance_records (date, employee_id, work_location, login_time, logout_time)",
+    '''CREATE TABLE IF NOT EXISTS {schema}.leave_applications (
+        id INTEGER PRIMARY KEY, employee_id TEXT NOT NULL, leave_type TEXT NOT NULL,
+        from_date TEXT NOT NULL, to_date TEXT, description TEXT, status TEXT NOT NULL,
+        comment TEXT, submitted_at DATETIME, leave_days INTEGER DEFAULT 0
+    )''',
+    "CREATE INDEX IF NOT EXISTS {schema}.idx_leave_applications_employee_submitted ON leave_applications (employee_id, submitted_at)",
+    "CREATE INDEX IF NOT EXISTS {schema}.idx_leave_applications_from_date ON leave_applications (from_date)",
+    '''CREATE TABLE IF NOT EXISTS {schema}.notifications (
+        id INTEGER PRIMARY KEY, employee_id TEXT NOT NULL, message TEXT NOT NULL,
+        is_read INTEGER NOT NULL, timestamp DATETIME
+    )''',
+    "CREATE INDEX IF NOT EXISTS {schema}.idx_notifications_employee_id ON notifications (employee_id, id)",
+]
+
+ATTENDANCE_COLUMNS = 'id, employee_id, date, login_time, work_location, logout_time'
+LEAVE_COLUMNS = 'id, employee_id, leave_type, from_date, to_date, description, status, comment, submitted_at, leave_days'
+NOTIFICATION_COLUMNS = 'id, employee_id, message, is_read, timestamp'
+
+# (source table in main, table in the archive, columns, rows of the year being archived).
+# A leave belongs to the year it ends in, and only once it is no longer pending;
+# unread notifications stay where their owner will see them.
+MOVES = [
+    ('attendance_records', 'attendance_records', ATTENDANCE_COLUMNS, "date >= :start AND date < :end"),
+    ('leave_applications', 'leave_applications', LEAVE_COLUMNS,
+     "COALESCE(to_date, from_date) >= :start AND COALESCE(to_date, from_date) < :end AND status <> 'Pending'"),
+    ('notifications', 'notifications', NOTIFICATION_COLUMNS, "is_read = 1 AND timestamp >= :start AND timestamp < :end"),
+    ('notifications_archive', 'notifications', NOTIFICATION_COLUMNS, "timestamp >= :start AND timestamp < :end"),
+]
+
+
+def schema_name(year):
+    return f"archive_{year}"
+
+
+class ArchiveStore:
+    def __init__(self, directory):
+        self.directory = directory
+
+    def path(self, year):
+        return os.path.join(self.directory, f"hrms-{year}.db")
+
+    def years(self, conn, first=None, last=None):
+        """Archived years within [first, last]; either bound may be None (open-ended)."""
+        return [row[0] for row in conn.execute(
+            "SELECT year FROM archive_partitions WHERE year >= COALESCE(?, year) AND year <= COALESCE(?, year) ORDER BY year",
+            (first, last))]
+
+    @contextmanager
+    def attached(self, conn, years):
+        """ATTACH the given years to conn; yields the schema names to query, 'main' first."""
+        schemas = ['main']
+        try:
+            for year in years:
+                path = self.path(year)
+                # ATTACH would quietly create an empty file in place of a missing archive.
+                if not os.path.isfile(path):
+                    raise sqlite3.OperationalError(f"Archive file for {year} is missing: {path}")
+                conn.execute("ATTACH DATABASE ? AS " + schema_name(year), (path,))
+                schemas.append(schema_name(year))
+            yield schemas
+        finally:
+            for schema in schemas[1:]:
+                try:
+                    conn.execute(f"DETACH DATABASE {schema}")
+                except sqlite3.Error:
+                    # Still attached (e.g. a statement left open): keep it out of the pool.
+                    conn.pool = None
+
+    def archive_year(self, conn, year, batch_size=5000):
+        """Move the year's closed rows into its archive file; returns rows moved per source table."""
+        os.makedirs(self.directory, exist_ok=True)
+        schema = schema_name(year)
+        path = self.path(year)
+        existed = os.path.exists(path)
+        bounds = {"start": f"{year:04d}-01-01", "end": f"{year + 1:04d}-01-01", "limit": batch_size}
+        conn.commit()
+        conn.execute("ATTACH DATABASE ? AS " + schema, (path,))
+        moved = {}
+        try:
+            # A single self-contained file (no -wal/-shm) that can be copied or shipped as is.
+            conn.execute(f"PRAGMA {schema}.journal_mode = DELETE")
+            for statement in ARCHIVE_SCHEMA:
+                conn.execute(statement.format(schema=schema))
+            # Registered before any row moves, so readers find every row that has left main.
+            conn.execute(
+                '''INSERT INTO archive_partitions (year, file, archived_at) VALUES (?, ?, CURRENT_TIMESTAMP)
+                   ON CONFLICT (year) DO UPDATE SET archived_at = excluded.archived_at''',
+                (year, os.path.basename(path)))
+            conn.commit()
+            for source, target, columns, where in MOVES:
+                moved[source] = 0
+                while True:
+                    ids = [row[0] for row in conn.execute(
+                        f"SELECT id FROM main.{source} WHERE {where} ORDER BY id LIMIT :limit", bounds)]
+                    if not ids:
+                        break
+                    placeholders = ', '.join('?' * len(ids))
+                    # The two files commit separately: copy first, then delete. A crash in between
+                    # leaves rows in both (readers may list them twice until the delete commits),
+                    # and the next run skips the copies it already made.
+                    conn.execute(f"INSERT OR IGNORE INTO {schema}.{target} ({columns}) "
+                                 f"SELECT {columns} FROM main.{source} WHERE id IN ({placeholders})", ids)
+                    conn.commit()
+                    conn.execute(f"DELETE FROM main.{source} WHERE id IN ({placeholders})", ids)
+                    conn.commit()
+                    moved[source] += len(ids)
+            if not existed and not any(moved.values()):
+                conn.execute("DELETE FROM archive_partitions WHERE year = ?", (year,))
+                conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            conn.execute(f"DETACH DATABASE {schema}")
+        if not existed and not any(moved.values()):
+            os.remove(path)
+        return moved
+
+    def compact(self, conn, years=()):
+        """Checkpoint and VACUUM the main database and the given archive files; returns bytes before/after."""
+        sizes = {}
+        before = database_bytes(conn)
+        conn.commit()
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        conn.execute("VACUUM")
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        sizes['main'] = {"before": before, "after": database_bytes(conn)}
+        for year in years:
+            path = self.path(year)
+            before = os.path.getsize(path)
+            archive = sqlite3.connect(path)
+            try:
+                archive.execute("VACUUM")
+            finally:
+                archive.close()
+            sizes[schema_name(year)] = {"before": before, "after": os.path.getsize(path)}
+        return sizes
+
+    def report(self, conn):
+        """Sizes of the main database (per table and index) and of every archive file, with row counts."""
+        main = {
+            "bytes": database_bytes(conn),
+            "page_size": conn.execute("PRAGMA page_size").fetchone()[0],
+            "pages": conn.execute("PRAGMA page_count").fetchone()[0],
+            "free_pages": conn.execute("PRAGMA freelist_count").fetchone()[0],
+            "btrees": {row[0]: row[1] for row in conn.execute(
+                "SELECT name, SUM(pgsize) FROM dbstat WHERE aggregate = 0 GROUP BY name ORDER BY 2 DESC")},
+        }
+        archives = {}
+        for year, file, archived_at in conn.execute("SELECT year, file, archived_at FROM archive_partitions ORDER BY year").fetchall():
+            path = self.path(year)
+            entry = {"file": file, "archived_at": archived_at, "bytes": os.path.getsize(path) if os.path.isfile(path) else None}
+            if entry["bytes"] is not None:
+                archive = sqlite3.connect(path)
+                try:
+                    entry["rows"] = {table: archive.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                                     for table in ('attendance_records', 'leave_applications', 'notifications')}
+                finally:
+                    archive.close()
+            archives[year] = entry
+        return {"main": main, "archives": archives}
+
+
+def database_bytes(conn):
+    path = conn.execute("PRAGMA database_list").fetchone()[2]
+    return sum(os.path.getsize(name) for name in (path, path + '-wal') if os.path.isfile(name))
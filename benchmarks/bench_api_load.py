@@ -0,0 +1,471 @@
+"""API load test: seeds a synthetic HRMS database and drives the real endpoints.
+
+Usage: python benchmarks/bench_api_load.py [--employees 200] [--years 2] [--requests 3000]
+           [--threads 8] [--transport test|http|both] [--output run.json] [--baseline previous.json]
+
+The data set is generated from --seed, so runs with the same options see the same
+rows; each run reports throughput and latency percentiles per endpoint as JSON
+with stable key order, so a diff between two output files (or --baseline, which
+exits non-zero when an endpoint's p95 grew by more than --threshold) shows which
+query or serialization path regressed.
+
+Transports: "test" calls the app through Flask's test client, without sockets;
+"http" serves it with a threaded werkzeug server on a free local port and sends
+keep-alive HTTP/1.1 requests from --threads client threads. Pass --url to point
+the http transport at an already running server instead (seed that server's
+database with --db PATH --seed-only first).
+"""
+import argparse
+import http.client
+import itertools
+import json
+import logging
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from urllib.parse import urlsplit
+
+DEPARTMENTS = ['Engineering', 'Operations', 'Finance', 'Sales', 'HR', 'Support']
+LOCATIONS = ['Office', 'Office', 'Office', 'Home', 'Client Site']
+LEAVE_TYPES = ['Sick Leave', 'Casual Leave', 'Earned Leave', 'WFH']
+PASSWORD = 'bench-secret'
+BATCH = 20000
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+# --- Synthetic data ---
+
+def seed_database(hrms, args):
+    """Fill an empty database; returns the row counts. An already seeded database is reused as is."""
+    rng = random.Random(args.seed)
+    conn = hrms.get_db_connection()
+    try:
+        if conn.execute("SELECT COUNT(*) FROM employees").fetchone()[0]:
+            return dataset_counts(conn)
+        started = time.perf_counter()
+        end = date.today() - timedelta(days=1)
+        start = end - timedelta(days=int(args.years * 365))
+        calendar = hrms.WorkingCalendar(conn.execute("SELECT date, name FROM holidays"))
+        working_days = [start + timedelta(days=i) for i in range((end - start).days + 1)
+                        if calendar.is_working_day(start + timedelta(days=i))]
+        hashed = hrms.password_hasher.hash(PASSWORD)
+
+        conn.execute("BEGIN IMMEDIATE")
+        ids = [f"SSQ-{n}" for n in hrms.allocate_ids(conn, 'employee', args.employees)]
+        employees = []
+        for i, employee_id in enumerate(ids):
+            data = {"first_name": "Bench", "last_name": f"User{i}", "email": f"bench{i}@example.com",
+                    "department": rng.choice(DEPARTMENTS), "employee_role": "Engineer",
+                    "employment_status": "Active", "join_date": start.isoformat(), "gender": rng.choice(['M', 'F'])}
+            employees.append(hrms.employee_insert_params(employee_id, data, hashed))
+        conn.executemany(hrms.INSERT_EMPLOYEE_SQL, employees)
+        conn.execute("UPDATE employees SET force_password_change = 0")
+
+        batch = []
+        for day in working_days:
+            for employee_id in ids:
+                if rng.random() > args.presence:
+                    continue
+                login = 8 * 3600 + 1800 + int(rng.gauss(3600, 1500))
+                logout = login + int(rng.gauss(8.5 * 3600, 3600))
+                batch.append((employee_id, day.isoformat(), clock(login), rng.choice(LOCATIONS),
+                              clock(logout) if rng.random() > 0.01 and logout < 86400 else None))
+                if len(batch) >= BATCH:
+                    insert_attendance(conn, batch)
+        insert_attendance(conn, batch)
+
+        leaves, availed = [], {}
+        for employee_id in ids:
+            for _ in range(args.leaves):
+                first = rng.randrange(len(working_days))
+                from_date = working_days[first]
+                to_date = working_days[min(first + rng.randint(0, 2), len(working_days) - 1)]
+                leave_type = rng.choice(LEAVE_TYPES)
+                days = calendar.working_days(from_date, to_date)
+                status = rng.choices(['Approved', 'Rejected', 'Pending'], [6, 1, 2])[0]
+                if status == 'Approved':
+                    column = f"{hrms.LEAVE_TYPE_COLUMNS[leave_type]}_availed"
+                    availed[employee_id, column] = availed.get((employee_id, column), 0) + days
+                leaves.append((employee_id, leave_type, from_date.isoformat(), to_date.isoformat(),
+                               "Synthetic leave", status, days, f"{from_date.isoformat()} 09:00:00"))
+        conn.executemany('''INSERT INTO leave_applications (employee_id, leave_type, from_date, to_date,
+                            description, status, leave_days, submitted_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)''', leaves)
+        conn.executemany("INSERT INTO leave_balances (employee_id) VALUES (?)", [(employee_id,) for employee_id in ids])
+        for (employee_id, column), days in availed.items():
+            hrms.adjust_leave_ledger(conn, employee_id, column, days)
+
+        weekends = [start + timedelta(days=i) for i in range((end - start).days + 1)
+                    if not calendar.is_working_day(start + timedelta(days=i))]
+        compoffs = [(employee_id, rng.choice(weekends).isoformat(), "Weekend release",
+                     rng.choice(['Approved', 'Pending']))
+                    for employee_id in ids for _ in range(args.compoffs) if weekends]
+        conn.executemany('''INSERT INTO compoff_requests (employee_id, work_date, description, status)
+                            VALUES (?, ?, ?, ?)''', compoffs)
+
+        batch = []
+        span = (end - start).days
+        for employee_id in ids:
+            for n in range(args.notifications):
+                stamp = f"{start + timedelta(days=span * n // args.notifications)} 10:00:00"
+                batch.append((employee_id, f"Synthetic notification {n}",
+                              int(rng.random() < 0.8), stamp))
+        conn.executemany('''INSERT INTO notifications (employee_id, message, is_read, timestamp)
+                            VALUES (?, ?, ?, ?)''', batch)
+        conn.commit()
+        counts = dataset_counts(conn)
+        counts["seed_seconds"] = round(time.perf_counter() - started, 2)
+        return counts
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def clock(seconds):
+    return f"{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+
+def insert_attendance(conn, batch):
+    conn.executemany('''INSERT INTO attendance_records (employee_id, date, login_time, work_location, logout_time)
+                        VALUES (?, ?, ?, ?, ?)''', batch)
+    batch.clear()
+
+
+def dataset_counts(conn):
+    tables = ['employees', 'attendance_records', 'leave_applications', 'compoff_requests', 'notifications']
+    return {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] for table in tables}
+
+
+# --- Transports ---
+
+class TestClientTransport:
+    name = 'test'
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, body=None):
+        response = self.client.open(path, method=method, json=body)
+        return response.status_code, response.get_data()
+
+    def close(self):
+        pass
+
+
+class HTTPTransport:
+    name = 'http'
+
+    def __init__(self, base_url):
+        parts = urlsplit(base_url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.local = threading.local()
+        self.connections = []
+
+    def _connection(self):
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = self.local.conn = http.client.HTTPConnection(self.host, self.port, timeout=60)
+            self.connections.append(conn)
+        return conn
+
+    def request(self, method, path, body=None):
+        payload = json.dumps(body).encode() if body is not None else None
+        headers = {"Content-Type": "application/json"} if payload is not None else {}
+        for attempt in (1, 2):
+            conn = self._connection()
+            try:
+                conn.request(method, path, body=payload, headers=headers)
+                response = conn.getresponse()
+                return response.status, response.read()
+            except (http.client.HTTPException, ConnectionError):
+                # The server dropped an idle keep-alive connection; reconnect once.
+                conn.close()
+                self.local.conn = None
+                if attempt == 2:
+                    raise
+
+    def close(self):
+        for conn in self.connections:
+            conn.close()
+
+
+def serve(app):
+    from werkzeug.serving import WSGIRequestHandler, make_server
+
+    class KeepAliveHandler(WSGIRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', 0, app, threaded=True, request_handler=KeepAliveHandler)
+    threading.Thread(target=server.serve_forever, name='bench-http-server', daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+# --- Workload ---
+
+class Session:
+    """One client thread: runs scenario steps and records each request's latency under its endpoint name."""
+
+    def __init__(self, transport, fixture, rng):
+        self.transport, self.fixture, self.rng = transport, fixture, rng
+        self.samples = {}
+        self.recording = False
+
+    def call(self, name, method, path, body=None, expect=(200,)):
+        started = time.perf_counter()
+        try:
+            status, data = self.transport.request(method, path, body)
+        except (OSError, http.client.HTTPException):
+            status, data = 0, b''
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if self.recording:
+            sample = self.samples.setdefault(name, {"latencies": [], "errors": 0, "bytes": 0})
+            sample["latencies"].append(elapsed_ms)
+            sample["bytes"] += len(data)
+            sample["errors"] += status not in expect
+        return status, data
+
+    def employee(self):
+        return self.rng.randrange(len(self.fixture["employees"]))
+
+
+def employee_login(s):
+    i = s.employee()
+    s.call('POST /login', 'POST', '/login', {"username": f"bench{i}@example.com", "password": PASSWORD, "user_type": "employee"})
+
+
+def attendance_login_logout(s):
+    employee_id = s.fixture["employees"][s.employee()]
+    body = {"employee_id": employee_id, "date": date.today().isoformat(), "work_location": "Office", "employee_name": "Bench"}
+    status, data = s.call('POST /attendance/login', 'POST', '/attendance/login', body, expect=(201,))
+    if status == 201:
+        record_id = json.loads(data)["record"]["record_id"]
+        s.call('PUT /attendance/logout/<id>', 'PUT', f'/attendance/logout/{record_id}')
+
+
+def mark_read(s):
+    employee_id = s.fixture["employees"][s.employee()]
+    s.call('PUT /notifications/<id>/mark-read', 'PUT', f'/notifications/{employee_id}/mark-read',
+           {"ids": [s.rng.randint(1, s.fixture["max_notification_id"])]})
+
+
+def get(name, path_template):
+    def step(s):
+        month = s.rng.choice(s.fixture["months"])
+        path = path_template.format(employee=s.fixture["employees"][s.employee()], month=month,
+                                    month_end=month_end(month), year=month[:4])
+        s.call(name, 'GET', path)
+    return step
+
+
+def month_end(month):
+    first = date.fromisoformat(f"{month}-01")
+    return ((first + timedelta(days=32)).replace(day=1) - timedelta(days=1)).isoformat()
+
+
+# (weight, step): weights are relative request frequencies of an ordinary working day.
+SCENARIO = [
+    (4, employee_login),
+    (6, attendance_login_logout),
+    (10, get('GET /notifications/<id>', '/notifications/{employee}')),
+    (12, get('GET /notifications/<id>/feed', '/notifications/{employee}/feed?limit=20')),
+    (12, get('GET /notifications/<id>/unread-count', '/notifications/{employee}/unread-count')),
+    (2, mark_read),
+    (6, get('GET /profile/<id>', '/profile/{employee}')),
+    (6, get('GET /attendance/<id>', '/attendance/{employee}')),
+    (5, get('GET /leave-balance/<id>', '/leave-balance/{employee}')),
+    (5, get('GET /leave-applications/<id>', '/leave-applications/{employee}')),
+    (2, get('GET /holidays', '/holidays?year={year}')),
+    (3, get('GET /admin/dashboard-stats', '/admin/dashboard-stats')),
+    (2, get('GET /admin/leave-requests', '/admin/leave-requests')),
+    (2, get('GET /admin/compoff-requests', '/admin/compoff-requests')),
+    (3, get('GET /admin/attendance-records', '/admin/attendance-records?limit=100&from={month}-01&to={month_end}')),
+    (1, get('GET /admin/reports/attendance', '/admin/reports/attendance?from={month}-01&to={month_end}')),
+]
+
+
+def run_load(transport, fixture, args):
+    steps, weights = zip(*[(step, weight) for weight, step in SCENARIO])
+    budget = itertools.count()
+    deadline = [None]
+    sessions = [Session(transport, fixture, random.Random(f"{args.seed}:{transport.name}:{i}")) for i in range(args.threads)]
+    barrier = threading.Barrier(args.threads + 1)
+
+    def worker(session):
+        for _ in range(args.warmup // args.threads):
+            session.rng.choices(steps, weights)[0](session)
+        barrier.wait()
+        session.recording = True
+        while next(budget) < args.requests and (deadline[0] is None or time.perf_counter() < deadline[0]):
+            session.rng.choices(steps, weights)[0](session)
+
+    threads = [threading.Thread(target=worker, args=(session,)) for session in sessions]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    started = time.perf_counter()
+    if args.seconds:
+        deadline[0] = started + args.seconds
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    merged = {}
+    for session in sessions:
+        for name, sample in session.samples.items():
+            total = merged.setdefault(name, {"latencies": [], "errors": 0, "bytes": 0})
+            total["latencies"] += sample["latencies"]
+            total["errors"] += sample["errors"]
+            total["bytes"] += sample["bytes"]
+    endpoints = {name: summarize(sample, elapsed) for name, sample in sorted(merged.items())}
+    overall = summarize({"latencies": [ms for sample in merged.values() for ms in sample["latencies"]],
+                         "errors": sum(sample["errors"] for sample in merged.values()),
+                         "bytes": sum(sample["bytes"] for sample in merged.values())}, elapsed)
+    overall["seconds"] = round(elapsed, 2)
+    return {"overall": overall, "endpoints": endpoints}
+
+
+def summarize(sample, elapsed):
+    latencies = sample["latencies"]
+    if not latencies:
+        return {"requests": 0, "errors": sample["errors"]}
+    return {
+        "requests": len(latencies),
+        "errors": sample["errors"],
+        "requests_per_sec": round(len(latencies) / elapsed, 1),
+        "mean_ms": round(sum(latencies) / len(latencies), 2),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p90_ms": round(percentile(latencies, 90), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "max_ms": round(max(latencies), 2),
+        "avg_bytes": round(sample["bytes"] / len(latencies)),
+    }
+
+
+def compare(results, baseline, threshold):
+    """Endpoints whose p95 grew by more than `threshold` (a fraction) against a previous run's JSON."""
+    regressions = []
+    for transport, run in results.items():
+        before = baseline.get("transports", {}).get(transport, {}).get("endpoints", {})
+        for name, now in run["endpoints"].items():
+            old = before.get(name)
+            if not old or not old.get("p95_ms") or not now.get("p95_ms"):
+                continue
+            ratio = now["p95_ms"] / old["p95_ms"]
+            if ratio > 1 + threshold:
+                regressions.append({"transport": transport, "endpoint": name, "p95_ms_before": old["p95_ms"],
+                                    "p95_ms_after": now["p95_ms"], "ratio": round(ratio, 2)})
+    return regressions
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--employees', type=int, default=200)
+    parser.add_argument('--years', type=float, default=2)
+    parser.add_argument('--presence', type=float, default=0.92, help='chance an employee attends a working day')
+    parser.add_argument('--leaves', type=int, default=8, help='leave applications per employee')
+    parser.add_argument('--compoffs', type=int, default=2, help='comp-off requests per employee')
+    parser.add_argument('--notifications', type=int, default=60, help='notifications per employee')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--db', help='database file to seed (or reuse if it has employees); default: a temporary file')
+    parser.add_argument('--seed-only', action='store_true', help='seed --db and exit')
+    parser.add_argument('--transport', choices=['test', 'http', 'both'], default='both')
+    parser.add_argument('--url', help='base URL of a running server for the http transport')
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=3000, help='measured scenario steps per transport')
+    parser.add_argument('--seconds', type=float, default=0, help='stop each transport after this long, if sooner')
+    parser.add_argument('--warmup', type=int, default=200, help='unmeasured requests before each run')
+    parser.add_argument('--hash-workers', type=int, default=2)
+    parser.add_argument('--hash-method', default='pbkdf2:sha256:1000')
+    parser.add_argument('--output', help='also write the JSON results to this file')
+    parser.add_argument('--baseline', help='JSON output of an earlier run to compare p95 latencies against')
+    parser.add_argument('--threshold', type=float, default=0.2, help='p95 growth counted as a regression (0.2 = 20%%)')
+    args = parser.parse_args()
+
+    os.environ['HRMS_DATABASE'] = args.db or os.path.join(tempfile.mkdtemp(), 'hrms.db')
+    os.environ['HASH_WORKERS'] = str(args.hash_workers)
+    os.environ['PASSWORD_HASH_METHOD'] = args.hash_method
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import app as hrms
+
+    hrms.init_db()
+    dataset = seed_database(hrms, args)
+    if args.seed_only:
+        print(json.dumps({"database": os.environ['HRMS_DATABASE'], "dataset": dataset}, indent=2))
+        return
+
+    conn = hrms.get_db_connection()
+    try:
+        fixture = {
+            "employees": [row[0] for row in conn.execute("SELECT id FROM employees ORDER BY rowid")],
+            "months": [row[0] for row in conn.execute(
+                "SELECT DISTINCT substr(date, 1, 7) FROM attendance_records ORDER BY 1")] or [date.today().isoformat()[:7]],
+            "max_notification_id": conn.execute("SELECT COALESCE(MAX(id), 1) FROM notifications").fetchone()[0],
+        }
+    finally:
+        conn.close()
+
+    results, server = {}, None
+    for name in (['test', 'http'] if args.transport == 'both' else [args.transport]):
+        if name == 'test':
+            transport = TestClientTransport(hrms.app)
+        else:
+            url = args.url
+            if not url:
+                server, url = serve(hrms.app)
+            transport = HTTPTransport(url)
+        try:
+            results[name] = run_load(transport, fixture, args)
+        finally:
+            transport.close()
+    if server is not None:
+        server.shutdown()
+    hrms.password_hasher.shutdown()
+
+    report = {
+        "config": {key: value for key, value in sorted(vars(args).items()) if key not in ('output', 'baseline', 'db')},
+        "environment": {
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "dataset": dataset,
+        "transports": results,
+    }
+    if args.baseline:
+        with open(args.baseline) as f:
+            report["regressions"] = compare(results, json.load(f), args.threshold)
+    output = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + "\n")
+    print(output)
+    if report.get("regressions"):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""Yearly archives: read latency and database size before and after `flask archive-years`.
+
+Usage: python benchmarks/bench_archive_years.py [--employees 500] [--years 4] [--calls 200]
+Fills a fresh database with one attendance row per employee per working day
+(and a leave application per employee per month) over --years years ending in
+the current one, then times the views, bypassing the conditional-GET response cache.
+The views timed are a current-year and a full-history per-employee
+attendance read, the first admin attendance page, a one-month attendance report
+and a full-table scan. It then archives every closed year, compacts
+the database and times the same calls again. Also reported: the time taken
+by the archive and VACUUM steps and the size of the main file and of each archive.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+
+def timed(calls, run):
+    best = float('inf')
+    for _ in range(3):
+        started = time.perf_counter()
+        for i in range(calls):
+            run(i)
+        best = min(best, time.perf_counter() - started)
+    return round(best / calls * 1000, 3)
+
+
+def measure(hrms, ids, args):
+    this_year = date.today().year
+    month = date.today().replace(day=1)
+
+    def view(func, url, **kwargs):
+        # __wrapped__ skips conditional_get, so every call runs the queries.
+        with hrms.app.test_request_context(url):
+            response = func.__wrapped__(**kwargs) if hasattr(func, '__wrapped__') else func(**kwargs)
+            assert response[1] == 200, response
+            return response
+
+    def scan(_):
+        conn = hrms.get_db_connection()
+        try:
+            return conn.execute("SELECT COUNT(*), SUM(LENGTH(work_location)) FROM attendance_records").fetchone()
+        finally:
+            conn.close()
+
+    return {
+        "employee_attendance_current_year_ms": timed(args.calls, lambda i: view(
+            hrms.get_employee_attendance, f"/attendance/x?from={this_year}-01-01", employee_id=ids[i % len(ids)])),
+        "employee_attendance_all_years_ms": timed(args.calls, lambda i: view(
+            hrms.get_employee_attendance, "/attendance/x", employee_id=ids[i % len(ids)])),
+        "admin_attendance_first_page_ms": timed(args.calls, lambda i: view(
+            hrms.get_all_attendance_records, "/admin/attendance-records?limit=100")),
+        "attendance_report_one_month_ms": timed(max(1, args.calls // 5), lambda i: view(
+            hrms.get_attendance_report, f"/admin/reports/attendance?from={month.isoformat()}&engine=array")),
+        "attendance_full_scan_ms": timed(max(1, args.calls // 20), scan),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--employees', type=int, default=500)
+    parser.add_argument('--years', type=int, default=4, help="years of history, ending with the current one")
+    parser.add_argument('--calls', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    os.environ['HRMS_DATABASE'] = os.path.join(workdir, 'hrms.db')
+    os.environ['HASH_WORKERS'] = '0'
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import app as hrms
+    from archive import database_bytes
+
+    rng = random.Random(args.seed)
+    conn = hrms.get_db_connection()
+    hashed = hrms.password_hasher.hash('secret')
+    ids = [f"SSQ-{n}" for n in hrms.allocate_ids(conn, 'employee', args.employees)]
+    conn.executemany(hrms.INSERT_EMPLOYEE_SQL, [
+        hrms.employee_insert_params(employee_id, {"first_name": "Bench", "last_name": str(i), "email": f"bench{i}@example.com",
+                                                  "department": rng.choice(['Eng', 'Ops', 'Sales'])}, hashed)
+        for i, employee_id in enumerate(ids)])
+    first_day, today = date(date.today().year - args.years + 1, 1, 1), date.today()
+    day = first_day
+    while day < today:
+        if day.weekday() < 5:
+            conn.executemany(
+                "INSERT INTO attendance_records (employee_id, date, login_time, work_location, logout_time) VALUES (?, ?, ?, ?, ?)",
+                [(employee_id, day.isoformat(), f"{8 + rng.randrange(3):02d}:{rng.randrange(60):02d}:00",
+                  rng.choice(['Office', 'Office', 'Home']), f"{17 + rng.randrange(2):02d}:{rng.randrange(60):02d}:00")
+                 for employee_id in ids])
+        if day.day == 15:
+            conn.executemany(
+                '''INSERT INTO leave_applications (employee_id, leave_type, from_date, status, leave_days, submitted_at)
+                   VALUES (?, 'Casual Leave', ?, 'Approved', 1, ?)''',
+                [(employee_id, day.isoformat(), f"{day.isoformat()} 09:00:00") for employee_id in ids])
+        day += timedelta(days=1)
+    conn.commit()
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    rows = conn.execute("SELECT COUNT(*) FROM attendance_records").fetchone()[0]
+    before = {"main_bytes": database_bytes(conn), **measure(hrms, ids, args)}
+
+    started = time.perf_counter()
+    moved = {year: hrms.archives.archive_year(conn, year) for year in range(first_day.year, today.year)}
+    archive_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    hrms.archives.compact(conn)
+    vacuum_seconds = time.perf_counter() - started
+    after = {"main_bytes": database_bytes(conn), **measure(hrms, ids, args)}
+    report = hrms.archives.report(conn)
+    conn.close()
+
+    print(json.dumps({
+        "employees": args.employees, "years": args.years, "attendance_rows": rows,
+        "archive_seconds": round(archive_seconds, 2), "vacuum_seconds": round(vacuum_seconds, 2),
+        "moved": moved, "archive_bytes": {year: entry["bytes"] for year, entry in report["archives"].items()},
+        "before": before, "after": after,
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
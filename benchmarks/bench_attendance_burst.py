@@ -0,0 +1,109 @@
+"""Shift-start check-in burst: per-request commits vs. the attendance group commit.
+
+Usage: python benchmarks/bench_attendance_burst.py [--checkins 2000] [--concurrency 64]
+Each mode runs in a fresh process against a fresh database: group commit off
+(pooled connections, which sync like 'normal'), and on at the 'normal' and
+'full' durability levels. Every request thread posts check-ins through the
+Flask test client, then checks the same records out; reported are check-ins
+(and check-outs) per second, latency percentiles and the writer's batch
+statistics.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+MODES = [('false', 'normal'), ('true', 'normal'), ('true', 'full')]
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def summary(results, elapsed):
+    latencies = [ms for ms, ok in results if ok]
+    return {
+        "ok": len(latencies),
+        "per_sec": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+    }
+
+
+def run_mode(args):
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import app as hrms
+
+    local = threading.local()
+
+    def client():
+        if not hasattr(local, 'client'):
+            local.client = hrms.app.test_client()
+        return local.client
+
+    def timed(call):
+        started = time.perf_counter()
+        response = call(client())
+        return (time.perf_counter() - started) * 1000, response
+
+    def check_in(i):
+        ms, response = timed(lambda c: c.post('/attendance/login', json={
+            "employee_id": f"SSQ-{1001 + i}", "date": "2025-06-02", "work_location": "Office", "employee_name": "Bench"}))
+        return ms, response.status_code == 201, response.get_json()["record"]["record_id"] if response.status_code == 201 else None
+
+    def check_out(record_id):
+        ms, response = timed(lambda c: c.put(f'/attendance/logout/{record_id}'))
+        return ms, response.status_code == 200
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        started = time.perf_counter()
+        logins = list(pool.map(check_in, range(args.checkins)))
+        login_elapsed = time.perf_counter() - started
+        started = time.perf_counter()
+        logouts = list(pool.map(check_out, [record_id for _, _, record_id in logins if record_id]))
+        logout_elapsed = time.perf_counter() - started
+    stats = hrms.attendance_writer.stats()
+    hrms.attendance_writer.stop()
+    return {
+        "check_in": summary([(ms, ok) for ms, ok, _ in logins], login_elapsed),
+        "check_out": summary(logouts, logout_elapsed),
+        "writer": stats if hrms.ATTENDANCE_GROUP_COMMIT else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--checkins', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--batch-delay-ms', type=float, default=2.0)
+    parser.add_argument('--mode', help=argparse.SUPPRESS)  # "group_commit,durability": run one mode in this process
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(run_mode(args)))
+        return
+
+    results = {}
+    for group_commit, durability in MODES:
+        env = dict(os.environ, HRMS_DATABASE=os.path.join(tempfile.mkdtemp(), 'hrms.db'), HASH_WORKERS='0',
+                   SQL_METRICS='false', HRMS_DB_POOL_SIZE=str(args.concurrency),
+                   ATTENDANCE_GROUP_COMMIT=group_commit, ATTENDANCE_WRITE_DURABILITY=durability,
+                   ATTENDANCE_BATCH_DELAY_MS=str(args.batch_delay_ms))
+        output = subprocess.run([sys.executable, __file__, '--mode', f"{group_commit},{durability}",
+                                 '--checkins', str(args.checkins), '--concurrency', str(args.concurrency)],
+                                env=env, check=True, capture_output=True, text=True).stdout
+        name = f"{'group_commit' if group_commit == 'true' else 'per_request'}_{durability}"
+        results[name] = json.loads(output.strip().splitlines()[-1])
+    print(json.dumps({"checkins": args.checkins, "concurrency": args.concurrency,
+                      "batch_delay_ms": args.batch_delay_ms, "results": results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""Attendance report over millions of synthetic rows: column load time and each summary engine.
+
+Usage: python benchmarks/bench_attendance_report.py [--rows 2000000] [--employees 5000] [--days 365]
+The numpy engine is skipped when NumPy is not installed.
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import reports
+
+LOCATIONS = ['Office', 'Office', 'Office', 'Client', 'Remote', 'Business', 'Home']
+DEPARTMENTS = ['Engineering', 'Operations', 'Sales', 'Finance', 'HR']
+
+
+def seed(conn, rows, employees, days, start):
+    conn.execute('''CREATE TABLE employees (id TEXT PRIMARY KEY, first_name TEXT NOT NULL, last_name TEXT NOT NULL,
+                    email TEXT UNIQUE NOT NULL, password TEXT NOT NULL, department TEXT)''')
+    conn.execute('''CREATE TABLE attendance_records (record_id TEXT PRIMARY KEY, employee_id TEXT NOT NULL, date TEXT NOT NULL,
+                    login_time TEXT NOT NULL, work_location TEXT, logout_time TEXT)''')
+    conn.execute("CREATE TABLE holidays (date TEXT PRIMARY KEY, name TEXT NOT NULL)")
+    conn.executemany("INSERT INTO employees VALUES (?, 'Bench', ?, ?, 'x', ?)", (
+        (f"SSQ-{1001 + i}", str(i), f"bench{i}@example.com", DEPARTMENTS[i % len(DEPARTMENTS)]) for i in range(employees)))
+    rng = random.Random(42)
+    dates = [(start + timedelta(days=d)).isoformat() for d in range(days)]
+
+    def attendance():
+        for i in range(rows):
+            login = rng.randint(8 * 3600, 11 * 3600)
+            logout = None if rng.random() < 0.03 else login + rng.randint(3 * 3600, 10 * 3600)
+            yield (f"r{i}", f"SSQ-{1001 + rng.randrange(employees)}", rng.choice(dates),
+                   '%02d:%02d:%02d' % (login // 3600, login // 60 % 60, login % 60), rng.choice(LOCATIONS),
+                   None if logout is None else '%02d:%02d:%02d' % (logout // 3600 % 24, logout // 60 % 60, logout % 60))
+    conn.executemany("INSERT INTO attendance_records VALUES (?, ?, ?, ?, ?, ?)", attendance())
+    # The indexes migrations 2 and 10 create on the real table.
+    conn.execute("CREATE INDEX idx_attendance_date_login_record ON attendance_records (date, login_time, record_id)")
+    conn.execute("CREATE INDEX idx_attendance_date_report ON attendance_records (date, employee_id, work_location, login_time, logout_time)")
+    conn.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=2000000)
+    parser.add_argument('--employees', type=int, default=5000)
+    parser.add_argument('--days', type=int, default=365)
+    args = parser.parse_args()
+
+    start = date(2025, 1, 1)
+    end = start + timedelta(days=args.days - 1)
+    conn = sqlite3.connect(os.path.join(tempfile.mkdtemp(), 'hrms.db'))
+    started = time.perf_counter()
+    seed(conn, args.rows, args.employees, args.days, start)
+    result = {"rows": args.rows, "employees": args.employees, "seed_seconds": round(time.perf_counter() - started, 2)}
+
+    started = time.perf_counter()
+    columns = reports.AttendanceColumns.load(conn, start, end)
+    result["load_seconds"] = round(time.perf_counter() - started, 2)
+    result["load_rows_per_sec"] = round(len(columns) / (time.perf_counter() - started))
+
+    summaries = {}
+    for engine in ('array', 'numpy'):
+        if engine == 'numpy' and reports.np is None:
+            continue
+        started = time.perf_counter()
+        report = reports.build_attendance_report(conn, start, end, engine=engine, today=end + timedelta(days=1), columns=columns)
+        result[f"{engine}_summary_seconds"] = round(time.perf_counter() - started, 2)
+        summaries[engine] = report
+    if len(summaries) == 2:
+        result["engines_agree"] = summaries['array']['employees'] == summaries['numpy']['employees'] \
+            and summaries['array']['daily'] == summaries['numpy']['daily']
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""Bulk onboarding: one /admin/employees/import call vs. one /register call per employee.
+
+Usage: python benchmarks/bench_bulk_import.py [--employees 10000] [--hash-workers 4] [--compare 200]
+The default hash method is a cheap pbkdf2 so the run measures id allocation and
+inserts; pass --hash-method scrypt to include production-cost hashing.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--employees', type=int, default=10000)
+    parser.add_argument('--hash-workers', type=int, default=4)
+    parser.add_argument('--hash-method', default='pbkdf2:sha256:1000')
+    parser.add_argument('--compare', type=int, default=200, help='employees registered one by one for the baseline')
+    args = parser.parse_args()
+
+    os.environ['HRMS_DATABASE'] = os.path.join(tempfile.mkdtemp(), 'hrms.db')
+    os.environ['HASH_WORKERS'] = str(args.hash_workers)
+    os.environ['PASSWORD_HASH_METHOD'] = args.hash_method
+    os.environ['BULK_IMPORT_MAX_ROWS'] = str(max(args.employees, 1))
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import app as hrms
+
+    hrms.init_db()
+    client = hrms.app.test_client()
+
+    def employee(prefix, i):
+        return {"first_name": "Bench", "last_name": str(i), "email": f"{prefix}{i}@example.com",
+                "password": f"start-{i}", "department": "Engineering", "join_date": "2025-07-01"}
+
+    started = time.perf_counter()
+    for i in range(args.compare):
+        assert client.post('/register', json=employee('single', i)).status_code == 201
+    single_elapsed = time.perf_counter() - started
+
+    rows = [employee('bulk', i) for i in range(args.employees)]
+    started = time.perf_counter()
+    response = client.post('/admin/employees/import', json=rows)
+    bulk_elapsed = time.perf_counter() - started
+    assert response.status_code == 201, response.get_json()
+
+    print(json.dumps({
+        "hash_method": args.hash_method,
+        "hash_workers": args.hash_workers,
+        "register": {
+            "employees": args.compare,
+            "seconds": round(single_elapsed, 2),
+            "employees_per_sec": round(args.compare / single_elapsed, 1) if args.compare else None,
+        },
+        "bulk_import": {
+            "employees": response.get_json()['imported'],
+            "seconds": round(bulk_elapsed, 2),
+            "employees_per_sec": round(args.employees / bulk_elapsed, 1),
+        },
+        "hasher": hrms.password_hasher.stats(),
+    }, indent=2))
+    hrms.password_hasher.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""Concurrent read/write throughput: per-request connections vs. the WAL pool.
+
+Usage: python benchmarks/bench_db_pool.py [--seconds 5] [--writers 4] [--readers 8] [--rows 20000]
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from db import ConnectionPool  # noqa: E402
+
+SCHEMA = '''
+    CREATE TABLE employees (id TEXT PRIMARY KEY, first_name TEXT NOT NULL, last_name TEXT NOT NULL);
+    CREATE TABLE attendance_records (
+        record_id TEXT PRIMARY KEY, employee_id TEXT NOT NULL, date TEXT NOT NULL,
+        login_time TEXT NOT NULL, work_location TEXT, logout_time TEXT
+    );
+'''
+READ_SQL = '''
+    SELECT ar.date, ar.login_time, ar.work_location, ar.logout_time, e.first_name, e.last_name
+    FROM attendance_records ar JOIN employees e ON ar.employee_id = e.id
+    ORDER BY ar.date DESC, ar.login_time DESC LIMIT 100
+'''
+WRITE_SQL = 'INSERT INTO attendance_records (record_id, employee_id, date, login_time, work_location) VALUES (?, ?, ?, ?, ?)'
+
+
+def seed(path, rows):
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    conn.executemany('INSERT INTO employees VALUES (?, ?, ?)', [(f"SSQ-{1001 + i}", "First", f"Last{i}") for i in range(200)])
+    conn.executemany(WRITE_SQL, [
+        (str(uuid.uuid4()), f"SSQ-{1001 + i % 200}", f"2025-{1 + i % 12:02d}-{1 + i % 28:02d}", "09:00:00", "Office")
+        for i in range(rows)
+    ])
+    conn.commit()
+    conn.close()
+
+
+def legacy_connect(path):
+    def connect():
+        conn = sqlite3.connect(path)
+        conn.row_factory = sqlite3.Row
+        return conn
+    return connect
+
+
+def run(connect, seconds, writers, readers):
+    stop = threading.Event()
+    counts = {"reads": 0, "writes": 0, "errors": 0}
+    lock = threading.Lock()
+
+    def worker(kind):
+        done = errors = 0
+        while not stop.is_set():
+            conn = connect()
+            try:
+                if kind == "writes":
+                    conn.execute(WRITE_SQL, (str(uuid.uuid4()), "SSQ-1001", "2025-06-01", time.strftime('%H:%M:%S'), "Office"))
+                    conn.commit()
+                else:
+                    conn.execute(READ_SQL).fetchall()
+                done += 1
+            except sqlite3.OperationalError:
+                errors += 1
+            finally:
+                conn.close()
+        with lock:
+            counts[kind] += done
+            counts["errors"] += errors
+
+    threads = [threading.Thread(target=worker, args=("writes",)) for _ in range(writers)]
+    threads += [threading.Thread(target=worker, args=("reads",)) for _ in range(readers)]
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    return {
+        "reads_per_sec": round(counts["reads"] / seconds, 1),
+        "writes_per_sec": round(counts["writes"] / seconds, 1),
+        "errors": counts["errors"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--rows', type=int, default=20000)
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        before = os.path.join(tmp, 'before.db')
+        seed(before, args.rows)
+        results["before"] = run(legacy_connect(before), args.seconds, args.writers, args.readers)
+
+        after = os.path.join(tmp, 'after.db')
+        seed(after, args.rows)
+        pool = ConnectionPool(after, max_size=args.writers + args.readers)
+        results["after"] = run(pool.acquire, args.seconds, args.writers, args.readers)
+        results["pool"] = pool.stats()
+        pool.close_all()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""Employee projections: SELECT * vs. the per-use-case column lists, per call.
+
+Usage: python benchmarks/bench_employee_projections.py [--employees 5000] [--calls 20000]
+Reports time, bytes of column data and Python memory held by the fetched row per call for the
+login check, the profile read and the profile update (update + SELECT * vs.
+UPDATE ... RETURNING), on fully populated employee rows.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+
+def row_bytes(row):
+    return sum(len(value) if isinstance(value, (str, bytes)) else 8 for value in row if value is not None)
+
+
+def measure(calls, run, rounds=3):
+    """run(i) returns the row a handler would build its response from."""
+    best = float('inf')
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for i in range(calls):
+            run(i)
+        best = min(best, time.perf_counter() - started)
+    kept = 500
+    tracemalloc.start()
+    rows = [run(i) for i in range(kept)]
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return {
+        "us_per_call": round(best / calls * 1e6, 2),
+        "row_bytes": round(sum(map(row_bytes, rows)) / kept),
+        "allocated_bytes_per_row": round(retained / kept),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--employees', type=int, default=5000)
+    parser.add_argument('--calls', type=int, default=20000)
+    args = parser.parse_args()
+
+    os.environ['HRMS_DATABASE'] = os.path.join(tempfile.mkdtemp(), 'hrms.db')
+    os.environ['HASH_WORKERS'] = '0'
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import app as hrms
+
+    conn = hrms.get_db_connection()
+    hashed = hrms.password_hasher.hash('secret')
+    rng = random.Random(7)
+    ids = [f"SSQ-{n}" for n in hrms.allocate_ids(conn, 'employee', args.employees)]
+    filler = {field: f"{field.replace('_', ' ').title()} {rng.randrange(10**8)} " * 2 for field in hrms.EMPLOYEE_INSERT_FIELDS}
+    conn.executemany(hrms.INSERT_EMPLOYEE_SQL, [
+        hrms.employee_insert_params(employee_id, dict(filler, first_name="Bench", last_name=str(i), email=f"bench{i}@example.com"), hashed)
+        for i, employee_id in enumerate(ids)])
+    conn.commit()
+
+    def pick(i):
+        return (i * 7919) % args.employees
+
+    def fetch(sql, key, as_profile=False):
+        def run(i):
+            row = conn.execute(sql, (key(pick(i)),)).fetchone()
+            if as_profile:
+                # What the handler serializes: the whole row without the password hash.
+                row = dict(row)
+                row.pop('password', None)
+                return row.values()
+            return row
+        return run
+
+    def update(returning):
+        def run(i):
+            employee_id = ids[pick(i)]
+            if returning:
+                row = dict(conn.execute(f"UPDATE employees SET branch = ? WHERE id = ? RETURNING {hrms.EMPLOYEE_PROFILE_COLUMNS}",
+                                        (f"Branch {i}", employee_id)).fetchall()[0])
+            else:
+                conn.execute("UPDATE employees SET branch = ? WHERE id = ?", (f"Branch {i}", employee_id))
+                row = dict(conn.execute("SELECT * FROM employees WHERE id = ?", (employee_id,)).fetchone())
+                row.pop('password', None)
+            conn.commit()
+            return row.values()
+        return run
+
+    email = lambda n: f"bench{n}@example.com"
+    employee_id = lambda n: ids[n]
+    results = {}
+    for name, old, new in [
+        ("login_check", fetch("SELECT * FROM employees WHERE email = ?", email), fetch(hrms.EMPLOYEE_LOGIN_SQL, email)),
+        ("profile_read", fetch("SELECT * FROM employees WHERE id = ?", employee_id, True),
+         fetch(hrms.EMPLOYEE_PROFILE_SQL, employee_id, True)),
+        ("profile_update", update(False), update(True)),
+    ]:
+        calls = args.calls if name != "profile_update" else max(1, args.calls // 10)
+        results[name] = {"select_star": measure(calls, old), "projection": measure(calls, new)}
+    conn.close()
+    print(json.dumps({"employees": args.employees, "calls": args.calls, "results": results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
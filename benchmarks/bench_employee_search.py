@@ -0,0 +1,151 @@
+"""Employee directory search: /admin/employees/search on the FTS5 index vs. a LIKE scan of employees.
+
+Usage: python benchmarks/bench_employee_search.py [--employees 50000] [--queries 200]
+Registers --employees employees with generated names, departments, roles and
+reporting managers (indexed by the insert triggers as they go), then times the
+search view, bypassing the conditional-GET response cache, for --queries
+different inputs of each kind a typeahead produces: one, two and three letters
+of a name, a first name plus the start of a last name, the start of an email,
+a department, a manager's email and a word nobody has. Reports the median,
+p95 and worst latency per kind, and whether it was ranked. Also reported: the LIKE
+query the endpoint would otherwise need, the cost of the index on inserts and
+profile updates, the full rebuild time and the size of the index.
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+SYLLABLES = ['an', 'ar', 'be', 'da', 'el', 'ha', 'ja', 'ka', 'li', 'ma', 'na', 'ni', 'ol', 'pa', 'ra',
+             'ri', 'sa', 'sh', 'ta', 'th', 'va', 'vi', 'ya', 'jo', 'de', 'mo', 'ku', 'pr', 'ne', 'su']
+DEPARTMENTS = ['Engineering', 'Operations', 'Sales', 'Finance', 'Human Resources', 'Support',
+               'Marketing', 'Legal', 'Procurement', 'Facilities', 'Research', 'Quality']
+ROLES = ['Engineer', 'Senior Engineer', 'Manager', 'Analyst', 'Lead', 'Intern', 'Director',
+         'Associate', 'Consultant', 'Specialist']
+LIKE_SEARCH_SQL = '''SELECT id, first_name, last_name, email, department, employee_role
+    FROM employees
+    WHERE first_name LIKE :prefix OR last_name LIKE :prefix OR email LIKE :prefix OR department LIKE :prefix
+       OR employee_role LIKE :prefix OR reporting_manager1 LIKE :prefix OR reporting_manager1_mail LIKE :prefix
+    ORDER BY last_name, first_name LIMIT 21'''
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return {"median_ms": round(statistics.median(samples), 3),
+            "p95_ms": round(samples[int(len(samples) * 0.95) - 1], 3), "max_ms": round(samples[-1], 3)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--employees', type=int, default=50000)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    os.environ['HRMS_DATABASE'] = os.path.join(tempfile.mkdtemp(), 'hrms.db')
+    os.environ['HASH_WORKERS'] = '0'
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import app as hrms
+
+    rng = random.Random(args.seed)
+    word = lambda: ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+    first_names = [word() for _ in range(max(50, args.employees // 80))]
+    last_names = [word() for _ in range(max(100, args.employees // 15))]
+    people = []
+    for i in range(args.employees):
+        first, last = rng.choice(first_names), rng.choice(last_names)
+        people.append({"first_name": first, "last_name": last, "email": f"{first.lower()}.{last.lower()}{i}@example.com",
+                       "department": rng.choice(DEPARTMENTS), "employee_role": rng.choice(ROLES)})
+    for person in people:
+        # Everyone reports to someone in the first 5% (the managers).
+        manager = people[rng.randrange(max(1, args.employees // 20))]
+        person["reporting_manager1"] = f"{manager['first_name']} {manager['last_name']}"
+        person["reporting_manager1_mail"] = manager["email"]
+
+    conn = hrms.get_db_connection()
+    hashed = hrms.password_hasher.hash('secret')
+    ids = [f"SSQ-{n}" for n in hrms.allocate_ids(conn, 'employee', args.employees)]
+    params = [hrms.employee_insert_params(employee_id, person, hashed) for employee_id, person in zip(ids, people)]
+    started = time.perf_counter()
+    conn.executemany(hrms.INSERT_EMPLOYEE_SQL, params)
+    conn.commit()
+    insert_indexed_seconds = time.perf_counter() - started
+    conn.execute("DELETE FROM employees")
+    conn.execute("DROP TRIGGER trg_employees_search_insert")
+    started = time.perf_counter()
+    conn.executemany(hrms.INSERT_EMPLOYEE_SQL, params)
+    conn.commit()
+    insert_plain_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    hrms.rebuild_employee_search(conn)
+    conn.commit()
+    rebuild_seconds = time.perf_counter() - started
+    conn.execute("ANALYZE")
+    conn.commit()
+    index_bytes = conn.execute(
+        "SELECT SUM(pgsize) FROM dbstat WHERE name LIKE 'employee_search%' AND aggregate = 0").fetchone()[0]
+
+    def search(q):
+        with hrms.app.test_request_context('/admin/employees/search', query_string={"q": q}):
+            started = time.perf_counter()
+            response, status = hrms.search_employees.__wrapped__()
+            elapsed = (time.perf_counter() - started) * 1000
+            assert status == 200, response.get_json()
+            return elapsed, response.get_json()
+
+    picks = [rng.choice(people) for _ in range(args.queries)]
+    kinds = {
+        "one_letter": [p["first_name"][:1] for p in picks],
+        "two_letters": [p["last_name"][:2] for p in picks],
+        "three_letters": [p["last_name"][:3] for p in picks],
+        "first_name_and_last_prefix": [f"{p['first_name']} {p['last_name'][:2]}" for p in picks],
+        "email_prefix": [p["email"][:len(p["first_name"]) + 4] for p in picks],
+        "department": [rng.choice(DEPARTMENTS) for _ in picks],
+        "manager_email": [p["reporting_manager1_mail"] for p in picks],
+        "no_match": [f"zzq{n}" for n in range(args.queries)],
+    }
+    results = {}
+    for kind, inputs in kinds.items():
+        search(inputs[0])
+        samples, ranked, hits = [], 0, 0
+        for q in inputs:
+            elapsed, body = search(q)
+            samples.append(elapsed)
+            ranked += body["ranked"]
+            hits += len(body["employees"])
+        results[kind] = {**percentiles(samples), "ranked_share": round(ranked / len(inputs), 2),
+                         "avg_results": round(hits / len(inputs), 1)}
+
+    like = {}
+    for kind in ("three_letters", "no_match"):
+        samples = []
+        for q in kinds[kind][:max(1, args.queries // 10)]:
+            started = time.perf_counter()
+            conn.execute(LIKE_SEARCH_SQL, {"prefix": f"{q}%"}).fetchall()
+            samples.append((time.perf_counter() - started) * 1000)
+        like[kind] = percentiles(samples)
+
+    updates = []
+    for employee_id in rng.sample(ids, min(200, len(ids))):
+        started = time.perf_counter()
+        conn.execute("UPDATE employees SET department = ?, employee_role = ? WHERE id = ?",
+                     (rng.choice(DEPARTMENTS), rng.choice(ROLES), employee_id))
+        conn.commit()
+        updates.append((time.perf_counter() - started) * 1000)
+    conn.close()
+
+    print(json.dumps({
+        "employees": args.employees, "queries_per_kind": args.queries,
+        "insert_seconds": {"indexed": round(insert_indexed_seconds, 2), "without_index": round(insert_plain_seconds, 2)},
+        "rebuild_seconds": round(rebuild_seconds, 2), "index_bytes": index_bytes,
+        "profile_update": percentiles(updates),
+        "search": results, "like_scan": like,
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
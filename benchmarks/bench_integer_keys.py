@@ -0,0 +1,125 @@
+"""Attendance and notification inserts: uuid4 TEXT keys vs. INTEGER keys.
+
+Usage: python benchmarks/bench_integer_keys.py [--rows 500000] [--employees 2000] [--batch 100]
+Builds the same rows into three schemas: the old uuid4 primary keys, the
+INTEGER PRIMARY KEY AUTOINCREMENT keys of migration 14, and the same with an
+integer employee reference instead of 'SSQ-1001' strings. Reports insert
+throughput over the whole load and over its last tenth (when the indexes no
+longer fit in cache and random keys hurt most), the database file size after a
+checkpoint, and the size of every table and index from dbstat.
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import time
+import uuid
+
+LOCATIONS = ['Office', 'Office', 'Office', 'Home', 'Client Site']
+
+SCHEMAS = {
+    "uuid_text": [
+        '''CREATE TABLE attendance_records (record_id TEXT PRIMARY KEY, employee_id TEXT NOT NULL, date TEXT NOT NULL,
+           login_time TEXT NOT NULL, work_location TEXT, logout_time TEXT)''',
+        "CREATE INDEX idx_attendance_date_login_record ON attendance_records (date, login_time, record_id)",
+        "CREATE INDEX idx_attendance_employee_date_login_record ON attendance_records (employee_id, date, login_time, record_id)",
+        # Notifications already had an integer key (migration 6); the uuid column was still indexed.
+        '''CREATE TABLE notifications (id INTEGER PRIMARY KEY AUTOINCREMENT, notification_id TEXT UNIQUE NOT NULL,
+           employee_id TEXT NOT NULL, message TEXT NOT NULL, is_read INTEGER NOT NULL DEFAULT 0,
+           timestamp DATETIME DEFAULT CURRENT_TIMESTAMP)''',
+        "CREATE INDEX idx_notifications_employee_id ON notifications (employee_id, id)",
+    ],
+    "integer": [
+        '''CREATE TABLE attendance_records (id INTEGER PRIMARY KEY AUTOINCREMENT, employee_id TEXT NOT NULL,
+           date TEXT NOT NULL, login_time TEXT NOT NULL, work_location TEXT, logout_time TEXT)''',
+        "CREATE INDEX idx_attendance_date_login ON attendance_records (date, login_time)",
+        "CREATE INDEX idx_attendance_employee_date_login ON attendance_records (employee_id, date, login_time)",
+        '''CREATE TABLE notifications (id INTEGER PRIMARY KEY AUTOINCREMENT, employee_id TEXT NOT NULL,
+           message TEXT NOT NULL, is_read INTEGER NOT NULL DEFAULT 0, timestamp DATETIME DEFAULT CURRENT_TIMESTAMP)''',
+        "CREATE INDEX idx_notifications_employee_id ON notifications (employee_id, id)",
+    ],
+}
+# Same as "integer", with employee_id INTEGER (what an employees.rowid reference would cost).
+SCHEMAS["integer_employee_ref"] = [sql.replace("employee_id TEXT", "employee_id INTEGER") for sql in SCHEMAS["integer"]]
+
+
+def rows_for(args, integer_employee):
+    rng = random.Random(args.seed)
+    for n in range(args.rows):
+        employee = rng.randrange(args.employees)
+        day = n * 250 // args.rows
+        yield ((1001 + employee) if integer_employee else f"SSQ-{1001 + employee}",
+               f"2025-{1 + day // 21 % 12:02d}-{1 + day % 21:02d}",
+               f"{8 + rng.randrange(3):02d}:{rng.randrange(60):02d}:{rng.randrange(60):02d}",
+               rng.choice(LOCATIONS))
+
+
+def load(path, name, args):
+    conn = sqlite3.connect(path, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA cache_size=-{args.cache_mb * 1024}")
+    for sql in SCHEMAS[name]:
+        conn.execute(sql)
+    keyed = name == "uuid_text"
+    attendance_sql = ("INSERT INTO attendance_records (record_id, employee_id, date, login_time, work_location) VALUES (?, ?, ?, ?, ?)"
+                      if keyed else
+                      "INSERT INTO attendance_records (employee_id, date, login_time, work_location) VALUES (?, ?, ?, ?)")
+    notification_sql = ("INSERT INTO notifications (notification_id, employee_id, message) VALUES (?, ?, ?)"
+                        if keyed else "INSERT INTO notifications (employee_id, message) VALUES (?, ?)")
+    tail_from = args.rows - args.rows // 10
+    started = time.perf_counter()
+    tail_started = started
+    pending = 0
+    conn.execute("BEGIN")
+    # Each row is what /attendance/login writes, plus the notification create_notification would add.
+    for n, (employee_id, day, login_time, location) in enumerate(rows_for(args, name == "integer_employee_ref")):
+        if n == tail_from:
+            conn.execute("COMMIT")
+            tail_started = time.perf_counter()
+            conn.execute("BEGIN")
+            pending = 0
+        if keyed:
+            conn.execute(attendance_sql, (str(uuid.uuid4()), employee_id, day, login_time, location))
+            conn.execute(notification_sql, (str(uuid.uuid4()), employee_id, f"Login recorded for {day}"))
+        else:
+            conn.execute(attendance_sql, (employee_id, day, login_time, location))
+            conn.execute(notification_sql, (employee_id, f"Login recorded for {day}"))
+        pending += 1
+        if pending == args.batch:
+            conn.execute("COMMIT")
+            conn.execute("BEGIN")
+            pending = 0
+    conn.execute("COMMIT")
+    finished = time.perf_counter()
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    sizes = {row[0]: row[1] for row in conn.execute(
+        "SELECT name, SUM(pgsize) FROM dbstat WHERE name NOT LIKE 'sqlite_%' OR name LIKE 'sqlite_autoindex_%' GROUP BY name ORDER BY name")}
+    conn.close()
+    return {
+        "rows_per_second": round(args.rows / (finished - started)),
+        "last_tenth_rows_per_second": round((args.rows - tail_from) / (finished - tail_started)),
+        "file_bytes": os.path.getsize(path),
+        "bytes_by_btree": sizes,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=500000, help="attendance rows (and as many notifications)")
+    parser.add_argument('--employees', type=int, default=2000)
+    parser.add_argument('--batch', type=int, default=100, help="rows per transaction")
+    parser.add_argument('--cache-mb', type=int, default=8, help="SQLite page cache per connection")
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    results = {name: load(os.path.join(workdir, f"{name}.db"), name, args) for name in SCHEMAS}
+    print(json.dumps({"rows": args.rows, "employees": args.employees, "batch": args.batch,
+                      "cache_mb": args.cache_mb, "results": results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""Shift-start login burst: latency percentiles with hashing in the worker pool.
+
+Usage: python benchmarks/bench_login_burst.py [--logins 200] [--concurrency 50] [--hash-workers 4]
+Run with --hash-workers 0 to hash inline on the request threads for comparison.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--logins', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--employees', type=int, default=20)
+    parser.add_argument('--hash-workers', type=int, default=4)
+    args = parser.parse_args()
+
+    os.environ['HRMS_DATABASE'] = os.path.join(tempfile.mkdtemp(), 'hrms.db')
+    os.environ['HASH_WORKERS'] = str(args.hash_workers)
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import app as hrms
+
+    client = hrms.app.test_client()
+    emails = []
+    for i in range(args.employees):
+        email = f"bench{i}@example.com"
+        new_id = client.post('/register', json={"first_name": "Bench", "last_name": str(i), "email": email, "password": "start"}).get_json()['id']
+        client.put('/force-change-password', json={"user_id": new_id, "new_password": "secret"})
+        emails.append(email)
+
+    def login(i):
+        started = time.perf_counter()
+        response = client.post('/login', json={"username": emails[i % len(emails)], "password": "secret", "user_type": "employee"})
+        return (time.perf_counter() - started) * 1000, response.status_code
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(login, range(args.logins)))
+    elapsed = time.perf_counter() - started
+    latencies = [ms for ms, status in results if status == 200]
+    print(json.dumps({
+        "hash_workers": args.hash_workers,
+        "logins": args.logins,
+        "ok": len(latencies),
+        "logins_per_sec": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50), 1),
+        "p95_ms": round(percentile(latencies, 95), 1),
+        "p99_ms": round(percentile(latencies, 99), 1),
+        "hasher": hrms.password_hasher.stats(),
+    }, indent=2))
+    hrms.password_hasher.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+"""Manager-scoped pending queues: reporting_closure vs. walking the manager emails per request.
+
+Usage: python benchmarks/bench_org_chart.py [--employees 5000] [--fanout 6] [--pending 3000] [--calls 200]
+Builds a reporting tree of --employees people (each manager has --fanout reports;
+--fanout 1 gives a single chain, the deepest possible hierarchy) with --pending
+pending leave applications spread over everyone. Reports the full
+rebuild time, the incremental refresh times for a new hire and for moving a
+manager together with their subtree, and queue latency for the top manager, a
+mid-level manager and a team lead. Queue latency is measured with the closure
+table and with a recursive CTE over reporting_manager1_mail (what a query
+needs without the index), each before and after ANALYZE.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+RECURSIVE_TEAM_LEAVE_SQL = '''
+    WITH RECURSIVE team(id) AS (
+        SELECT r.id FROM employees r JOIN employees m ON r.reporting_manager1_mail = m.email WHERE m.id = ?
+        UNION SELECT r.id FROM employees r JOIN employees m ON r.reporting_manager1_mail = m.email JOIN team t ON m.id = t.id
+    )
+    SELECT l.id, l.employee_id, l.leave_type, l.from_date, l.submitted_at, e.first_name, e.last_name
+    FROM team JOIN leave_applications l ON l.employee_id = team.id AND l.status = 'Pending'
+    JOIN employees e ON e.id = l.employee_id ORDER BY l.submitted_at
+'''
+
+
+def timed(calls, run):
+    best = float('inf')
+    for _ in range(3):
+        started = time.perf_counter()
+        for _ in range(calls):
+            result = run()
+        best = min(best, time.perf_counter() - started)
+    return round(best / calls * 1000, 3), len(result)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--employees', type=int, default=5000)
+    parser.add_argument('--fanout', type=int, default=6)
+    parser.add_argument('--pending', type=int, default=3000)
+    parser.add_argument('--calls', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    os.environ['HRMS_DATABASE'] = os.path.join(tempfile.mkdtemp(), 'hrms.db')
+    os.environ['HASH_WORKERS'] = '0'
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import app as hrms
+
+    rng = random.Random(args.seed)
+    conn = hrms.get_db_connection()
+    hashed = hrms.password_hasher.hash('secret')
+    ids = [f"SSQ-{n}" for n in hrms.allocate_ids(conn, 'employee', args.employees)]
+    email = lambda i: f"bench{i}@example.com"
+    # Breadth-first numbering: employee i reports to (i - 1) // fanout.
+    conn.executemany(hrms.INSERT_EMPLOYEE_SQL, [
+        hrms.employee_insert_params(employee_id, {
+            "first_name": "Bench", "last_name": str(i), "email": email(i),
+            "reporting_manager1_mail": email((i - 1) // args.fanout) if i else None}, hashed)
+        for i, employee_id in enumerate(ids)])
+    conn.executemany(
+        "INSERT INTO leave_applications (employee_id, leave_type, from_date, status, leave_days, submitted_at) VALUES (?, 'Casual Leave', '2026-01-05', ?, 1, ?)",
+        [(rng.choice(ids), 'Pending' if n < args.pending else 'Approved', f"2025-12-{1 + n % 28:02d} {n % 24:02d}:00:00")
+         for n in range(args.pending * 3)])
+
+    started = time.perf_counter()
+    built = hrms.rebuild_org_chart(conn)
+    rebuild_seconds = time.perf_counter() - started
+    conn.commit()
+
+    def subtree_size(employee_id):
+        return conn.execute("SELECT COUNT(*) FROM reporting_closure WHERE ancestor_id = ?", (employee_id,)).fetchone()[0]
+
+    # Managers at three levels: the top, the deepest with >= 1% of the company below, and a team lead.
+    by_size = sorted(((subtree_size(employee_id), employee_id) for employee_id in ids[:args.employees // max(args.fanout, 2)]), reverse=True)
+    mid = next(employee_id for size, employee_id in reversed(by_size) if size >= args.employees // 100)
+    lead = next(employee_id for size, employee_id in reversed(by_size) if size >= 1)
+    managers = {"top": ids[0], "mid": mid, "lead": lead}
+
+    def queues():
+        results = {}
+        for level, manager_id in managers.items():
+            calls = args.calls if level != "top" else max(1, args.calls // 10)
+            closure_ms, rows = timed(calls, lambda: conn.execute(hrms.TEAM_PENDING_LEAVE_REQUESTS_SQL, (manager_id, 2**31)).fetchall())
+            recursive_ms, recursive_rows = timed(max(1, args.calls // 20), lambda: conn.execute(RECURSIVE_TEAM_LEAVE_SQL, (manager_id,)).fetchall())
+            assert rows == recursive_rows, (rows, recursive_rows)
+            results[level] = {"subtree": subtree_size(manager_id), "pending": rows,
+                              "closure_ms": closure_ms, "recursive_cte_ms": recursive_ms}
+        return results
+
+    before_analyze = queues()
+    conn.execute("ANALYZE")
+    after_analyze = queues()
+
+    started = time.perf_counter()
+    new_id = f"SSQ-{hrms.allocate_ids(conn, 'employee')[0]}"
+    conn.execute(hrms.INSERT_EMPLOYEE_SQL, hrms.employee_insert_params(
+        new_id, {"first_name": "New", "last_name": "Hire", "email": "new@example.com", "reporting_manager1_mail": email(args.employees - 1)}, hashed))
+    hrms.refresh_reporting_lines(conn, [new_id], registered=True)
+    conn.commit()
+    new_hire_ms = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    conn.execute("UPDATE employees SET reporting_manager1_mail = ? WHERE id = ?", (email(0), mid))
+    moved_rows = hrms.refresh_reporting_lines(conn, [mid])
+    conn.commit()
+    move_ms = (time.perf_counter() - started) * 1000
+    conn.close()
+
+    print(json.dumps({
+        "employees": args.employees, "fanout": args.fanout, "pending": args.pending, "org_chart": built,
+        "max_depth": hrms.get_db_connection().execute("SELECT MAX(depth) FROM reporting_closure").fetchone()[0],
+        "rebuild_seconds": round(rebuild_seconds, 3),
+        "refresh_new_hire_ms": round(new_hire_ms, 2),
+        "refresh_move_manager_ms": round(move_ms, 2), "move_manager_closure_rows": moved_rows,
+        "queues": {"before_analyze": before_analyze, "after_analyze": after_analyze},
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
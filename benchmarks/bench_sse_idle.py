@@ -0,0 +1,185 @@
+"""Hold idle SSE connections against the production server config, then time fan-out of one event.
+
+Usage: python benchmarks/bench_sse_idle.py [--connections 200] [--config gunicorn.conf.py]
+Starts `gunicorn -c gunicorn.conf.py` (WEB_WORKERS, WEB_THREADS etc. are read
+from the environment as in production) on a free local port against a
+throwaway database and opens --connections streams on /admin/events. An
+employee registration then publishes one admin event; its arrival is timed
+from the moment the registration was sent, so fan-out includes the request
+itself. Streams past SSE_MAX_STREAMS are refused with a 503; streams the
+server never answers are reported as not connected, and a registration that
+cannot get a thread times out.
+"""
+import argparse
+import http.client
+import importlib.util
+import json
+import os
+import resource
+import selectors
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def rss_mb(pid):
+    # Master plus workers.
+    total = 0
+    for proc in [pid, *children(pid)]:
+        try:
+            with open(f'/proc/{proc}/status') as status:
+                total += next(int(line.split()[1]) for line in status if line.startswith('VmRSS:'))
+        except (OSError, StopIteration):
+            pass
+    return round(total / 1024, 1)
+
+
+def children(pid):
+    try:
+        with open(f'/proc/{pid}/task/{pid}/children') as f:
+            return [int(child) for child in f.read().split()]
+    except OSError:
+        return []
+
+
+def threads(pid):
+    total = 0
+    for proc in [pid, *children(pid)]:
+        try:
+            total += len(os.listdir(f'/proc/{proc}/task'))
+        except OSError:
+            pass
+    return total
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_gunicorn(config, port, timeout):
+    """Run gunicorn with the given config file on port; returns the process once it answers."""
+    if importlib.util.find_spec('gunicorn') is None:
+        raise SystemExit("gunicorn is not installed (pip install gunicorn)")
+    workdir = tempfile.mkdtemp()
+    env = dict(os.environ, HRMS_DATABASE=os.path.join(workdir, 'hrms.db'),
+               STATIC_BUILD_DIR=os.path.join(workdir, 'static_build'))
+    env.setdefault('HASH_WORKERS', '0')
+    server = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', config, '--bind', f'127.0.0.1:{port}'],
+                              cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                              start_new_session=True)
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if server.poll() is not None:
+            raise SystemExit(f"gunicorn exited with status {server.returncode}")
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            connection.request('GET', '/metrics')
+            connection.getresponse().read()
+            connection.close()
+            return server
+        except OSError:
+            time.sleep(0.2)
+    stop_gunicorn(server)
+    raise SystemExit("gunicorn did not start in time")
+
+
+def stop_gunicorn(server):
+    # Held streams never finish, so a graceful stop would sit out graceful_timeout.
+    os.killpg(server.pid, signal.SIGKILL)
+    server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--connections', type=int, default=200)
+    parser.add_argument('--config', default=os.path.join(ROOT, 'gunicorn.conf.py'))
+    parser.add_argument('--timeout', type=float, default=30)
+    args = parser.parse_args()
+
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    port = free_port()
+    server = start_gunicorn(args.config, port, args.timeout)
+    try:
+        baseline_rss = rss_mb(server.pid)
+        selector = selectors.DefaultSelector()
+        buffers = {}
+        started = time.perf_counter()
+        for _ in range(args.connections):
+            sock = socket.create_connection(('127.0.0.1', port))
+            sock.sendall(b"GET /admin/events HTTP/1.1\r\nHost: localhost\r\nAccept: text/event-stream\r\n\r\n")
+            sock.setblocking(False)
+            selector.register(sock, selectors.EVENT_READ)
+            buffers[sock] = b""
+
+        def wait_for(marker, socks):
+            pending = set(socks)
+            deadline = time.perf_counter() + args.timeout
+            arrivals = []
+            while pending and time.perf_counter() < deadline:
+                for key, _ in selector.select(timeout=0.5):
+                    sock = key.fileobj
+                    buffers[sock] += sock.recv(65536)
+                    if sock in pending and marker in buffers[sock]:
+                        pending.discard(sock)
+                        arrivals.append(time.perf_counter())
+                    elif buffers[sock].startswith(b"HTTP/1.1 503"):
+                        pending.discard(sock)
+            return arrivals, len(pending)
+
+        connected, not_connected = wait_for(b"retry:", buffers)
+        connect_seconds = time.perf_counter() - started
+        held_rss = rss_mb(server.pid)
+        streams = [sock for sock in buffers if b"retry:" in buffers[sock]]
+        refused = sum(buffers[sock].startswith(b"HTTP/1.1 503") for sock in buffers)
+
+        published_at = time.perf_counter()
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=args.timeout)
+        try:
+            connection.request('POST', '/register', json.dumps(
+                {"first_name": "Bench", "last_name": "Event", "email": "bench.event@example.com", "password": "pw"}),
+                {"Content-Type": "application/json"})
+            register_status = connection.getresponse().status
+        except OSError:
+            register_status = None
+        register_ms = (time.perf_counter() - published_at) * 1000
+        arrivals, missed = wait_for(b"event: employee_registered", streams)
+        latencies = [(t - published_at) * 1000 for t in arrivals]
+
+        print(json.dumps({
+            "connections": args.connections,
+            "connected": len(connected),
+            "refused": refused,
+            "not_connected": not_connected,
+            "connect_seconds": round(connect_seconds, 2),
+            "server_threads": threads(server.pid),
+            "rss_mb_baseline": baseline_rss,
+            "rss_mb_holding": held_rss,
+            "register_status": register_status,
+            "register_ms": round(register_ms, 1),
+            "delivered": len(latencies),
+            "missed": missed,
+            "fanout_p50_ms": round(percentile(latencies, 50), 1) if latencies else None,
+            "fanout_p99_ms": round(percentile(latencies, 99), 1) if latencies else None,
+            "fanout_max_ms": round(max(latencies), 1) if latencies else None,
+        }, indent=2))
+        for sock in buffers:
+            sock.close()
+    finally:
+        stop_gunicorn(server)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+"""API latency under gunicorn.conf.py with and without browsers holding event streams.
+
+Usage: python benchmarks/bench_sse_load.py [--streams 200] [--clients 16] [--seconds 10]
+Starts gunicorn with the production config (see bench_sse_idle.py) and drives
+ordinary GET endpoints from --clients keep-alive connections for --seconds,
+first with no event streams open and then while --streams browsers try to hold
+one each. Streams are reported as streaming, refused (503, the page polls) or
+unanswered; requests as latency percentiles plus errors and timeouts. With
+every thread held by a stream, requests time out instead of being served.
+"""
+import argparse
+import http.client
+import itertools
+import json
+import os
+import resource
+import selectors
+import socket
+import threading
+import time
+
+from bench_sse_idle import ROOT, free_port, percentile, start_gunicorn, stop_gunicorn, threads
+
+
+def run_load(port, paths, clients, seconds, timeout):
+    samples, errors, timeouts = [], [], []
+    deadline = time.perf_counter() + seconds
+
+    def client(offset):
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=timeout)
+        for n in itertools.count(offset):
+            if time.perf_counter() >= deadline:
+                break
+            started = time.perf_counter()
+            try:
+                connection.request('GET', paths[n % len(paths)])
+                response = connection.getresponse()
+                response.read()
+                if response.status == 200:
+                    samples.append((time.perf_counter() - started) * 1000)
+                else:
+                    errors.append(response.status)
+            except socket.timeout:
+                timeouts.append(1)
+                connection.close()
+            except OSError:
+                errors.append(None)
+                connection.close()
+        connection.close()
+
+    workers = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+    return {
+        "requests": len(samples), "per_second": round(len(samples) / elapsed, 1),
+        "errors": len(errors), "timeouts": len(timeouts),
+        "p50_ms": round(percentile(samples, 50), 1) if samples else None,
+        "p95_ms": round(percentile(samples, 95), 1) if samples else None,
+        "p99_ms": round(percentile(samples, 99), 1) if samples else None,
+    }
+
+
+def open_streams(port, count, timeout):
+    """Open count /admin/events streams; returns their sockets and how each one was answered."""
+    selector = selectors.DefaultSelector()
+    buffers = {}
+    for _ in range(count):
+        sock = socket.create_connection(('127.0.0.1', port))
+        sock.sendall(b"GET /admin/events HTTP/1.1\r\nHost: localhost\r\nAccept: text/event-stream\r\n\r\n")
+        sock.setblocking(False)
+        selector.register(sock, selectors.EVENT_READ)
+        buffers[sock] = b""
+    pending = set(buffers)
+    deadline = time.perf_counter() + timeout
+    while pending and time.perf_counter() < deadline:
+        for key, _ in selector.select(timeout=0.5):
+            sock = key.fileobj
+            buffers[sock] += sock.recv(65536)
+            if b"retry:" in buffers[sock] or buffers[sock].startswith(b"HTTP/1.1 503"):
+                pending.discard(sock)
+    answers = {"streaming": 0, "refused": 0, "unanswered": len(pending)}
+    for sock, data in buffers.items():
+        if sock not in pending:
+            answers["streaming" if b"retry:" in data else "refused"] += 1
+    return list(buffers), answers
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--streams', type=int, default=200)
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--config', default=os.path.join(ROOT, 'gunicorn.conf.py'))
+    parser.add_argument('--timeout', type=float, default=5)
+    args = parser.parse_args()
+
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    port = free_port()
+    server = start_gunicorn(args.config, port, 30)
+    streams = []
+    try:
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        connection.request('POST', '/register', json.dumps(
+            {"first_name": "Load", "last_name": "Test", "email": "load.test@example.com", "password": "pw"}),
+            {"Content-Type": "application/json"})
+        employee_id = json.loads(connection.getresponse().read())['id']
+        connection.close()
+        paths = [f'/holidays?year={time.localtime().tm_year}', '/admin/dashboard-stats',
+                 f'/notifications/{employee_id}/feed', f'/leave-balance/{employee_id}']
+
+        no_streams = run_load(port, paths, args.clients, args.seconds, args.timeout)
+        streams, answers = open_streams(port, args.streams, args.timeout)
+        held_threads = threads(server.pid)
+        with_streams = run_load(port, paths, args.clients, args.seconds, args.timeout)
+
+        print(json.dumps({
+            "config": os.path.relpath(args.config, ROOT),
+            "clients": args.clients, "seconds": args.seconds,
+            "streams": {"requested": args.streams, **answers},
+            "server_threads": held_threads,
+            "no_streams": no_streams,
+            "streams_held": with_streams,
+        }, indent=2))
+    finally:
+        for sock in streams:
+            sock.close()
+        stop_gunicorn(server)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+import threading
+import time
+from collections import OrderedDict
+
+# --- In-process Caches ---
+
+
+class CachedValue:
+    """A single loader-backed value with explicit invalidation and an optional TTL.
+
+    The TTL is the fallback for writes this process never sees (another worker
+    process, a manual SQL fix); invalidate() covers the writes it does see.
+    """
+
+    def __init__(self, loader, ttl=None):
+        self.loader = loader
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._value = None
+        self._loaded_at = None
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self):
+        with self._lock:
+            fresh = self._loaded_at is not None and (self.ttl is None or time.monotonic() - self._loaded_at < self.ttl)
+            if fresh:
+                self.hits += 1
+                return self._value
+            self.misses += 1
+            generation = self._generation
+        value = self.loader()
+        with self._lock:
+            # Only keep what we loaded if nothing invalidated it while we were loading.
+            if generation == self._generation:
+                self._value = value
+                self._loaded_at = time.monotonic()
+        return value
+
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+            self._loaded_at = None
+
+
+class LRUCache:
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,262 @@
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from queue import LifoQueue, Empty, Full
+
+# --- SQLite Connection Pool ---
+# Connections are opened once, tuned with the PRAGMAs below and then handed out
+# again and again. Calling close() on a pooled connection rolls back anything
+# left uncommitted and returns it to the pool instead of closing the file.
+# At most max_size connections are handed out at once (each carries its own
+# page cache and mmap window); acquire() waits up to `timeout` seconds for one
+# to come back and then raises PoolTimeout.
+
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',        # readers no longer block on the attendance writers
+    'synchronous': 'NORMAL',      # no fsync per commit in WAL mode; fsync at checkpoint
+    'busy_timeout': 5000,         # ms to wait for a competing writer instead of failing
+    'cache_size': -16000,         # negative means KiB, so ~16 MB page cache per connection
+    'mmap_size': 268435456,       # 256 MB memory-mapped reads
+    'temp_store': 'MEMORY',
+}
+
+
+class PoolTimeout(sqlite3.OperationalError):
+    pass
+
+
+class TracedCursor(sqlite3.Cursor):
+    # Reports execute timings and fetched rows to the connection's observer
+    # (metrics.MetricsRegistry): statement(sql, seconds) and fetched(rows, seconds).
+    _rows = 0
+    _fetch_seconds = 0.0
+
+    def execute(self, sql, parameters=()):
+        self._flush()
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self.connection.observer.statement(sql, time.perf_counter() - started)
+
+    def executemany(self, sql, seq_of_parameters):
+        self._flush()
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self.connection.observer.statement(sql, time.perf_counter() - started)
+
+    def _fetched(self, rows, started):
+        self.connection.observer.fetched(rows, time.perf_counter() - started)
+
+    def fetchone(self):
+        started = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(row is not None, started)
+        return row
+
+    def fetchmany(self, size=None):
+        started = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._fetched(len(rows), started)
+        return rows
+
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(len(rows), started)
+        return rows
+
+    def __next__(self):
+        # Iteration is per row, so totals are kept here and reported once the cursor is exhausted.
+        started = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._flush()
+            raise
+        self._rows += 1
+        self._fetch_seconds += time.perf_counter() - started
+        return row
+
+    def _flush(self):
+        if self._rows:
+            self.connection.observer.fetched(self._rows, self._fetch_seconds)
+            self._rows, self._fetch_seconds = 0, 0.0
+
+    def close(self):
+        self._flush()
+        super().close()
+
+
+class PooledConnection(sqlite3.Connection):
+    pool = None
+    # The pool whose max_size this connection counts against while it is handed out.
+    lease = None
+    observer = None
+    _after_commit = None
+
+    def cursor(self, factory=None):
+        if factory is None:
+            factory = TracedCursor if self.observer is not None else sqlite3.Cursor
+        return super().cursor(factory)
+
+    # The C implementations of these do not go through cursor(), so route them explicitly.
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def on_commit(self, callback):
+        # Run callback once the current transaction commits; dropped on rollback.
+        if self._after_commit is None:
+            self._after_commit = []
+        self._after_commit.append(callback)
+
+    def commit(self):
+        super().commit()
+        callbacks, self._after_commit = self._after_commit, None
+        for callback in callbacks or ():
+            callback()
+
+    def rollback(self):
+        self._after_commit = None
+        super().rollback()
+
+    @contextmanager
+    def savepoint(self, name='unit'):
+        # A nested unit of work inside an open transaction: if the block raises, only
+        # its own changes and on_commit callbacks are undone, and the error propagates.
+        mark = len(self._after_commit or ())
+        self.execute(f"SAVEPOINT {name}")
+        try:
+            yield self
+        except BaseException:
+            self.execute(f"ROLLBACK TO {name}")
+            self.execute(f"RELEASE {name}")
+            if self._after_commit:
+                del self._after_commit[mark:]
+            raise
+        self.execute(f"RELEASE {name}")
+
+    def close(self):
+        self._after_commit = None
+        lease, self.lease = self.lease, None
+        if self.pool is None:
+            # open() connections, or one taken out of the pool (pool set to None) while handed out.
+            super().close()
+        elif lease is not None:
+            self.pool.release(self)
+        if lease is not None:
+            lease.return_slot()
+
+    def really_close(self):
+        super().close()
+
+
+class ConnectionPool:
+    def __init__(self, database, max_size=16, pragmas=None, timeout=5.0, observer=None):
+        self.database = database
+        self.observer = observer
+        self.max_size = max_size
+        self.pragmas = dict(DEFAULT_PRAGMAS if pragmas is None else pragmas)
+        self.timeout = timeout
+        self._idle = LifoQueue(maxsize=max_size)
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._lock = threading.Lock()
+        self._closed = False
+        self.created = 0
+        self.reused = 0
+        self.in_use = 0
+        self.waited = 0
+        self.timeouts = 0
+
+    def _connect(self, pragmas=None):
+        conn = sqlite3.connect(
+            self.database,
+            timeout=self.timeout,
+            check_same_thread=False,
+            factory=PooledConnection,
+        )
+        conn.row_factory = sqlite3.Row
+        for name, value in dict(self.pragmas, **(pragmas or {})).items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        conn.pool = self
+        conn.observer = self.observer
+        with self._lock:
+            self.created += 1
+        return conn
+
+    def open(self, **pragmas):
+        # A connection of its own for a long-lived owner (e.g. a writer thread), with
+        # PRAGMA overrides that must not leak into the pool; close() really closes it.
+        conn = self._connect(pragmas)
+        conn.pool = None
+        return conn
+
+    def acquire(self):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.waited += 1
+            if not self._slots.acquire(timeout=self.timeout):
+                with self._lock:
+                    self.timeouts += 1
+                raise PoolTimeout(f"All {self.max_size} database connections are in use")
+        try:
+            conn = self._idle.get_nowait()
+        except Empty:
+            try:
+                conn = self._connect()
+            except BaseException:
+                self._slots.release()
+                raise
+        else:
+            with self._lock:
+                self.reused += 1
+        with self._lock:
+            self.in_use += 1
+        conn.lease = self
+        return conn
+
+    def return_slot(self):
+        with self._lock:
+            self.in_use -= 1
+        self._slots.release()
+
+    def release(self, conn):
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            conn.really_close()
+            return
+        if self._closed:
+            conn.really_close()
+            return
+        try:
+            self._idle.put_nowait(conn)
+        except Full:
+            conn.really_close()
+
+    def close_all(self):
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().really_close()
+            except Empty:
+                break
+
+    def stats(self):
+        return {
+            "database": self.database,
+            "idle": self._idle.qsize(),
+            "in_use": self.in_use,
+            "max_size": self.max_size,
+            "created": self.created,
+            "reused": self.reused,
+            "waited": self.waited,
+            "timeouts": self.timeouts,
+        }
@@ -0,0 +1,60 @@
+import re
+
+# --- Employee Directory Search ---
+# employee_search (migration 17) is an FTS5 index with one document per
+# employee: name, email, department, role and both reporting managers (names
+# and emails). Triggers on employees rewrite an employee's document whenever
+# one of those columns changes. employees is keyed by text and its implicit
+# rowid may be renumbered by VACUUM, so employee_search_keys hands each
+# employee a stable integer to use as the document rowid.
+#
+# Every query term is matched as a prefix ("jo smi" finds John Smith), served
+# by the prefix indexes on the FTS table rather than by walking the vocabulary.
+# '.' and '@' are part of a token, so an email is indexed as one word: its
+# prefixes find it, and typing it in full does not AND together the doclists
+# of "example" and "com", which every employee is on.
+
+SEARCH_COLUMNS = ('name', 'email', 'department', 'employee_role', 'managers')
+# bm25 weights: employee_id (not indexed), then SEARCH_COLUMNS. A name hit outranks an email hit,
+# which outranks matching someone's department, role or manager.
+SEARCH_RANK = 'bm25(0.0, 10.0, 5.0, 2.0, 2.0, 1.0)'
+SEARCH_TOKENIZER = "unicode61 remove_diacritics 2 tokenchars '.@'"
+SEARCH_MAX_TERMS = 8
+# Tokens as SEARCH_TOKENIZER splits them: letters, digits, '.' and '@' ('_' is a separator there).
+_TERM = re.compile(r'(?:[^\W_]|[.@])+')
+
+
+def document_sql(row):
+    """SQL expressions for the SEARCH_COLUMNS of employee `row` (a table alias, NEW or OLD)."""
+    managers = " || ' ' || ".join(
+        f"COALESCE({row}.{column}, '')" for column in
+        ('reporting_manager1', 'reporting_manager1_mail', 'reporting_manager2', 'reporting_manager2_mail'))
+    return [f"{row}.first_name || ' ' || {row}.last_name", f"{row}.email", f"{row}.department",
+            f"{row}.employee_role", f"trim({managers})"]
+
+
+def match_expression(text):
+    """FTS5 query for free text typed into a search box, or None if it has nothing to search for.
+
+    Terms are ANDed and each one is a quoted prefix, so FTS5 operators and
+    column filters in the input are matched as plain words, never parsed."""
+    terms = [term.strip('.@') for term in _TERM.findall(text or '')]
+    terms = [term for term in terms if term][:SEARCH_MAX_TERMS]
+    if not terms:
+        return None
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def rebuild_employee_search(conn):
+    """Re-index every employee (after changing the tokenizer or editing the tables by hand); returns the count.
+    Does not commit."""
+    conn.execute("DELETE FROM employee_search")
+    conn.execute("DELETE FROM employee_search_keys")
+    conn.execute("INSERT INTO employee_search_keys (employee_id) SELECT id FROM employees ORDER BY id")
+    conn.execute(f'''INSERT INTO employee_search (rowid, employee_id, {', '.join(SEARCH_COLUMNS)})
+                     SELECT k.docid, e.id, {', '.join(document_sql('e'))}
+                     FROM employee_search_keys k JOIN employees e ON e.id = k.employee_id''')
+    conn.execute("INSERT INTO employee_search (employee_search) VALUES ('optimize')")
+    conn.execute('''INSERT INTO resource_versions (resource, version) VALUES ('employee-directory', 1)
+                    ON CONFLICT (resource) DO UPDATE SET version = version + 1''')
+    return conn.execute("SELECT COUNT(*) FROM employee_search_keys").fetchone()[0]
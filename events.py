@@ -0,0 +1,93 @@
+import itertools
+import json
+import threading
+from collections import deque
+
+# --- In-process Pub/Sub for Server-Sent Events ---
+# Topics are plain strings ("admin", "employee:SSQ-1001"). publish() never
+# blocks: each subscriber has a bounded buffer and a slow client loses its
+# oldest events rather than holding up the request that published them.
+# With max_subscriptions set, subscribe() raises StreamsBusy at the limit: each
+# open stream pins a server thread, so the limit keeps threads free for requests.
+
+
+class StreamsBusy(Exception):
+    pass
+
+
+class Subscription:
+    def __init__(self, topics, buffer_size):
+        self.topics = tuple(topics)
+        self._events = deque(maxlen=buffer_size)
+        self._ready = threading.Event()
+
+    def push(self, event):
+        self._events.append(event)
+        self._ready.set()
+
+    def get(self, timeout):
+        """Wait up to timeout seconds; returns the buffered events (possibly none)."""
+        self._ready.wait(timeout)
+        self._ready.clear()
+        events = []
+        while self._events:
+            events.append(self._events.popleft())
+        return events
+
+
+class EventBus:
+    def __init__(self, buffer_size=100, max_subscriptions=None):
+        self.buffer_size = buffer_size
+        self.max_subscriptions = max_subscriptions
+        self._subscribers = {}
+        self._subscriptions = set()
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self.published = 0
+        self.refused = 0
+
+    def subscribe(self, topics):
+        subscription = Subscription(topics, self.buffer_size)
+        with self._lock:
+            if self.max_subscriptions is not None and len(self._subscriptions) >= self.max_subscriptions:
+                self.refused += 1
+                raise StreamsBusy(f"All {self.max_subscriptions} event streams are in use")
+            self._subscriptions.add(subscription)
+            for topic in subscription.topics:
+                self._subscribers.setdefault(topic, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            if subscription not in self._subscriptions:
+                return
+            self._subscriptions.discard(subscription)
+            for topic in subscription.topics:
+                subscribers = self._subscribers.get(topic)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscribers[topic]
+
+    def publish(self, topic, event_type, data=None):
+        event = (next(self._ids), event_type, data or {})
+        with self._lock:
+            subscribers = list(self._subscribers.get(topic, ()))
+            self.published += 1
+        for subscription in subscribers:
+            subscription.push(event)
+        return len(subscribers)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "topics": len(self._subscribers),
+                "subscriptions": len(self._subscriptions),
+                "published": self.published,
+                "refused": self.refused,
+            }
+
+
+def format_sse(event):
+    event_id, event_type, data = event
+    return f"id: {event_id}\nevent: {event_type}\ndata: {json.dumps(data)}\n\n"
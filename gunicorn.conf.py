@@ -0,0 +1,36 @@
+import os
+
+from static_assets import build_assets
+
+# --- Gunicorn Configuration ---
+# gunicorn -c gunicorn.conf.py
+# Threads share one SQLite connection pool, password hasher and event bus per
+# worker process. Server-sent events are published in-process, so a browser
+# only hears about writes handled by its own worker; keep WEB_WORKERS at 1
+# unless clients can live with that. An open event stream holds one thread, so
+# at most half the threads serve streams (SSE_MAX_STREAMS); further browsers are
+# refused with a 503 and poll, and the rest of the threads stay free for requests.
+
+wsgi_app = 'wsgi:build_wsgi_app()'
+bind = os.getenv('BIND', '0.0.0.0:8000')
+workers = int(os.getenv('WEB_WORKERS', '1'))
+worker_class = 'gthread'
+threads = int(os.getenv('WEB_THREADS', '64'))
+# Read by the app when each worker loads it.
+os.environ.setdefault('SSE_MAX_STREAMS', str(threads // 2))
+keepalive = 5
+timeout = 60
+graceful_timeout = 30
+# Recycle workers now and then so slow leaks cannot accumulate.
+max_requests = int(os.getenv('WEB_MAX_REQUESTS', '20000'))
+max_requests_jitter = max_requests // 10
+accesslog = os.getenv('ACCESS_LOG') or None
+errorlog = '-'
+
+STATIC_BUILD_DIR = os.getenv('STATIC_BUILD_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static_build'))
+
+
+def on_starting(server):
+    # Rebuild once in the master on every (re)deploy, before any worker loads the manifest.
+    manifest = build_assets(os.path.dirname(os.path.abspath(__file__)), STATIC_BUILD_DIR)
+    server.log.info("Built %d static assets into %s", len(manifest), STATIC_BUILD_DIR)
@@ -0,0 +1,139 @@
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, generate_password_hash, check_password_hash
+
+# --- Password Hashing Service ---
+# generate_password_hash/check_password_hash are deliberately slow KDFs. Running
+# them in a process pool keeps them off the request threads and the GIL, and
+# the semaphore caps how many can be queued so a login burst is shaped into a
+# bounded backlog instead of an unbounded pile-up.
+
+
+class HasherBusy(Exception):
+    pass
+
+
+def _hash(password, method):
+    if method:
+        return generate_password_hash(password, method=method)
+    return generate_password_hash(password)
+
+
+def hash_prefix(method):
+    # The parameter prefix ("scrypt:32768:8:1") werkzeug writes for this method,
+    # with its defaults filled in the same way, worked out without running the KDF.
+    name, *args = (method or 'scrypt').split(':')
+    if name == 'scrypt':
+        if args and len(args) != 3:
+            raise ValueError("'scrypt' takes 3 arguments.")
+        n, r, p = map(int, args) if args else (2 ** 15, 8, 1)
+        return f"scrypt:{n}:{r}:{p}"
+    if name == 'pbkdf2':
+        if len(args) > 2:
+            raise ValueError("'pbkdf2' takes 2 arguments.")
+        hash_name = args[0] if args else 'sha256'
+        iterations = int(args[1]) if len(args) == 2 else DEFAULT_PBKDF2_ITERATIONS
+        return f"pbkdf2:{hash_name}:{iterations}"
+    raise ValueError(f"Invalid hash method '{name}'.")
+
+
+def _hash_chunk(passwords, method):
+    return [_hash(password, method) for password in passwords]
+
+
+def _verify(pwhash, password):
+    return check_password_hash(pwhash, password)
+
+
+def _noop():
+    return None
+
+
+class PasswordHasher:
+    def __init__(self, workers=2, max_queue=256, queue_timeout=10.0, method=None):
+        # workers=0 hashes inline on the calling thread (still rate-shaped).
+        self.workers = workers
+        self.method = method
+        self.queue_timeout = queue_timeout
+        self._slots = threading.BoundedSemaphore(max(1, workers) + max_queue)
+        self._lock = threading.Lock()
+        self._executor = None
+        self.max_queue = max_queue
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.busy_seconds = 0.0
+        # Hash-parameter prefix ("scrypt:32768:8:1") that current hashes carry.
+        self.current_prefix = hash_prefix(method)
+        if workers > 0 and multiprocessing.parent_process() is None:
+            # Start the workers now, before request and background threads exist.
+            self._get_executor().submit(_noop).result()
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                methods = multiprocessing.get_all_start_methods()
+                context = multiprocessing.get_context('fork' if 'fork' in methods else None)
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+            return self._executor
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            with self._lock:
+                self.rejected += 1
+            raise HasherBusy("Password hashing queue is full")
+        with self._lock:
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        started = time.perf_counter()
+        try:
+            if self.workers > 0:
+                return self._get_executor().submit(fn, *args).result()
+            return fn(*args)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+                self.completed += 1
+                self.busy_seconds += time.perf_counter() - started
+            self._slots.release()
+
+    def hash(self, password):
+        return self._run(_hash, password, self.method)
+
+    def hash_many(self, passwords, chunk_size=32):
+        # Bulk imports: chunks go through the same slots as single hashes, at most
+        # one per worker at a time, so logins still interleave with a large batch.
+        chunks = [passwords[i:i + chunk_size] for i in range(0, len(passwords), chunk_size)]
+        with ThreadPoolExecutor(max_workers=max(1, self.workers)) as submitters:
+            hashed = submitters.map(lambda chunk: self._run(_hash_chunk, chunk, self.method), chunks)
+            return [pwhash for chunk in hashed for pwhash in chunk]
+
+    def verify(self, pwhash, password):
+        return self._run(_verify, pwhash, password)
+
+    def needs_rehash(self, pwhash):
+        return pwhash.split('$', 1)[0] != self.current_prefix
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "in_flight": self.in_flight,
+                "queue_depth": max(0, self.in_flight - max(1, self.workers)),
+                "peak_in_flight": self.peak_in_flight,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "avg_ms": round(1000 * self.busy_seconds / self.completed, 2) if self.completed else 0.0,
+                "method": self.current_prefix,
+            }
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
@@ -3,11 +3,10 @@ let loginUserType = 'employee'; // Default to employee
 let currentLeaveRequest = null; // Store the current request for the comment popup
 
 // Base URL for your Python Flask backend
-const API_BASE_URL = 'http://127.0.0.1:5000'; // Make sure this matches your Flask server's address
-const HOLIDAYS = [
-  '2025-01-26', '2025-03-14', '2025-03-31', '2025-04-18', '2025-08-15',
-  '2025-10-02', '2025-10-20', '2025-12-25'
-];
+// Same origin when the page is served by the app; the dev server's address when hello.html is opened from disk.
+const API_BASE_URL = window.location.protocol.startsWith('http') ? window.location.origin : 'http://127.0.0.1:5000';
+// Holiday dates (YYYY-MM-DD) for this year and next, fetched from /holidays at startup.
+let HOLIDAYS = [];
 
 // --- Helper function for making API requests with exponential backoff ---
 async function makeApiRequest(url, options, retries = 3) {
@@ -16,12 +15,15 @@ async function makeApiRequest(url, options, retries = 3) {
       const response = await fetch(url, options);
       if (!response.ok && response.status !== 401) {
         const errorData = await response.json();
-        throw new Error(errorData.message || `HTTP error! Status: ${response.status}`);
+        const error = new Error(errorData.message || `HTTP error! Status: ${response.status}`);
+        // A 4xx will not succeed on retry; only network errors and 5xx are worth another attempt.
+        error.retryable = response.status >= 500;
+        throw error;
       }
       return response.json();
     } catch (error) {
       console.error(`Attempt ${i + 1} failed for ${url}:`, error);
-      if (i < retries - 1) {
+      if (i < retries - 1 && error.retryable !== false) {
         const delay = Math.pow(2, i) * 1000;
         await new Promise(res => setTimeout(res, delay));
       } else {
@@ -38,6 +40,17 @@ function initializeApplication() {
     document.querySelector(".main").style.display = "flex";
     document.getElementById('bellIcon')?.addEventListener('click', toggleNotifications);
     document.getElementById('submitCommentBtn')?.addEventListener('click', submitCommentAction);
+    loadHolidays();
+}
+
+async function loadHolidays() {
+    const year = new Date().getFullYear();
+    try {
+        const lists = await Promise.all([year, year + 1].map(y => makeApiRequest(`${API_BASE_URL}/holidays?year=${y}`, { method: 'GET' })));
+        HOLIDAYS = lists.flat().map(holiday => holiday.date);
+    } catch (error) {
+        console.error("Failed to load holidays:", error);
+    }
 }
 
 // --- Function to show Admin Login Form ---
@@ -115,11 +128,13 @@ document.getElementById("loginForm")?.addEventListener("submit", async function
         document.querySelector(".admin-sidebar").classList.remove("hidden");
         document.getElementById("signOutTrigger").textContent = `Admin: ${currentUser.first_name}`;
         showSection('admin-dashboard-section');
+        subscribeToAdminEvents();
       } else {
         document.querySelector(".app-sidebar").classList.remove("hidden");
         document.querySelector(".admin-sidebar").classList.add("hidden");
         fillUserEverywhere(currentUser);
         fetchAndRenderNotifications(currentUser.id);
+        subscribeToEmployeeEvents(currentUser.id);
         showSection('dashboard1');
       }
     } else {
@@ -167,6 +182,7 @@ document.getElementById('forceChangePasswordForm')?.addEventListener('submit', a
             document.querySelector(".admin-sidebar").classList.add("hidden");
             fillUserEverywhere(currentUser);
             fetchAndRenderNotifications(currentUser.id);
+            subscribeToEmployeeEvents(currentUser.id);
             showSection('dashboard1');
         } else {
             showCustomAlert(`❌ Password change failed: ${response.message || 'An unknown error occurred.'}`);
@@ -554,28 +570,50 @@ document.getElementById("adminRegisterForm")?.addEventListener("submit", async f
     }
 });
 
+// Notifications are fetched incrementally: only rows newer than notificationCursor cross the wire.
+// null until the first (newest) page has been loaded.
+let notificationCache = [];
+let notificationCursor = null;
+let notificationEmployeeId = null;
+
+function renderNotifications(unreadCount) {
+    const dropdown = document.getElementById('notificationDropdown'), dot = document.getElementById('notificationDot');
+    dropdown.innerHTML = '';
+    if (notificationCache.length > 0) {
+        notificationCache.forEach(n => {
+            const newItem = document.createElement('div');
+            newItem.className = 'notification-item';
+            if (!n.is_read) newItem.classList.add('unread');
+            newItem.textContent = n.message;
+            dropdown.appendChild(newItem);
+        });
+    } else {
+        dropdown.innerHTML = '<div class="notification-item">No new notifications</div>';
+    }
+    dot.classList.toggle('hidden', !unreadCount);
+}
+
 async function fetchAndRenderNotifications(employeeId) {
     const dropdown = document.getElementById('notificationDropdown'), dot = document.getElementById('notificationDot');
     if (!dropdown || !dot) return;
+    if (notificationEmployeeId !== employeeId) {
+        notificationCache = [];
+        notificationCursor = null;
+        notificationEmployeeId = employeeId;
+    }
     try {
-        const notifications = await makeApiRequest(`${API_BASE_URL}/notifications/${employeeId}`, { method: 'GET' });
-        dropdown.innerHTML = '';
-        let hasUnread = false;
-        if (notifications && notifications.length > 0) {
-            notifications.forEach(n => {
-                const newItem = document.createElement('div');
-                newItem.className = 'notification-item';
-                if (!n.is_read) {
-                    newItem.classList.add('unread');
-                    hasUnread = true;
-                }
-                newItem.textContent = n.message;
-                dropdown.appendChild(newItem);
-            });
-        } else {
-            dropdown.innerHTML = '<div class="notification-item">No new notifications</div>';
-        }
-        dot.classList.toggle('hidden', !hasUnread);
+        // A poll returns at most one page; keep going until has_more is false so a burst is not skipped.
+        let feed, polling;
+        do {
+            polling = notificationCursor !== null;
+            const query = polling ? `?since=${notificationCursor}` : '';
+            feed = await makeApiRequest(`${API_BASE_URL}/notifications/${employeeId}/feed${query}`, { method: 'GET' });
+            // Two polls racing from the same cursor return the same rows; keep one copy.
+            const cached = new Set(notificationCache.map(n => n.id));
+            notificationCache = feed.notifications.filter(n => !cached.has(n.id)).concat(notificationCache).slice(0, 200);
+            notificationCursor = Math.max(notificationCursor || 0, feed.cursor);
+        } while (polling && feed.has_more);
+        renderNotifications(feed.unread_count);
     } catch (error) {
         console.error("Failed to fetch notifications:", error);
         dropdown.innerHTML = '<div class="notification-item">Could not load notifications.</div>';
@@ -586,10 +624,14 @@ async function toggleNotifications() {
     const dropdown = document.getElementById('notificationDropdown'), dot = document.getElementById('notificationDot');
     dropdown.classList.toggle('hidden');
     if (!dropdown.classList.contains('hidden') && !dot.classList.contains('hidden')) {
+        const unreadIds = notificationCache.filter(n => !n.is_read).map(n => n.id);
         dot.classList.add('hidden');
         dropdown.querySelectorAll('.notification-item.unread').forEach(item => item.classList.remove('unread'));
         try {
-            await makeApiRequest(`${API_BASE_URL}/notifications/mark-read/${currentUser.id}`, { method: 'PUT' });
+            if (unreadIds.length > 0) {
+                await makeApiRequest(`${API_BASE_URL}/notifications/${currentUser.id}/mark-read`, { method: 'PUT', headers: { 'Content-Type': 'application/json' }, body: JSON.stringify({ ids: unreadIds }) });
+                notificationCache.forEach(n => { n.is_read = 1; });
+            }
         } catch (error) {
             console.error("Failed to mark notifications as read:", error);
             dot.classList.remove('hidden');
@@ -597,6 +639,70 @@ async function toggleNotifications() {
     }
 }
 
+// --- Server-sent events: the server pushes changes instead of the page polling for them ---
+// When the server has no stream to spare it answers 503 and the browser gives up on the stream
+// (it reconnects by itself after a dropped or expired one): poll instead, and ask again later.
+const EVENT_POLL_MS = 30000, EVENT_STREAM_RETRY_MS = 120000;
+let eventSource = null, eventPollTimer = null, eventRetryTimer = null;
+
+function stopEventStream() {
+    if (eventSource) eventSource.close();
+    eventSource = null;
+    clearInterval(eventPollTimer);
+    clearTimeout(eventRetryTimer);
+}
+
+function startEventStream(url, handlers, poll) {
+    stopEventStream();
+    if (!window.EventSource) {
+        eventPollTimer = setInterval(poll, EVENT_POLL_MS);
+        return;
+    }
+    const source = eventSource = new EventSource(url);
+    Object.entries(handlers).forEach(([eventType, handler]) => source.addEventListener(eventType, handler));
+    source.addEventListener('error', () => {
+        if (source !== eventSource || source.readyState !== EventSource.CLOSED) return;
+        eventPollTimer = setInterval(poll, EVENT_POLL_MS);
+        eventRetryTimer = setTimeout(() => startEventStream(url, handlers, poll), EVENT_STREAM_RETRY_MS * (0.5 + Math.random()));
+    });
+}
+
+function subscribeToEmployeeEvents(employeeId) {
+    startEventStream(`${API_BASE_URL}/events/${employeeId}`, {
+        // The feed is fetched from notificationCursor on, so events for rows already fetched need no request.
+        notification: (event) => {
+            const notification = JSON.parse(event.data);
+            if (notificationEmployeeId !== employeeId || !(notification.id <= notificationCursor)) fetchAndRenderNotifications(employeeId);
+        },
+    }, () => fetchAndRenderNotifications(employeeId));
+}
+
+function isSectionVisible(sectionId) {
+    const section = document.getElementById(sectionId);
+    return section && !section.classList.contains('hidden');
+}
+
+function subscribeToAdminEvents() {
+    const refreshLeaveQueue = () => {
+        loadAdminDashboardStats();
+        if (isSectionVisible('admin-leave-requests')) loadLeaveRequests();
+    };
+    const refreshCompoffQueue = () => {
+        loadAdminDashboardStats();
+        if (isSectionVisible('admin-compoff-requests')) loadCompoffRequests();
+    };
+    startEventStream(`${API_BASE_URL}/admin/events`, {
+        leave_request: refreshLeaveQueue,
+        leave_action: refreshLeaveQueue,
+        compoff_request: refreshCompoffQueue,
+        compoff_action: refreshCompoffQueue,
+        employee_registered: () => loadAdminDashboardStats(),
+    }, () => {
+        refreshLeaveQueue();
+        if (isSectionVisible('admin-compoff-requests')) loadCompoffRequests();
+    });
+}
+
 function showForgotPasswordPopup() { document.getElementById('forgotPasswordPopup').style.display = 'flex'; }
 function closeForgotPasswordPopup() { document.getElementById('forgotPasswordPopup').style.display = 'none'; }
 
@@ -713,6 +819,7 @@ window.toggleSearchBox = toggleSearchBox;
 document.getElementById("signOutTrigger")?.addEventListener("click", async () => {
   if (await showCustomAlert("Are you sure you want to sign out?", true)) {
     currentUser = null;
+    stopEventStream();
     window.location.reload();
   }
 });
@@ -791,14 +898,17 @@ async function loadAttendanceRecords(employeeId) {
     }
 }
 
-// NEW: Function to load all attendance records for the admin
-async function loadAdminAttendanceRecords() {
+// NEW: Function to load all attendance records for the admin, one page at a time
+async function loadAdminAttendanceRecords(cursor = null) {
     const tableBody = document.getElementById('adminAttendanceTableBody');
     if (!tableBody) return;
-    tableBody.innerHTML = '<tr><td colspan="5">Loading attendance records...</td></tr>';
+    document.getElementById('adminAttendanceLoadMore')?.remove();
+    if (!cursor) tableBody.innerHTML = '<tr><td colspan="5">Loading attendance records...</td></tr>';
     try {
-        const records = await makeApiRequest(`${API_BASE_URL}/admin/attendance-records`, { method: 'GET' });
-        tableBody.innerHTML = ''; // Clear loading message
+        const url = `${API_BASE_URL}/admin/attendance-records` + (cursor ? `?cursor=${encodeURIComponent(cursor)}` : '');
+        const page = await makeApiRequest(url, { method: 'GET' });
+        const records = page.records;
+        if (!cursor) tableBody.innerHTML = ''; // Clear loading message
         if (records && records.length > 0) {
             records.forEach(record => {
                 const row = tableBody.insertRow();
@@ -808,9 +918,20 @@ async function loadAdminAttendanceRecords() {
                 row.insertCell(3).textContent = record.work_location;
                 row.insertCell(4).textContent = record.logout_time || 'Active'; // Show 'Active' if logout_time is null
             });
-        } else {
+        } else if (!cursor) {
             tableBody.innerHTML = '<tr><td colspan="5">No attendance records found.</td></tr>';
         }
+        if (page.next_cursor) {
+            const row = tableBody.insertRow();
+            row.id = 'adminAttendanceLoadMore';
+            const cell = row.insertCell(0);
+            cell.colSpan = 5;
+            const button = document.createElement('button');
+            button.className = 'butt';
+            button.textContent = 'Load more';
+            button.onclick = () => loadAdminAttendanceRecords(page.next_cursor);
+            cell.appendChild(button);
+        }
     } catch (error) {
         console.error("Failed to load admin attendance records:", error);
         tableBody.innerHTML = '<tr><td colspan="5" style="color:red;">Failed to load attendance records.</td></tr>';
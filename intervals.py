@@ -0,0 +1,36 @@
+import bisect
+from itertools import accumulate
+
+# --- Interval Index ---
+# Closed [start, end] intervals sorted by start, with a running maximum of the
+# ends. Every interval that starts at or before `hi` lies left of one bisect
+# point, and the running maximum there says whether any of them reaches `lo`,
+# so an overlap test is O(log n) even when the stored intervals overlap each
+# other. Works with anything ordered, e.g. ISO date strings.
+
+
+class IntervalIndex:
+    def __init__(self, intervals=()):
+        # intervals: (start, end, key) triples
+        items = sorted(intervals, key=lambda item: item[0])
+        self._starts = [start for start, _, _ in items]
+        self._ends = [end for _, end, _ in items]
+        self._keys = [key for _, _, key in items]
+        self._max_end = list(accumulate(self._ends, max))
+
+    def __len__(self):
+        return len(self._starts)
+
+    def has_overlap(self, lo, hi):
+        i = bisect.bisect_right(self._starts, hi)
+        return i > 0 and self._max_end[i - 1] >= lo
+
+    def overlapping(self, lo, hi):
+        # Walk left from the bisect point only while some earlier interval can still reach lo.
+        found = []
+        i = bisect.bisect_right(self._starts, hi)
+        while i > 0 and self._max_end[i - 1] >= lo:
+            i -= 1
+            if self._ends[i] >= lo:
+                found.append(self._keys[i])
+        return found[::-1]
@@ -0,0 +1,146 @@
+import json
+import logging
+import threading
+import time
+import sqlite3
+
+# --- Persistent Mail Outbox ---
+# Request handlers enqueue mail in the same transaction as the change that
+# triggers it; background workers claim pending rows in batches, send them
+# over one SMTP connection and retry failures with exponential backoff.
+# The mail_outbox table is created by migration 5.
+
+logger = logging.getLogger(__name__)
+
+class MailOutbox:
+    def __init__(self, connect, send_batch, workers=2, batch_size=20, max_attempts=5,
+                 backoff_base=30.0, poll_interval=15.0, claim_timeout=300.0, errors=None):
+        # connect() returns a DB connection; send_batch(messages) sends a list of
+        # (recipients, subject, body) and returns one exception-or-None per message.
+        # errors, if given, is a counter (metrics.errors) for failures the workers swallow.
+        self.connect = connect
+        self.send_batch = send_batch
+        self.errors = errors
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.poll_interval = poll_interval
+        self.claim_timeout = claim_timeout
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._threads = []
+        self._lock = threading.Lock()
+
+    def enqueue(self, conn, recipients, subject, body):
+        # Joins the caller's transaction; call notify() after the commit.
+        conn.execute(
+            "INSERT INTO mail_outbox (recipients, subject, body, next_attempt_at) VALUES (?, ?, ?, ?)",
+            (json.dumps(list(recipients)), subject, body, time.time())
+        )
+
+    def notify(self):
+        self.start()
+        self._wakeup.set()
+
+    def start(self):
+        with self._lock:
+            if self._threads or self.workers <= 0:
+                return
+            self._stop.clear()
+            self._release_stale_claims()
+            for index in range(self.workers):
+                thread = threading.Thread(target=self._run, name=f"mail-outbox-{index}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self, timeout=5.0):
+        self._stop.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def _release_stale_claims(self):
+        # A claim is a lease: next_attempt_at holds its expiry while a row is
+        # 'sending'. Rows whose lease ran out (the sender crashed) go back to
+        # the queue; rows another process is still sending are left alone.
+        conn = self.connect()
+        try:
+            conn.execute("UPDATE mail_outbox SET status = 'pending' WHERE status = 'sending' AND next_attempt_at <= ?",
+                         (time.time(),))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self._release_stale_claims()
+                sent = self.drain_once()
+            except sqlite3.Error as e:
+                if self.errors is not None:
+                    self.errors.inc('mail_outbox')
+                logger.error("Mail outbox database error: %s", e)
+                sent = 0
+            if not sent:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+
+    def _claim(self):
+        conn = self.connect()
+        try:
+            now = time.time()
+            rows = conn.execute(
+                '''UPDATE mail_outbox SET status = 'sending', attempts = attempts + 1, next_attempt_at = ?
+                   WHERE id IN (SELECT id FROM mail_outbox WHERE status = 'pending' AND next_attempt_at <= ?
+                                ORDER BY next_attempt_at LIMIT ?)
+                   RETURNING id, recipients, subject, body, attempts''',
+                (now + self.claim_timeout, now, self.batch_size)
+            ).fetchall()
+            conn.commit()
+            return rows
+        finally:
+            conn.close()
+
+    def drain_once(self):
+        """Claim and send one batch; returns the number of messages attempted."""
+        rows = self._claim()
+        if not rows:
+            return 0
+        messages = [(json.loads(row['recipients']), row['subject'], row['body']) for row in rows]
+        try:
+            errors = self.send_batch(messages)
+        except Exception as e:
+            errors = [e] * len(rows)
+        now = time.time()
+        sent, retry, failed = [], [], []
+        for row, error in zip(rows, errors):
+            if error is None:
+                sent.append((row['id'],))
+            elif row['attempts'] >= self.max_attempts:
+                failed.append((str(error), row['id']))
+            else:
+                retry.append((now + self.backoff_base * 2 ** (row['attempts'] - 1), str(error), row['id']))
+        conn = self.connect()
+        try:
+            conn.executemany("UPDATE mail_outbox SET status = 'sent', sent_at = CURRENT_TIMESTAMP, last_error = NULL WHERE id = ?", sent)
+            conn.executemany("UPDATE mail_outbox SET status = 'pending', next_attempt_at = ?, last_error = ? WHERE id = ?", retry)
+            conn.executemany("UPDATE mail_outbox SET status = 'failed', last_error = ? WHERE id = ?", failed)
+            conn.commit()
+        finally:
+            conn.close()
+        return len(rows)
+
+    def drain(self):
+        """Send everything that is due now, synchronously."""
+        total = 0
+        while True:
+            attempted = self.drain_once()
+            if not attempted:
+                return total
+            total += attempted
+
+    def stats(self, conn):
+        return {row['status']: row['count'] for row in conn.execute(
+            "SELECT status, COUNT(*) AS count FROM mail_outbox GROUP BY status")}
@@ -0,0 +1,222 @@
+import sys
+import threading
+import time
+from collections import Counter
+
+# --- Metrics and Profiling ---
+# In-process counters and histograms rendered in the Prometheus text format.
+# The request hooks in app.py record the route currently served by each thread
+# in `current`, so SQL timings from the pooled connections and profiler samples
+# can be charged to the endpoint that caused them.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SQL_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+BACKGROUND = 'background'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values):
+    if not names:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + '}'
+
+
+def _number(value):
+    return f"{value:.6f}" if isinstance(value, float) else str(value)
+
+
+class CounterMetric:
+    def __init__(self, name, help_text, labels=()):
+        self.name, self.help, self.labels = name, help_text, tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for label_values, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labels, label_values)} {_number(value)}")
+        return lines
+
+
+class HistogramMetric:
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        self.name, self.help, self.labels, self.buckets = name, help_text, tuple(labels), tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * len(self.buckets), 0, 0.0]
+            counts = series[0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            series[1] += 1
+            series[2] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        le_labels = self.labels + ('le',)
+        with self._lock:
+            for label_values, (counts, count, total) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    lines.append(f"{self.name}_bucket{_labels(le_labels, label_values + (bound,))} {cumulative}")
+                lines.append(f"{self.name}_bucket{_labels(le_labels, label_values + ('+Inf',))} {count}")
+                lines.append(f"{self.name}_sum{_labels(self.labels, label_values)} {total:.6f}")
+                lines.append(f"{self.name}_count{_labels(self.labels, label_values)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.current = {}  # thread ident -> route label of the request being served
+        self._metrics = []
+        self._gauges = []
+        self.requests = self.counter('hrms_http_requests_total', 'HTTP requests by route, method and status.',
+                                     ('route', 'method', 'status'))
+        self.latency = self.histogram('hrms_http_request_duration_seconds', 'Time to build the response.',
+                                      ('route', 'method'))
+        self.response_bytes = self.counter('hrms_http_response_bytes_total', 'Response body bytes (non-streamed).',
+                                           ('route',))
+        self.exceptions = self.counter('hrms_http_exceptions_total', 'Unhandled exceptions by route.',
+                                       ('route', 'exception'))
+        self.sql_statements = self.counter('hrms_sql_statements_total', 'SQL statements executed.',
+                                           ('route', 'verb'))
+        self.sql_duration = self.histogram('hrms_sql_execute_duration_seconds', 'Time in execute/executemany calls.',
+                                           ('route',), buckets=SQL_BUCKETS)
+        self.sql_rows = self.counter('hrms_sql_rows_total', 'Rows fetched from SQLite.', ('route',))
+        self.sql_fetch_seconds = self.counter('hrms_sql_fetch_seconds_total', 'Time spent stepping through results.',
+                                              ('route',))
+        self.errors = self.counter('hrms_errors_total', 'Errors that were logged and swallowed.', ('source',))
+
+    def counter(self, name, help_text, labels=()):
+        metric = CounterMetric(name, help_text, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        metric = HistogramMetric(name, help_text, labels, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def gauge(self, name, help_text, read):
+        # read() returns a number, or a {label_value: number} dict with the label called "kind".
+        self._gauges.append((name, help_text, read))
+
+    def route(self):
+        return self.current.get(threading.get_ident(), BACKGROUND)
+
+    # Called by the pooled connections' cursors (db.TracedCursor).
+    def statement(self, sql, seconds):
+        route = self.route()
+        verb = sql.lstrip().split(None, 1)[0].upper() if sql.strip() else 'EMPTY'
+        self.sql_statements.inc(route, verb)
+        self.sql_duration.observe(seconds, route)
+
+    def fetched(self, rows, seconds):
+        route = self.route()
+        self.sql_rows.inc(route, amount=rows)
+        self.sql_fetch_seconds.inc(route, amount=seconds)
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for name, help_text, read in self._gauges:
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+            value = read()
+            if isinstance(value, dict):
+                lines += [f'{name}{_labels(("kind",), (kind,))} {_number(number)}' for kind, number in sorted(value.items())]
+            else:
+                lines.append(f"{name} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+class SamplingProfiler:
+    """Samples the stacks of threads that are serving a request, folded per route.
+
+    The output is the collapsed-stack format flamegraph.pl and speedscope read:
+    "route;file:function;file:function count".
+    """
+
+    def __init__(self, registry, interval=0.005, max_depth=40):
+        self.registry = registry
+        self.interval = interval
+        self.max_depth = max_depth
+        self.samples = Counter()
+        self.sample_count = 0
+        self.started_at = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, interval=None):
+        with self._lock:
+            if interval:
+                self.interval = interval
+            if self.running:
+                return
+            self._stop.clear()
+            self.started_at = time.time()
+            self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join()
+        self._thread = None
+
+    def reset(self):
+        with self._lock:
+            self.samples.clear()
+            self.sample_count = 0
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            with self._lock:
+                self.sample_count += 1
+                for ident, route in list(self.registry.current.items()):
+                    frame = frames.get(ident)
+                    if frame is None or ident == own:
+                        continue
+                    stack = []
+                    while frame is not None and len(stack) < self.max_depth:
+                        code = frame.f_code
+                        stack.append(f"{code.co_filename.rsplit('/', 1)[-1]}:{code.co_name}")
+                        frame = frame.f_back
+                    self.samples[";".join([route] + stack[::-1])] += 1
+
+    def folded(self, limit=None):
+        with self._lock:
+            return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common(limit))
+
+    def stats(self):
+        with self._lock:
+            return {
+                "running": self.running,
+                "interval_ms": round(self.interval * 1000, 3),
+                "ticks": self.sample_count,
+                "stacks": len(self.samples),
+                "started_at": self.started_at,
+            }
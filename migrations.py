@@ -0,0 +1,385 @@
+import re
+import sqlite3
+
+from employee_search import SEARCH_COLUMNS, SEARCH_RANK, SEARCH_TOKENIZER, document_sql, rebuild_employee_search
+from org_chart import rebuild_org_chart
+
+# --- Schema Migrations ---
+# Each migration runs once, in order, inside its own transaction. The schema
+# version lives in PRAGMA user_version, so an existing hrms.db only runs the
+# steps it has not seen yet. Append new migrations; never edit shipped ones.
+# A step is either an SQL string or a callable taking the connection.
+
+
+def _add_availed_ledger(conn):
+    leave_types = {
+        'sick_leave': ('Sick Leave',), 'casual_leave': ('Casual Leave',),
+        'earned_leave': ('Earned Leave',), 'paternity_leave': ('Paternity Leave',),
+        'wfh': ('WFH',), 'compoff': ('Compoff', 'Comp-off'),
+    }
+    conn.execute('''
+        INSERT OR IGNORE INTO leave_balances (employee_id)
+        SELECT DISTINCT employee_id FROM leave_applications WHERE status = 'Approved'
+    ''')
+    for column, names in leave_types.items():
+        conn.execute(f"ALTER TABLE leave_balances ADD COLUMN {column}_availed INTEGER NOT NULL DEFAULT 0")
+        placeholders = ', '.join('?' for _ in names)
+        conn.execute(f'''
+            UPDATE leave_balances SET {column}_availed = (
+                SELECT COALESCE(SUM(leave_days), 0) FROM leave_applications
+                WHERE employee_id = leave_balances.employee_id AND status = 'Approved'
+                  AND leave_type IN ({placeholders})
+            )
+        ''', names)
+
+
+def _add_resource_versions(conn):
+    # One trigger per (table, event) bumps the version stamp of every cached
+    # resource whose response the row appears in.
+    conn.execute("CREATE TABLE IF NOT EXISTS resource_versions (resource TEXT PRIMARY KEY, version INTEGER NOT NULL)")
+    bump = "INSERT INTO resource_versions (resource, version) VALUES ({}, 1) ON CONFLICT (resource) DO UPDATE SET version = version + 1;\n"
+    resources_by_table = {
+        'attendance_records': ["'attendance:' || {row}.employee_id", "'admin:attendance'"],
+        'leave_applications': ["'leave-applications:' || {row}.employee_id", "'admin:leave-requests'"],
+        'leave_balances': ["'leave-balance:' || {row}.employee_id"],
+        'compoff_requests': ["'admin:compoff-requests'"],
+        'employees': ["'profile:' || {row}.id"],
+    }
+    for table, resources in resources_by_table.items():
+        for event, row in (('INSERT', 'NEW'), ('UPDATE', 'NEW'), ('DELETE', 'OLD')):
+            statements = "".join(bump.format(resource.format(row=row)) for resource in resources)
+            conn.execute(f"CREATE TRIGGER IF NOT EXISTS trg_{table}_version_{event.lower()} AFTER {event} ON {table} BEGIN\n{statements}END")
+    # Names and reporting managers are joined into the attendance and admin queue responses.
+    statements = "".join(bump.format(resource) for resource in (
+        "'attendance:' || NEW.id", "'admin:attendance'", "'admin:leave-requests'", "'admin:compoff-requests'"))
+    conn.execute(
+        "CREATE TRIGGER IF NOT EXISTS trg_employees_names_version "
+        "AFTER UPDATE OF first_name, last_name, email, reporting_manager1, reporting_manager2 ON employees "
+        f"BEGIN\n{statements}END"
+    )
+
+def _rebuild_table(conn, table, create_sql, columns, indexes):
+    # SQLite cannot change a primary key in place: copy into a new table, swap
+    # it in, then restore the indexes (redefined by the caller) and the
+    # triggers (recreated verbatim from the old table). `columns` maps each new
+    # column to the expression that fills it from the old table.
+    triggers = [row[0] for row in conn.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'trigger' AND tbl_name = ?", (table,))]
+    # An AUTOINCREMENT high-water mark must survive, or ids of deleted (archived) rows come back.
+    has_sequence = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_sequence'").fetchone()
+    sequence = has_sequence and conn.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (table,)).fetchone()
+    conn.execute(create_sql.format(table=f"{table}_new"))
+    conn.execute(f"INSERT INTO {table}_new ({', '.join(columns)}) "
+                 f"SELECT {', '.join(columns.values())} FROM {table} ORDER BY rowid")
+    conn.execute(f"DROP TABLE {table}")
+    conn.execute(f"ALTER TABLE {table}_new RENAME TO {table}")
+    if sequence and not conn.execute("UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = ?",
+                                     (sequence[0], table)).rowcount:
+        conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)", (table, sequence[0]))
+    for statement in indexes + triggers:
+        conn.execute(statement)
+
+
+def _copied(*names, id_from='rowid'):
+    return {'id': id_from, **{name: name for name in names}}
+
+
+def _integer_record_keys(conn):
+    # The uuid4 text keys become INTEGER PRIMARY KEY AUTOINCREMENT. Keys are the
+    # old rowids, so the copy keeps insertion order, and the uuids move to
+    # legacy_record_ids so ids handed out before the upgrade still resolve.
+    # Notifications already had an integer key; their unused uuid column goes.
+    conn.execute('''CREATE TABLE IF NOT EXISTS legacy_record_ids (
+        record_id TEXT PRIMARY KEY, kind TEXT NOT NULL, id INTEGER NOT NULL
+    ) WITHOUT ROWID''')
+    for table, kind in (('attendance_records', 'a'), ('leave_applications', 'l'), ('compoff_requests', 'c')):
+        conn.execute(f"INSERT INTO legacy_record_ids (record_id, kind, id) SELECT record_id, ?, rowid FROM {table}", (kind,))
+
+    # Indexes no longer end in record_id: every index ends in the rowid
+    # implicitly, which keyset pagination now uses as its tie-breaker.
+    _rebuild_table(conn, 'attendance_records', '''CREATE TABLE {table} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, employee_id TEXT NOT NULL, date TEXT NOT NULL,
+            login_time TEXT NOT NULL, work_location TEXT, logout_time TEXT,
+            FOREIGN KEY (employee_id) REFERENCES employees(id)
+        )''', _copied('employee_id', 'date', 'login_time', 'work_location', 'logout_time'), [
+        "CREATE INDEX idx_attendance_date_login ON attendance_records (date, login_time)",
+        "CREATE INDEX idx_attendance_employee_date_login ON attendance_records (employee_id, date, login_time)",
+        "CREATE INDEX idx_attendance_location_date_login ON attendance_records (work_location, date, login_time)",
+        "CREATE INDEX idx_attendance_date_report ON attendance_records (date, employee_id, work_location, login_time, logout_time)",
+    ])
+    _rebuild_table(conn, 'leave_applications', '''CREATE TABLE {table} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, employee_id TEXT NOT NULL, leave_type TEXT NOT NULL,
+            from_date TEXT NOT NULL, to_date TEXT, description TEXT, status TEXT NOT NULL DEFAULT 'Pending',
+            comment TEXT, submitted_at DATETIME DEFAULT CURRENT_TIMESTAMP, leave_days INTEGER DEFAULT 0,
+            FOREIGN KEY (employee_id) REFERENCES employees(id)
+        )''', _copied('employee_id', 'leave_type', 'from_date', 'to_date', 'description', 'status', 'comment',
+                     'submitted_at', 'leave_days'), [
+        "CREATE INDEX idx_leave_applications_employee_submitted ON leave_applications (employee_id, submitted_at)",
+        "CREATE INDEX idx_leave_applications_status_submitted ON leave_applications (status, submitted_at)",
+        "CREATE INDEX idx_leave_applications_from_date ON leave_applications (from_date)",
+        '''CREATE INDEX idx_leave_applications_active_interval
+           ON leave_applications (employee_id, COALESCE(to_date, from_date), from_date)
+           WHERE status IN ('Pending', 'Approved')
+        ''',
+        "CREATE INDEX idx_leave_applications_pending_days ON leave_applications (employee_id, status, leave_type, leave_days)",
+    ])
+    _rebuild_table(conn, 'compoff_requests', '''CREATE TABLE {table} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, employee_id TEXT NOT NULL, work_date TEXT NOT NULL,
+            description TEXT, status TEXT NOT NULL DEFAULT 'Pending', comment TEXT,
+            submitted_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (employee_id) REFERENCES employees(id)
+        )''', _copied('employee_id', 'work_date', 'description', 'status', 'comment', 'submitted_at'), [
+        "CREATE INDEX idx_compoff_requests_status_submitted ON compoff_requests (status, submitted_at)",
+        "CREATE INDEX idx_compoff_requests_employee_work_date ON compoff_requests (employee_id, work_date)",
+    ])
+    _rebuild_table(conn, 'notifications', '''CREATE TABLE {table} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, employee_id TEXT NOT NULL,
+            message TEXT NOT NULL, is_read INTEGER NOT NULL DEFAULT 0,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (employee_id) REFERENCES employees(id)
+        )''', _copied('employee_id', 'message', 'is_read', 'timestamp', id_from='id'), [
+        "CREATE INDEX idx_notifications_employee_id ON notifications (employee_id, id)",
+        "CREATE INDEX idx_notifications_unread ON notifications (employee_id) WHERE is_read = 0",
+    ])
+    _rebuild_table(conn, 'notifications_archive', '''CREATE TABLE {table} (
+            id INTEGER PRIMARY KEY, employee_id TEXT NOT NULL,
+            message TEXT NOT NULL, is_read INTEGER NOT NULL, timestamp DATETIME,
+            archived_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )''', _copied('employee_id', 'message', 'is_read', 'timestamp', 'archived_at', id_from='id'), [
+        "CREATE INDEX idx_notifications_archive_employee ON notifications_archive (employee_id, id)",
+    ])
+
+
+MIGRATIONS = [
+    (1, "Secondary indexes for per-employee lookups and pending queues", [
+        "CREATE INDEX IF NOT EXISTS idx_notifications_employee_ts ON notifications (employee_id, timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_leave_applications_employee_submitted ON leave_applications (employee_id, submitted_at)",
+        "CREATE INDEX IF NOT EXISTS idx_leave_applications_status_submitted ON leave_applications (status, submitted_at)",
+        "CREATE INDEX IF NOT EXISTS idx_compoff_requests_status_submitted ON compoff_requests (status, submitted_at)",
+        "CREATE INDEX IF NOT EXISTS idx_attendance_employee_date_login ON attendance_records (employee_id, date, login_time)",
+        "CREATE INDEX IF NOT EXISTS idx_attendance_date_login ON attendance_records (date, login_time)",
+    ]),
+    (2, "Attendance indexes end in record_id for keyset pagination", [
+        "DROP INDEX IF EXISTS idx_attendance_date_login",
+        "DROP INDEX IF EXISTS idx_attendance_employee_date_login",
+        "CREATE INDEX IF NOT EXISTS idx_attendance_date_login_record ON attendance_records (date, login_time, record_id)",
+        "CREATE INDEX IF NOT EXISTS idx_attendance_employee_date_login_record ON attendance_records (employee_id, date, login_time, record_id)",
+        "CREATE INDEX IF NOT EXISTS idx_attendance_location_date_login_record ON attendance_records (work_location, date, login_time, record_id)",
+    ]),
+    (3, "Date-ordered leave index for exports", [
+        "CREATE INDEX IF NOT EXISTS idx_leave_applications_from_date ON leave_applications (from_date, record_id)",
+    ]),
+    (4, "Availed-days ledger columns on leave_balances, backfilled from approved leave", [
+        _add_availed_ledger,
+    ]),
+    (5, "Persistent outbox for asynchronous mail delivery", [
+        '''CREATE TABLE IF NOT EXISTS mail_outbox (
+            id INTEGER PRIMARY KEY,
+            recipients TEXT NOT NULL,
+            subject TEXT NOT NULL,
+            body TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at REAL NOT NULL DEFAULT 0,
+            last_error TEXT,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            sent_at DATETIME
+        )''',
+        "CREATE INDEX IF NOT EXISTS idx_mail_outbox_status_next ON mail_outbox (status, next_attempt_at)",
+    ]),
+    (6, "Monotonic notification ids for since-cursor feeds, unread index and archive table", [
+        '''CREATE TABLE notifications_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            notification_id TEXT UNIQUE NOT NULL, employee_id TEXT NOT NULL,
+            message TEXT NOT NULL, is_read INTEGER NOT NULL DEFAULT 0,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (employee_id) REFERENCES employees(id)
+        )''',
+        '''INSERT INTO notifications_new (notification_id, employee_id, message, is_read, timestamp)
+           SELECT notification_id, employee_id, message, is_read, timestamp FROM notifications ORDER BY timestamp, rowid''',
+        "DROP TABLE notifications",
+        "ALTER TABLE notifications_new RENAME TO notifications",
+        "CREATE INDEX IF NOT EXISTS idx_notifications_employee_id ON notifications (employee_id, id)",
+        "CREATE INDEX IF NOT EXISTS idx_notifications_unread ON notifications (employee_id) WHERE is_read = 0",
+        '''CREATE TABLE IF NOT EXISTS notifications_archive (
+            id INTEGER PRIMARY KEY, notification_id TEXT NOT NULL, employee_id TEXT NOT NULL,
+            message TEXT NOT NULL, is_read INTEGER NOT NULL, timestamp DATETIME,
+            archived_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )''',
+        "CREATE INDEX IF NOT EXISTS idx_notifications_archive_employee ON notifications_archive (employee_id, id)",
+    ]),
+    (7, "Trigger-maintained dashboard counters", [
+        "CREATE TABLE IF NOT EXISTS dashboard_counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL DEFAULT 0)",
+        '''INSERT OR REPLACE INTO dashboard_counters (name, value) VALUES
+            ('employee_count', (SELECT COUNT(*) FROM employees)),
+            ('pending_leaves', (SELECT COUNT(*) FROM leave_applications WHERE status = 'Pending')),
+            ('pending_compoffs', (SELECT COUNT(*) FROM compoff_requests WHERE status = 'Pending'))''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_employees_count_insert AFTER INSERT ON employees BEGIN
+            UPDATE dashboard_counters SET value = value + 1 WHERE name = 'employee_count';
+        END''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_employees_count_delete AFTER DELETE ON employees BEGIN
+            UPDATE dashboard_counters SET value = value - 1 WHERE name = 'employee_count';
+        END''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_leave_pending_insert AFTER INSERT ON leave_applications
+           WHEN NEW.status = 'Pending' BEGIN
+            UPDATE dashboard_counters SET value = value + 1 WHERE name = 'pending_leaves';
+        END''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_leave_pending_update AFTER UPDATE OF status ON leave_applications
+           WHEN OLD.status IS NOT NEW.status BEGIN
+            UPDATE dashboard_counters SET value = value + (NEW.status = 'Pending') - (OLD.status = 'Pending')
+            WHERE name = 'pending_leaves';
+        END''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_leave_pending_delete AFTER DELETE ON leave_applications
+           WHEN OLD.status = 'Pending' BEGIN
+            UPDATE dashboard_counters SET value = value - 1 WHERE name = 'pending_leaves';
+        END''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_compoff_pending_insert AFTER INSERT ON compoff_requests
+           WHEN NEW.status = 'Pending' BEGIN
+            UPDATE dashboard_counters SET value = value + 1 WHERE name = 'pending_compoffs';
+        END''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_compoff_pending_update AFTER UPDATE OF status ON compoff_requests
+           WHEN OLD.status IS NOT NEW.status BEGIN
+            UPDATE dashboard_counters SET value = value + (NEW.status = 'Pending') - (OLD.status = 'Pending')
+            WHERE name = 'pending_compoffs';
+        END''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_compoff_pending_delete AFTER DELETE ON compoff_requests
+           WHEN OLD.status = 'Pending' BEGIN
+            UPDATE dashboard_counters SET value = value - 1 WHERE name = 'pending_compoffs';
+        END''',
+    ]),
+    (8, "Resource version stamps for conditional GETs", [
+        _add_resource_versions,
+    ]),
+    (9, "Id sequence table for employee ids", [
+        '''CREATE TABLE IF NOT EXISTS id_sequences (
+            name TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        )''',
+        '''INSERT OR IGNORE INTO id_sequences (name, value)
+           SELECT 'employee', COALESCE(MAX(CAST(SUBSTR(id, 5) AS INTEGER)), 1000)
+           FROM employees WHERE id LIKE 'SSQ-%'
+        ''',
+    ]),
+    (10, "Covering index for the attendance report column load", [
+        "CREATE INDEX IF NOT EXISTS idx_attendance_date_report ON attendance_records (date, employee_id, work_location, login_time, logout_time)",
+    ]),
+    (11, "Version stamp for the holiday calendar", [
+        *(f'''CREATE TRIGGER IF NOT EXISTS trg_holidays_version_{event.lower()} AFTER {event} ON holidays BEGIN
+            INSERT INTO resource_versions (resource, version) VALUES ('holidays', 1)
+            ON CONFLICT (resource) DO UPDATE SET version = version + 1;
+        END''' for event in ('INSERT', 'UPDATE', 'DELETE')),
+    ]),
+    (12, "Interval and pending-days indexes for leave validation", [
+        '''CREATE INDEX IF NOT EXISTS idx_leave_applications_active_interval
+           ON leave_applications (employee_id, COALESCE(to_date, from_date), from_date)
+           WHERE status IN ('Pending', 'Approved')''',
+        "CREATE INDEX IF NOT EXISTS idx_leave_applications_pending_days ON leave_applications (employee_id, status, leave_type, leave_days)",
+        "CREATE INDEX IF NOT EXISTS idx_compoff_requests_employee_work_date ON compoff_requests (employee_id, work_date)",
+    ]),
+    (13, "Covering index for the login credential check", [
+        "CREATE INDEX IF NOT EXISTS idx_employees_login ON employees (email, id, password, force_password_change)",
+    ]),
+    (14, "Integer keys for attendance, leave, comp-off and notification rows", [
+        _integer_record_keys,
+    ]),
+    (15, "Registry of yearly archive files", [
+        '''CREATE TABLE IF NOT EXISTS archive_partitions (
+            year INTEGER PRIMARY KEY, file TEXT NOT NULL, archived_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )''',
+    ]),
+    (16, "Reporting lines and their ancestor closure for manager-scoped queues", [
+        '''CREATE TABLE IF NOT EXISTS reporting_lines (
+            employee_id TEXT NOT NULL, rank INTEGER NOT NULL, manager_email TEXT NOT NULL, manager_id TEXT,
+            PRIMARY KEY (employee_id, rank)
+        ) WITHOUT ROWID''',
+        "CREATE INDEX IF NOT EXISTS idx_reporting_lines_manager ON reporting_lines (manager_id)",
+        "CREATE INDEX IF NOT EXISTS idx_reporting_lines_unresolved ON reporting_lines (manager_email) WHERE manager_id IS NULL",
+        '''CREATE TABLE IF NOT EXISTS reporting_closure (
+            ancestor_id TEXT NOT NULL, descendant_id TEXT NOT NULL, depth INTEGER NOT NULL,
+            PRIMARY KEY (ancestor_id, descendant_id)
+        ) WITHOUT ROWID''',
+        "CREATE INDEX IF NOT EXISTS idx_reporting_closure_descendant ON reporting_closure (descendant_id, ancestor_id, depth)",
+        # The team listing joins these columns; reporting_lines changes bump 'org-chart' in org_chart.py.
+        '''CREATE TRIGGER IF NOT EXISTS trg_employees_org_chart_version
+           AFTER UPDATE OF first_name, last_name, email, department, employee_role ON employees BEGIN
+            INSERT INTO resource_versions (resource, version) VALUES ('org-chart', 1)
+            ON CONFLICT (resource) DO UPDATE SET version = version + 1;
+        END''',
+        rebuild_org_chart,
+    ]),
+    (17, "Full-text index for the employee directory search", [
+        "CREATE TABLE IF NOT EXISTS employee_search_keys (docid INTEGER PRIMARY KEY, employee_id TEXT UNIQUE NOT NULL)",
+        f'''CREATE VIRTUAL TABLE IF NOT EXISTS employee_search USING fts5(
+            employee_id UNINDEXED, {', '.join(SEARCH_COLUMNS)},
+            tokenize = "{SEARCH_TOKENIZER}", prefix = '1 2 3'
+        )''',
+        f"INSERT INTO employee_search (employee_search, rank) VALUES ('rank', '{SEARCH_RANK}')",
+        f'''CREATE TRIGGER IF NOT EXISTS trg_employees_search_insert AFTER INSERT ON employees BEGIN
+            INSERT INTO employee_search_keys (employee_id) VALUES (NEW.id);
+            INSERT INTO employee_search (rowid, employee_id, {', '.join(SEARCH_COLUMNS)})
+            VALUES ((SELECT docid FROM employee_search_keys WHERE employee_id = NEW.id), NEW.id, {', '.join(document_sql('NEW'))});
+            INSERT INTO resource_versions (resource, version) VALUES ('employee-directory', 1)
+            ON CONFLICT (resource) DO UPDATE SET version = version + 1;
+        END''',
+        f'''CREATE TRIGGER IF NOT EXISTS trg_employees_search_update
+           AFTER UPDATE OF id, first_name, last_name, email, department, employee_role, reporting_manager1,
+                           reporting_manager1_mail, reporting_manager2, reporting_manager2_mail ON employees BEGIN
+            UPDATE employee_search_keys SET employee_id = NEW.id WHERE employee_id = OLD.id AND NEW.id IS NOT OLD.id;
+            UPDATE employee_search SET employee_id = NEW.id,
+                {', '.join(f"{column} = {value}" for column, value in zip(SEARCH_COLUMNS, document_sql('NEW')))}
+            WHERE rowid = (SELECT docid FROM employee_search_keys WHERE employee_id = NEW.id);
+            INSERT INTO resource_versions (resource, version) VALUES ('employee-directory', 1)
+            ON CONFLICT (resource) DO UPDATE SET version = version + 1;
+        END''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_employees_search_delete AFTER DELETE ON employees BEGIN
+            DELETE FROM employee_search WHERE rowid = (SELECT docid FROM employee_search_keys WHERE employee_id = OLD.id);
+            DELETE FROM employee_search_keys WHERE employee_id = OLD.id;
+            INSERT INTO resource_versions (resource, version) VALUES ('employee-directory', 1)
+            ON CONFLICT (resource) DO UPDATE SET version = version + 1;
+        END''',
+        rebuild_employee_search,
+    ]),
+]
+
+
+def get_schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def run_migrations(conn, migrations=MIGRATIONS):
+    current = get_schema_version(conn)
+    applied = []
+    for version, description, steps in migrations:
+        if version <= current:
+            continue
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for step in steps:
+                if callable(step):
+                    step(conn)
+                else:
+                    conn.execute(step)
+            conn.execute(f"PRAGMA user_version = {int(version)}")
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+        applied.append((version, description))
+        current = version
+    return applied
+
+
+# --- Query Plan Checks ---
+def explain_query_plan(conn, sql, params=()):
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()]
+
+
+def find_table_scans(plan):
+    # "SCAN t USING INDEX ..." walks an index in order and is fine; a bare
+    # "SCAN t" reads the whole table. A virtual table reports the constraints it
+    # was handed after the colon ("VIRTUAL TABLE INDEX 0:M2" is an FTS5 MATCH);
+    # nothing there means it reads everything. Scanning a subquery's result is
+    # fine too: the subquery's own steps are in the plan.
+    subqueries = {step.split()[1] for step in plan if step.startswith(("CO-ROUTINE", "MATERIALIZE"))}
+    return [step for step in plan if step.startswith("SCAN") and "USING" not in step
+            and not re.search(r"VIRTUAL TABLE INDEX -?\d+:\S", step) and step.split()[1] not in subqueries]
@@ -0,0 +1,145 @@
+import json
+from collections import deque
+
+# --- Reporting Hierarchy ---
+# employees.reporting_manager1_mail / reporting_manager2_mail name a manager by
+# email. reporting_lines (migration 16) holds those edges, resolved to employee
+# ids where the email belongs to an employee (manager_id stays NULL until it
+# does), and reporting_closure holds every (ancestor, descendant, depth) pair
+# reachable through them, depth 1 being a direct report. A manager's whole
+# subtree is then one primary-key range read on reporting_closure.
+#
+# Changing someone's managers can only change the ancestors of that employee
+# and of their existing descendants, so a refresh recomputes the closure of
+# exactly those rows, parents before children.
+
+MANAGER_EMAIL_COLUMNS = ('reporting_manager1_mail', 'reporting_manager2_mail')
+
+
+class ReportingCycle(Exception):
+    pass
+
+
+def _ids_param(ids):
+    # One bound parameter for any number of ids: ... IN (SELECT value FROM json_each(?))
+    return (json.dumps(sorted(ids)),)
+
+
+def refresh_reporting_lines(conn, employee_ids, registered=False):
+    """Re-read the reporting lines of these employees (newly registered, or with changed manager
+    emails) and update the closure; returns how many closure rows were rewritten. Raises
+    ReportingCycle if a line would make someone their own (indirect) manager. Does not commit."""
+    ids = set(employee_ids)
+    if not ids:
+        return 0
+    if registered:
+        # Employees who named one of the newcomers as manager before they were registered.
+        ids.update(row[0] for row in conn.execute(
+            '''SELECT l.employee_id FROM reporting_lines l JOIN employees e ON e.email = l.manager_email
+               WHERE l.manager_id IS NULL AND e.id IN (SELECT value FROM json_each(?))''', _ids_param(ids)))
+    _write_lines(conn, conn.execute(
+        f"SELECT id, {', '.join(MANAGER_EMAIL_COLUMNS)} FROM employees WHERE id IN (SELECT value FROM json_each(?))",
+        _ids_param(ids)).fetchall())
+    affected = ids | {row[0] for row in conn.execute(
+        "SELECT DISTINCT descendant_id FROM reporting_closure WHERE ancestor_id IN (SELECT value FROM json_each(?))",
+        _ids_param(ids))}
+    return _recompute(conn, affected)[0]
+
+
+def rebuild_org_chart(conn):
+    """Rebuild both tables from employees. Lines that would close a cycle are left unresolved
+    (manager_id NULL) instead of failing; returns counts. Does not commit."""
+    conn.execute("DELETE FROM reporting_lines")
+    conn.execute("DELETE FROM reporting_closure")
+    _write_lines(conn, conn.execute(f"SELECT id, {', '.join(MANAGER_EMAIL_COLUMNS)} FROM employees").fetchall())
+    employees = [row[0] for row in conn.execute("SELECT id FROM employees")]
+    _, cyclic = _recompute(conn, set(employees), break_cycles=True)
+    return {
+        "employees": len(employees),
+        "lines": conn.execute("SELECT COUNT(*) FROM reporting_lines WHERE manager_id IS NOT NULL").fetchone()[0],
+        "unresolved": conn.execute("SELECT COUNT(*) FROM reporting_lines WHERE manager_id IS NULL").fetchone()[0],
+        "closure_rows": conn.execute("SELECT COUNT(*) FROM reporting_closure").fetchone()[0],
+        "cyclic_lines_dropped": cyclic,
+    }
+
+
+def _write_lines(conn, rows):
+    lines = []
+    for row in rows:
+        seen = set()
+        for rank, email in enumerate(row[1:], start=1):
+            email = email.strip() if isinstance(email, str) else None
+            if email and email not in seen:
+                seen.add(email)
+                lines.append((row[0], rank, email))
+    conn.execute("DELETE FROM reporting_lines WHERE employee_id IN (SELECT value FROM json_each(?))",
+                 _ids_param(row[0] for row in rows))
+    conn.executemany(
+        '''INSERT INTO reporting_lines (employee_id, rank, manager_email, manager_id)
+           VALUES (?, ?, ?, (SELECT id FROM employees WHERE email = ?))''',
+        [(employee_id, rank, email, email) for employee_id, rank, email in lines])
+
+
+def _recompute(conn, affected, break_cycles=False):
+    # Returns (closure rows written, lines unresolved to break cycles).
+    parents = {node: [] for node in affected}
+    for employee_id, manager_id, rank in conn.execute(
+            '''SELECT employee_id, manager_id, rank FROM reporting_lines
+               WHERE manager_id IS NOT NULL AND employee_id IN (SELECT value FROM json_each(?))''', _ids_param(affected)):
+        parents[employee_id].append((manager_id, rank))
+    # Managers outside the affected set keep their ancestors; read them from the closure.
+    outside = {manager for lines in parents.values() for manager, _ in lines if manager not in affected}
+    ancestors = {node: {} for node in outside}
+    for ancestor_id, descendant_id, depth in conn.execute(
+            "SELECT ancestor_id, descendant_id, depth FROM reporting_closure WHERE descendant_id IN (SELECT value FROM json_each(?))",
+            _ids_param(outside)):
+        ancestors[descendant_id][ancestor_id] = depth
+
+    dropped = 0
+    while True:
+        # Kahn's order: an employee is computed once every manager inside the affected set is.
+        waiting = {node: sum(1 for manager, _ in lines if manager in affected) for node, lines in parents.items() if node not in ancestors}
+        reports = {}
+        for node, lines in parents.items():
+            for manager, _ in lines:
+                reports.setdefault(manager, []).append(node)
+        ready = deque(node for node, count in waiting.items() if count == 0)
+        while ready:
+            node = ready.popleft()
+            closure = {}
+            for manager, _ in parents[node]:
+                for ancestor, depth in [(manager, 0), *ancestors[manager].items()]:
+                    if depth + 1 < closure.get(ancestor, float('inf')):
+                        closure[ancestor] = depth + 1
+            ancestors[node] = closure
+            for report in reports.get(node, ()):
+                waiting[report] -= 1
+                if waiting[report] == 0:
+                    ready.append(report)
+        stuck = sorted(node for node in parents if node not in ancestors)
+        if not stuck:
+            break
+        # Stuck employees are on a cycle or below one. Walk up through stuck managers until
+        # someone repeats: the line just followed is on the cycle.
+        stuck, node, seen = set(stuck), stuck[0], set()
+        while True:
+            seen.add(node)
+            manager, rank = next((manager, rank) for manager, rank in parents[node] if manager in stuck)
+            if manager in seen:
+                break
+            node = manager
+        if not break_cycles:
+            raise ReportingCycle(f"Reporting lines would make {manager} their own manager")
+        # Unresolve that line and try again; the others may still be fine.
+        conn.execute("UPDATE reporting_lines SET manager_id = NULL WHERE employee_id = ? AND rank = ?", (node, rank))
+        parents[node].remove((manager, rank))
+        for computed in set(ancestors) & affected:
+            del ancestors[computed]
+        dropped += 1
+
+    conn.execute("DELETE FROM reporting_closure WHERE descendant_id IN (SELECT value FROM json_each(?))", _ids_param(affected))
+    rows = [(ancestor, node, depth) for node in affected for ancestor, depth in ancestors[node].items()]
+    conn.executemany("INSERT INTO reporting_closure (ancestor_id, descendant_id, depth) VALUES (?, ?, ?)", rows)
+    conn.execute('''INSERT INTO resource_versions (resource, version) VALUES ('org-chart', 1)
+                    ON CONFLICT (resource) DO UPDATE SET version = version + 1''')
+    return len(rows), dropped
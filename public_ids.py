@@ -0,0 +1,51 @@
+# --- Public Record Ids ---
+# Attendance, leave and comp-off rows are keyed by INTEGER PRIMARY KEY
+# AUTOINCREMENT, so keys are never reused. The API shows each key as an opaque
+# id: the key times an odd constant modulo 2**32 (a bijection, so it decodes
+# exactly), in hex behind a one-letter kind prefix, e.g. 'a5bd1e995'. SQL
+# builds the same string with public_id_sql(), so nothing extra is stored or
+# indexed. Ids issued before migration 14 (uuid4 strings) still resolve
+# through the legacy_record_ids table.
+
+ATTENDANCE, LEAVE, COMPOFF = 'a', 'l', 'c'
+KEY_LIMIT = 2 ** 32
+# Below 2**31, so key * multiplier stays inside SQLite's 64-bit integers.
+_MULTIPLIER = 0x5bd1e995
+_INVERSE = pow(_MULTIPLIER, -1, KEY_LIMIT)
+_HEX_DIGITS = frozenset('0123456789abcdef')
+LEGACY_LOOKUP_CHUNK = 500
+
+
+def public_id(kind, key):
+    return f"{kind}{key * _MULTIPLIER % KEY_LIMIT:08x}"
+
+
+def public_id_sql(kind, column):
+    return f"printf('{kind}%08x', {column} * {_MULTIPLIER} % {KEY_LIMIT})"
+
+
+def parse_public_id(kind, value):
+    if isinstance(value, str) and len(value) == 9 and value[0] == kind and _HEX_DIGITS.issuperset(value[1:]):
+        return int(value[1:], 16) * _INVERSE % KEY_LIMIT
+    return None
+
+
+def resolve_record_ids(conn, kind, values):
+    """Map public (or pre-migration uuid) ids to integer keys; unknown legacy ids are left out."""
+    keys, legacy = {}, []
+    for value in values:
+        key = parse_public_id(kind, value)
+        if key is not None:
+            keys[value] = key
+        elif isinstance(value, str):
+            legacy.append(value)
+    for start in range(0, len(legacy), LEGACY_LOOKUP_CHUNK):
+        chunk = legacy[start:start + LEGACY_LOOKUP_CHUNK]
+        keys.update(conn.execute(
+            f"SELECT record_id, id FROM legacy_record_ids WHERE kind = ? AND record_id IN ({', '.join('?' * len(chunk))})",
+            [kind, *chunk]).fetchall())
+    return keys
+
+
+def resolve_record_id(conn, kind, value):
+    return resolve_record_ids(conn, kind, [value]).get(value)
@@ -0,0 +1,240 @@
+from array import array
+from datetime import date
+
+from work_calendar import WorkingCalendar
+
+try:
+    import numpy as np
+except ImportError:  # optional; the array-backed engine below computes the same figures
+    np = None
+
+# --- Attendance Analytics ---
+# Attendance is loaded once into parallel typed arrays (one slot per record):
+# employee code (employees.rowid), work-location code, day ordinal and login /
+# logout as seconds since midnight (-1 for an open session). SQLite does the
+# text parsing while reading, and the per-employee and per-day sums run over
+# whole columns, with NumPy when it is installed.
+
+REMOTE_LOCATIONS = ('Home', 'Remote')
+
+# date.toordinal() is the Julian day number minus 1721424.5 at midnight.
+_SECONDS = "(CAST(substr({0}, 1, 2) AS INTEGER) * 3600 + CAST(substr({0}, 4, 2) AS INTEGER) * 60 + CAST(substr({0}, 7, 2) AS INTEGER))"
+ATTENDANCE_COLUMNS_SQL = f'''
+    SELECT e.rowid, ar.work_location,
+           CAST(julianday(ar.date) - 1721424.5 AS INTEGER),
+           {_SECONDS.format('ar.login_time')},
+           COALESCE({_SECONDS.format('ar.logout_time')}, -1)
+    FROM {{schema}}.attendance_records ar JOIN employees e ON e.id = ar.employee_id
+    WHERE ar.date >= ? AND ar.date <= ? AND julianday(ar.date) IS NOT NULL
+'''
+
+
+def attendance_columns_query(start, end, department=None, schema='main'):
+    # schema: 'main' or an attached yearly archive (see archive.py).
+    sql, params = ATTENDANCE_COLUMNS_SQL.format(schema=schema), [start.isoformat(), end.isoformat()]
+    if department:
+        sql += " AND e.department = ?"
+        params.append(department)
+    return sql, params
+
+
+class AttendanceColumns:
+    def __init__(self):
+        self.employee = array('l')
+        self.location = array('b')
+        self.day = array('l')
+        self.login = array('l')
+        self.logout = array('l')
+        self.location_codes = {}
+
+    def __len__(self):
+        return len(self.day)
+
+    def _location_code(self, name):
+        return self.location_codes.setdefault(name or '', len(self.location_codes))
+
+    @classmethod
+    def load(cls, conn, start, end, department=None, batch_size=50000, schemas=('main',)):
+        columns = cls()
+        for schema in schemas:
+            cursor = conn.execute(*attendance_columns_query(start, end, department, schema))
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                columns._extend(rows)
+        return columns
+
+    def _extend(self, rows):
+        employee, location, day, login, logout = zip(*rows)
+        self.employee.extend(employee)
+        self.location.extend(map(self._location_code, location))
+        self.day.extend(day)
+        self.login.extend(login)
+        self.logout.extend(logout)
+
+
+def _summarize_numpy(columns, first_day, n_days, n_employees, late_after, today, remote_codes):
+    employee = np.frombuffer(columns.employee, dtype=np.dtype(columns.employee.typecode)).astype(np.int64)
+    day = np.frombuffer(columns.day, dtype=np.dtype(columns.day.typecode)).astype(np.int64)
+    login = np.frombuffer(columns.login, dtype=np.dtype(columns.login.typecode))
+    logout = np.frombuffer(columns.logout, dtype=np.dtype(columns.logout.typecode))
+    location = np.frombuffer(columns.location, dtype=np.int8)
+    offset = day - first_day
+
+    closed = logout >= 0
+    valid = closed & (logout >= login)
+    worked = np.where(valid, logout - login, 0).astype(np.float64)
+    missing = ~closed & (day < today)
+    remote = np.isin(location, remote_codes)
+
+    # One group per (employee, day); its first login decides whether the day was late.
+    key = employee * n_days + offset
+    order = np.lexsort((login, key))
+    sorted_key = key[order]
+    starts = np.flatnonzero(np.diff(sorted_key, prepend=-1))
+    group_key = sorted_key[starts]
+    group_late = login[order][starts] > late_after
+    group_employee, group_offset = group_key // n_days, group_key % n_days
+
+    def per_employee(weights=None):
+        return np.bincount(employee, weights=weights, minlength=n_employees).tolist()
+
+    def per_day(index, weights=None):
+        return np.bincount(index, weights=weights, minlength=n_days).tolist()
+
+    return {
+        "sessions": per_employee(),
+        "worked": per_employee(worked),
+        "missing": per_employee(missing),
+        "remote": per_employee(remote),
+        "invalid": per_employee(closed & ~valid),
+        "days": np.bincount(group_employee, minlength=n_employees).tolist(),
+        "late_days": np.bincount(group_employee, weights=group_late, minlength=n_employees).tolist(),
+        "daily_present": per_day(group_offset),
+        "daily_late": per_day(group_offset, group_late),
+        "daily_worked": per_day(offset, worked),
+        "daily_remote": per_day(offset, remote),
+        "daily_sessions": per_day(offset),
+    }
+
+
+def _summarize_arrays(columns, first_day, n_days, n_employees, late_after, today, remote_codes):
+    sessions, worked, missing, remote, invalid, days, late_days = ([0] * n_employees for _ in range(7))
+    daily_present, daily_late, daily_worked, daily_remote, daily_sessions = ([0] * n_days for _ in range(5))
+    first_login = {}
+    remote_codes = set(remote_codes)
+    for emp, loc, day, login, logout in zip(columns.employee, columns.location, columns.day, columns.login, columns.logout):
+        offset = day - first_day
+        sessions[emp] += 1
+        daily_sessions[offset] += 1
+        if logout >= login:
+            worked[emp] += logout - login
+            daily_worked[offset] += logout - login
+        elif logout >= 0:
+            invalid[emp] += 1
+        elif day < today:
+            missing[emp] += 1
+        if loc in remote_codes:
+            remote[emp] += 1
+            daily_remote[offset] += 1
+        key = emp * n_days + offset
+        if login < first_login.get(key, 86400):
+            first_login[key] = login
+    for key, login in first_login.items():
+        emp, offset = divmod(key, n_days)
+        late = login > late_after
+        days[emp] += 1
+        late_days[emp] += late
+        daily_present[offset] += 1
+        daily_late[offset] += late
+    return {
+        "sessions": sessions, "worked": worked, "missing": missing, "remote": remote,
+        "invalid": invalid, "days": days, "late_days": late_days,
+        "daily_present": daily_present, "daily_late": daily_late, "daily_worked": daily_worked,
+        "daily_remote": daily_remote, "daily_sessions": daily_sessions,
+    }
+
+
+def _ratio(numerator, denominator, digits=3):
+    return round(numerator / denominator, digits) if denominator else 0.0
+
+
+def build_attendance_report(conn, start, end, department=None, late_after=9 * 3600 + 30 * 60,
+                            standard_hours=8.0, engine=None, today=None, columns=None, calendar=None):
+    """Per-employee, per-department and per-day attendance figures for [start, end]."""
+    today = today or date.today()
+    engine = engine or ('numpy' if np is not None else 'array')
+    if engine == 'numpy' and np is None:
+        raise ValueError("NumPy is not installed")
+    employees_sql = "SELECT rowid, id, first_name, last_name, department FROM employees"
+    employees = conn.execute(employees_sql + (" WHERE department = ?" if department else ""),
+                             (department,) if department else ()).fetchall()
+    if calendar is None:
+        calendar = WorkingCalendar(conn.execute(
+            "SELECT date, name FROM holidays WHERE date >= ? AND date <= ?", (start.isoformat(), end.isoformat())))
+    expected_days = calendar.working_days(start, min(end, today))
+
+    if columns is None:
+        columns = AttendanceColumns.load(conn, start, end, department)
+    remote_codes = [code for name, code in columns.location_codes.items() if name in REMOTE_LOCATIONS]
+    n_employees = max([row[0] for row in employees] + [max(columns.employee) if len(columns) else 0]) + 1
+    n_days = (end - start).days + 1
+    summarize = _summarize_numpy if engine == 'numpy' else _summarize_arrays
+    totals = summarize(columns, start.toordinal(), n_days, n_employees, late_after, today.toordinal(), remote_codes)
+
+    employee_rows, departments = [], {}
+    for rowid, employee_id, first_name, last_name, dept in employees:
+        hours = totals["worked"][rowid] / 3600
+        days = int(totals["days"][rowid])
+        sessions = int(totals["sessions"][rowid])
+        row = {
+            "employee_id": employee_id,
+            "employee_name": f"{first_name} {last_name}",
+            "department": dept,
+            "days_present": days,
+            "sessions": sessions,
+            "worked_hours": round(hours, 2),
+            "avg_daily_hours": round(hours / days, 2) if days else 0.0,
+            "late_arrivals": int(totals["late_days"][rowid]),
+            "missing_logouts": int(totals["missing"][rowid]),
+            "invalid_logouts": int(totals["invalid"][rowid]),
+            "remote_sessions": int(totals["remote"][rowid]),
+            "wfh_ratio": _ratio(totals["remote"][rowid], sessions),
+            "utilisation": _ratio(hours, expected_days * standard_hours),
+        }
+        employee_rows.append(row)
+        group = departments.setdefault(dept, {"department": dept, "employees": 0, "days_present": 0, "sessions": 0,
+                                              "worked_hours": 0.0, "late_arrivals": 0, "missing_logouts": 0,
+                                              "remote_sessions": 0})
+        group["employees"] += 1
+        for field in ("days_present", "sessions", "worked_hours", "late_arrivals", "missing_logouts", "remote_sessions"):
+            group[field] += row[field]
+    for group in departments.values():
+        group["worked_hours"] = round(group["worked_hours"], 2)
+        group["avg_daily_hours"] = round(group["worked_hours"] / group["days_present"], 2) if group["days_present"] else 0.0
+        group["wfh_ratio"] = _ratio(group["remote_sessions"], group["sessions"])
+        group["utilisation"] = _ratio(group["worked_hours"], group["employees"] * expected_days * standard_hours)
+
+    daily = []
+    for offset in range(n_days):
+        sessions = int(totals["daily_sessions"][offset])
+        if not sessions:
+            continue
+        daily.append({
+            "date": date.fromordinal(start.toordinal() + offset).isoformat(),
+            "present": int(totals["daily_present"][offset]),
+            "worked_hours": round(totals["daily_worked"][offset] / 3600, 2),
+            "late_arrivals": int(totals["daily_late"][offset]),
+            "wfh_ratio": _ratio(totals["daily_remote"][offset], sessions),
+        })
+    return {
+        "from": start.isoformat(),
+        "to": end.isoformat(),
+        "working_days": expected_days,
+        "records": len(columns),
+        "engine": engine,
+        "departments": sorted(departments.values(), key=lambda group: group["department"] or ''),
+        "employees": employee_rows,
+        "daily": daily,
+    }
@@ -0,0 +1,166 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+from urllib.parse import quote, unquote
+
+try:
+    import brotli
+except ImportError:  # optional; without it only .gz variants are built
+    brotli = None
+
+# --- Static Assets ---
+# `build_assets` copies the frontend into a build directory under
+# content-hashed names (hello.css -> hello.3fa1c2d9.css), rewriting the
+# references in HTML/CSS/JS to match, and writes .gz (and .br) siblings of
+# every text asset. `StaticAssets` is WSGI middleware that answers those
+# files before Flask sees the request: hashed names are immutable for a year,
+# the entry page is revalidated, and the precompressed variant the client
+# accepts is streamed with wsgi.file_wrapper. A reverse proxy can serve the
+# same directory directly (see README, "Production Deployment").
+
+ENTRY_POINTS = ('hello.html',)
+TEXT_EXTENSIONS = {'.html', '.css', '.js', '.svg', '.json', '.txt'}
+PUBLIC_EXTENSIONS = TEXT_EXTENSIONS | {'.png', '.jpg', '.jpeg', '.gif', '.webp', '.ico', '.pdf', '.woff', '.woff2'}
+IMMUTABLE = 'public, max-age=31536000, immutable'
+REVALIDATE = 'no-cache'
+MANIFEST = 'manifest.json'
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+REFERENCE = re.compile(r'''(["'(])([^"'()<>\n]+?\.(?:%s))(["')])''' % '|'.join(
+    sorted(ext[1:] for ext in PUBLIC_EXTENSIONS)), re.IGNORECASE)
+
+
+def is_public(name):
+    return os.path.splitext(name)[1].lower() in PUBLIC_EXTENSIONS and not name.startswith('.')
+
+
+def _hashed_name(name, content):
+    stem, ext = os.path.splitext(name)
+    return f"{stem}.{hashlib.sha256(content).hexdigest()[:10]}{ext}"
+
+
+def _write(path, content):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(content)
+    os.replace(tmp, path)
+
+
+def build_assets(source_dir, out_dir, entry_points=ENTRY_POINTS):
+    """Build the hashed, precompressed copy of the frontend; returns the manifest {source name: built name}."""
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = {}
+
+    def process(name):
+        if name in manifest:
+            return manifest[name]
+        with open(os.path.join(source_dir, name), 'rb') as f:
+            content = f.read()
+        ext = os.path.splitext(name)[1].lower()
+        if ext in TEXT_EXTENSIONS:
+            def rewrite(match):
+                ref = unquote(match[2])
+                if ref.startswith(('/', 'http:', 'https:', '//')) or '..' in ref or not is_public(ref) \
+                        or not os.path.isfile(os.path.join(source_dir, ref)):
+                    return match[0]
+                return f"{match[1]}{quote(process(ref))}{match[3]}"
+            content = REFERENCE.sub(rewrite, content.decode('utf-8')).encode('utf-8')
+        # Entry pages keep their names (they are what users bookmark); everything else is content-addressed.
+        built = name if name in entry_points else _hashed_name(name, content)
+        manifest[name] = built
+        path = os.path.join(out_dir, built)
+        _write(path, content)
+        if ext in TEXT_EXTENSIONS:
+            _write(path + '.gz', gzip.compress(content, compresslevel=9, mtime=0))
+            if brotli is not None:
+                _write(path + '.br', brotli.compress(content, quality=11))
+        return built
+
+    for entry in entry_points:
+        process(entry)
+    # Written last, so a server never loads a manifest that points at missing files.
+    _write(os.path.join(out_dir, MANIFEST), json.dumps(manifest, indent=2, sort_keys=True).encode())
+    return manifest
+
+
+def _accepts(header, coding):
+    for item in header.split(','):
+        token, *params = item.split(';')
+        if token.strip().lower() != coding:
+            continue
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    return float(value) > 0
+                except ValueError:
+                    # A malformed q-value accepts nothing; the next variant (at worst identity) is sent.
+                    return False
+        return True
+    return False
+
+
+class StaticAssets:
+    def __init__(self, app, directory, entry_point=ENTRY_POINTS[0]):
+        self.app = app
+        with open(os.path.join(directory, MANIFEST)) as f:
+            manifest = json.load(f)
+        self.files = {}
+        for source, built in manifest.items():
+            asset = self._asset(directory, built, REVALIDATE if source == built else IMMUTABLE)
+            self.files['/' + built] = asset
+            if source != built:
+                # Pages cached before a deploy still ask for the old names; serve them, but revalidated.
+                self.files['/' + source] = dict(asset, cache_control=REVALIDATE)
+        self.files['/'] = self.files['/' + manifest[entry_point]]
+
+    @staticmethod
+    def _asset(directory, name, cache_control):
+        path = os.path.join(directory, name)
+        content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        if content_type.startswith('text/') or content_type == 'application/javascript':
+            content_type += '; charset=utf-8'
+        with open(path, 'rb') as f:
+            digest = hashlib.sha256(f.read()).hexdigest()[:16]
+        variants = [(coding, path + suffix) for coding, suffix in ENCODINGS if os.path.isfile(path + suffix)]
+        return {
+            "content_type": content_type,
+            "cache_control": cache_control,
+            "etag": digest,
+            "variants": variants + [(None, path)],
+            "sizes": {variant: os.path.getsize(variant) for _, variant in variants + [(None, path)]},
+        }
+
+    def __call__(self, environ, start_response):
+        asset = self.files.get(environ.get('PATH_INFO', '')) if environ['REQUEST_METHOD'] in ('GET', 'HEAD') else None
+        if asset is None:
+            return self.app(environ, start_response)
+        accept = environ.get('HTTP_ACCEPT_ENCODING', '')
+        coding, path = next((coding, path) for coding, path in asset["variants"] if coding is None or _accepts(accept, coding))
+        etag = f'"{asset["etag"]}-{coding}"' if coding else f'"{asset["etag"]}"'
+        headers = [('Cache-Control', asset["cache_control"]), ('ETag', etag), ('X-Content-Type-Options', 'nosniff')]
+        if len(asset["variants"]) > 1:
+            headers.append(('Vary', 'Accept-Encoding'))
+        if etag in environ.get('HTTP_IF_NONE_MATCH', ''):
+            start_response('304 Not Modified', headers)
+            return []
+        headers += [('Content-Type', asset["content_type"]), ('Content-Length', str(asset["sizes"][path]))]
+        if coding:
+            headers.append(('Content-Encoding', coding))
+        start_response('200 OK', headers)
+        if environ['REQUEST_METHOD'] == 'HEAD':
+            return []
+        f = open(path, 'rb')
+        file_wrapper = environ.get('wsgi.file_wrapper')
+        return file_wrapper(f, 65536) if file_wrapper else _read_chunks(f)
+
+
+def _read_chunks(f, size=65536):
+    with f:
+        while True:
+            chunk = f.read(size)
+            if not chunk:
+                return
+            yield chunk
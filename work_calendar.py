@@ -0,0 +1,92 @@
+import bisect
+import re
+from datetime import date
+
+# --- Working-day Calendar ---
+# Holidays are held as a sorted list of date ordinals with a prefix sum of how
+# many of them fall on a working weekday. Weekdays in a range are counted
+# arithmetically, so working_days(start, end) costs two bisects however long
+# the range or the holiday list is.
+
+MONTHS = {name: number for number, names in enumerate((
+    ('jan', 'january'), ('feb', 'february'), ('mar', 'march'), ('apr', 'april'), ('may',), ('jun', 'june'),
+    ('jul', 'july'), ('aug', 'august'), ('sep', 'sept', 'september'), ('oct', 'october'), ('nov', 'november'),
+    ('dec', 'december')), start=1) for name in names}
+WEEKDAY_NAMES = re.compile(r'\b(mon|tues?|wed(nes)?|thu(rs)?|fri|sat(ur)?|sun)(day)?\b\.?', re.IGNORECASE)
+DATE_PATTERNS = [
+    (re.compile(r'\b(\d{4})-(\d{1,2})-(\d{1,2})\b'), lambda m: (m[1], m[2], m[3])),
+    (re.compile(r'\b(\d{1,2})(?:st|nd|rd|th)?[\s\-/.]*([A-Za-z]{3,9})[\s\-/.,]+(\d{4})\b'), lambda m: (m[3], m[2], m[1])),
+    (re.compile(r'\b([A-Za-z]{3,9})[\s\-.]+(\d{1,2})(?:st|nd|rd|th)?,?\s+(\d{4})\b'), lambda m: (m[3], m[1], m[2])),
+    # Numeric dates in holiday circulars are day-first.
+    (re.compile(r'\b(\d{1,2})[/.-](\d{1,2})[/.-](\d{4})\b'), lambda m: (m[3], m[2], m[1])),
+]
+
+
+def as_date(value):
+    return value if isinstance(value, date) else date.fromisoformat(value)
+
+
+class WorkingCalendar:
+    def __init__(self, holidays=(), weekend=(5, 6)):
+        # holidays: (date or 'YYYY-MM-DD', name) pairs; weekend: date.weekday() numbers.
+        self.weekend = frozenset(weekend)
+        self.names = {as_date(day).toordinal(): name for day, name in holidays}
+        self._ordinals = sorted(self.names)
+        self._prefix = [0]
+        for ordinal in self._ordinals:
+            self._prefix.append(self._prefix[-1] + ((ordinal - 1) % 7 not in self.weekend))
+        self._week_prefix = [0]
+        for weekday in range(7):
+            self._week_prefix.append(self._week_prefix[-1] + (weekday not in self.weekend))
+
+    def _weekdays_before(self, ordinal):
+        # Ordinal 1 (0001-01-01) is a Monday, so weekday() == (ordinal - 1) % 7.
+        weeks, rest = divmod(ordinal - 1, 7)
+        return weeks * self._week_prefix[7] + self._week_prefix[rest]
+
+    def _holidays_before(self, ordinal):
+        return self._prefix[bisect.bisect_left(self._ordinals, ordinal)]
+
+    def working_days(self, start, end):
+        first, last = as_date(start).toordinal(), as_date(end).toordinal() + 1
+        if last <= first:
+            return 0
+        weekdays = self._weekdays_before(last) - self._weekdays_before(first)
+        return weekdays - (self._holidays_before(last) - self._holidays_before(first))
+
+    def is_working_day(self, day):
+        day = as_date(day)
+        return day.weekday() not in self.weekend and day.toordinal() not in self.names
+
+
+def parse_holiday_line(line):
+    """Pull (date, name) out of one row of a holiday list, e.g. text copied from the yearly PDF:
+    '8  02 October 2025  Thursday  Gandhi Jayanthi/ Vijaya Dasami'. Raises ValueError."""
+    for pattern, parts in DATE_PATTERNS:
+        match = pattern.search(line)
+        if not match:
+            continue
+        year, month, day = parts(match)
+        month = int(month) if month.isdigit() else MONTHS.get(month.lower())
+        if month is None:
+            continue
+        holiday = date(int(year), month, int(day))
+        rest = WEEKDAY_NAMES.sub(' ', line[:match.start()] + ' ' + line[match.end():])
+        # Drop serial-number / total columns and table separators around the name.
+        name = re.sub(r'^[\s\d.|,;:\-]+|[\s\d.|,;:\-]+$', '', re.sub(r'\s+', ' ', rest))
+        if not name:
+            raise ValueError("Holiday name is missing")
+        return holiday, name
+    raise ValueError("No date found")
+
+
+def parse_holiday_text(text):
+    holidays, skipped = [], []
+    for number, line in enumerate(text.splitlines(), start=1):
+        if not line.strip():
+            continue
+        try:
+            holidays.append(parse_holiday_line(line))
+        except ValueError as e:
+            skipped.append({"line": number, "text": line.strip(), "error": str(e)})
+    return holidays, skipped
@@ -0,0 +1,151 @@
+import threading
+import time
+from concurrent.futures import Future
+from queue import Queue, Empty, Full
+
+# --- Group Commit ---
+# Request threads hand a write (a function of the connection) to one writer
+# thread and block on a future. The writer gathers whatever arrives within
+# max_delay (up to max_batch writes), runs each in its own savepoint so one
+# failure does not undo the others, commits them as one transaction and only
+# then resolves every caller's future with its own result or exception. A
+# burst therefore costs one commit, and one WAL sync, per batch instead of
+# one per request.
+
+# How far a commit is synced before callers are answered (SQLite's PRAGMA synchronous, WAL mode):
+#   full   - every group commit is fsync'd; an acknowledged write survives power loss
+#   normal - synced at checkpoints; a crash keeps the database consistent, but a power
+#            loss can drop the most recent acknowledged commits (the pool's setting)
+#   off    - never synced by SQLite; the OS decides when the data reaches the disk
+DURABILITY_LEVELS = {'full': 'FULL', 'normal': 'NORMAL', 'off': 'OFF'}
+
+
+class WriterBusy(Exception):
+    pass
+
+
+class WriteBatcher:
+    def __init__(self, connect, max_batch=128, max_delay=0.002, max_queue=4096, queue_timeout=5.0):
+        # connect() returns the writer's own connection; it is closed when the writer stops.
+        self.connect = connect
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.queue_timeout = queue_timeout
+        self._queue = Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.writes = 0
+        self.failed = 0
+        self.largest_batch = 0
+        self.commit_seconds = 0.0
+        self.rejected = 0
+
+    def submit(self, work):
+        """Run work(conn) in the next group commit; returns its result once committed, or raises its error."""
+        self.start()
+        future = Future()
+        try:
+            self._queue.put((work, future), timeout=self.queue_timeout)
+        except Full:
+            with self._lock:
+                self.rejected += 1
+            raise WriterBusy("Write queue is full")
+        return future.result()
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='write-batcher', daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=5.0):
+        self._stop.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+        self._thread = None
+
+    def _run(self):
+        try:
+            conn = self.connect()
+        except Exception as e:
+            # Fail what is queued; the next submit() starts a fresh writer and tries again.
+            with self._lock:
+                self._thread = None
+            while True:
+                try:
+                    self._queue.get_nowait()[1].set_exception(e)
+                except Empty:
+                    return
+        try:
+            while not self._stop.is_set():
+                try:
+                    batch = [self._queue.get(timeout=0.5)]
+                except Empty:
+                    continue
+                deadline = time.monotonic() + self.max_delay
+                while len(batch) < self.max_batch:
+                    try:
+                        batch.append(self._queue.get(timeout=max(0.0, deadline - time.monotonic())))
+                    except Empty:
+                        break
+                self._commit(conn, batch)
+            # Answer whatever was queued before the stop rather than leave callers waiting.
+            while True:
+                batch = []
+                while len(batch) < self.max_batch:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except Empty:
+                        break
+                if not batch:
+                    break
+                self._commit(conn, batch)
+        finally:
+            conn.close()
+
+    def _commit(self, conn, batch):
+        started = time.perf_counter()
+        outcomes = []
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for work, future in batch:
+                try:
+                    with conn.savepoint():
+                        outcomes.append((future, work(conn), None))
+                except Exception as e:
+                    outcomes.append((future, None, e))
+            conn.commit()
+        except Exception as e:
+            # Nothing was committed, so every caller in the batch gets the error.
+            if conn.in_transaction:
+                conn.rollback()
+            outcomes = [(future, None, e) for _, future in batch]
+        with self._lock:
+            self.batches += 1
+            self.writes += len(batch)
+            self.failed += sum(1 for _, _, error in outcomes if error is not None)
+            self.largest_batch = max(self.largest_batch, len(batch))
+            self.commit_seconds += time.perf_counter() - started
+        for future, result, error in outcomes:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "batches": self.batches,
+                "writes": self.writes,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "largest_batch": self.largest_batch,
+                "avg_batch": round(self.writes / self.batches, 2) if self.batches else 0.0,
+                "avg_commit_ms": round(1000 * self.commit_seconds / self.batches, 3) if self.batches else 0.0,
+            }
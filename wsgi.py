@@ -0,0 +1,31 @@
+import os
+import threading
+
+from static_assets import MANIFEST, StaticAssets, build_assets
+
+# --- Production Entry Point ---
+# gunicorn -c gunicorn.conf.py serves build_wsgi_app() in each worker process.
+# Any other WSGI server works the same way, e.g.
+#   waitress-serve --threads 16 --call wsgi:build_wsgi_app
+#
+# This is not an app factory: app.py builds the Flask app, its connection pool
+# and migrations once per process, at import. build_wsgi_app() wraps that
+# singleton and returns the same WSGI application on every call.
+
+_lock = threading.Lock()
+_wsgi_app = None
+
+
+def build_wsgi_app():
+    """Set up this serving process (once) and return its WSGI application."""
+    global _wsgi_app
+    with _lock:
+        if _wsgi_app is None:
+            # Importing the module builds the app, opens the connection pool and migrates the database.
+            from app import app, start_background_services, STATIC_BUILD_DIR
+
+            if not os.path.isfile(os.path.join(STATIC_BUILD_DIR, MANIFEST)):
+                build_assets(app.root_path, STATIC_BUILD_DIR)
+            start_background_services()
+            _wsgi_app = StaticAssets(app, STATIC_BUILD_DIR)
+        return _wsgi_app